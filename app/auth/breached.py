@@ -0,0 +1,153 @@
+# app/auth/breached.py
+"""
+Проверка пароля по списку утёкших без внешнего API: Bloom filter в файле.
+
+Сборка (один раз, при обновлении списка):
+
+    python -m app.auth.breached build passwords.txt breached.bloom --fp-rate 0.001
+    python -m app.auth.breached build pwned-passwords-sha1.txt breached.bloom --format sha1
+
+plain — пароль на строку; sha1 — строки "HEX[:count]" как в дампе HIBP.
+Ключ фильтра — SHA-1 пароля, поэтому оба формата дают один и тот же фильтр.
+
+Файл открывается через mmap только на чтение: страницы живут в page cache
+ОС и общие для всех воркеров, в heap процесса фильтр не загружается.
+Bloom filter не даёт ложных «не найден»; ложные «найден» — с заданной
+при сборке вероятностью (fp-rate).
+"""
+import argparse
+import hashlib
+import math
+import mmap
+import struct
+from pathlib import Path
+
+from app.config.settings import settings
+
+MAGIC = b"PWBLOOM1"
+# magic, число бит, число хэш-функций, число паролей
+HEADER = struct.Struct("<8sQIQ")
+
+
+def _positions(digest: bytes, num_bits: int, num_hashes: int):
+    # double hashing (Kirsch–Mitzenmacher): k позиций из двух 64-битных чисел
+    h1, h2 = struct.unpack_from("<QQ", digest)
+    h2 |= 1
+    for i in range(num_hashes):
+        yield (h1 + i * h2) % num_bits
+
+
+def password_digest(password: str) -> bytes:
+    return hashlib.sha1(password.encode("utf-8")).digest()
+
+
+def filter_params(count: int, fp_rate: float) -> tuple[int, int]:
+    """Оптимальные число бит и число хэш-функций для count элементов"""
+    count = max(count, 1)
+    num_bits = math.ceil(-count * math.log(fp_rate) / math.log(2) ** 2)
+    num_bits = (num_bits + 7) // 8 * 8
+    num_hashes = max(1, round(num_bits / count * math.log(2)))
+    return num_bits, num_hashes
+
+
+class BreachedPasswords:
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.num_bits, self.num_hashes, self.count = HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a breached passwords filter")
+
+    def contains_digest(self, digest: bytes) -> bool:
+        mm = self._mm
+        offset = HEADER.size
+        for pos in _positions(digest, self.num_bits, self.num_hashes):
+            if not mm[offset + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def __contains__(self, password: str) -> bool:
+        return self.contains_digest(password_digest(password))
+
+    def close(self):
+        self._mm.close()
+
+
+def _digests(lines, fmt: str):
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line:
+            continue
+        if fmt == "sha1":
+            yield bytes.fromhex(line.split(":", 1)[0])
+        else:
+            yield password_digest(line)
+
+
+def build(source: str | Path, target: str | Path, fp_rate: float, fmt: str = "plain") -> dict:
+    """Собирает фильтр из файла-списка, два прохода: подсчёт и заполнение"""
+    with open(source, encoding="utf-8", errors="surrogateescape") as f:
+        count = sum(1 for line in f if line.strip())
+
+    num_bits, num_hashes = filter_params(count, fp_rate)
+    bits = bytearray(num_bits // 8)
+    with open(source, encoding="utf-8", errors="surrogateescape") as f:
+        for digest in _digests(f, fmt):
+            for pos in _positions(digest, num_bits, num_hashes):
+                bits[pos >> 3] |= 1 << (pos & 7)
+
+    # сначала во временный файл: воркеры с открытым mmap не увидят полфайла
+    tmp = Path(f"{target}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, num_bits, num_hashes, count))
+        f.write(bits)
+    tmp.replace(target)
+
+    return {"passwords": count, "bits": num_bits, "hashes": num_hashes, "size_mb": round(len(bits) / 2 ** 20, 2)}
+
+
+_filter: BreachedPasswords | None = None
+_loaded = False
+
+
+def get_breached_passwords() -> BreachedPasswords | None:
+    """Фильтр из BREACHED_PASSWORDS_FILE, один на процесс; None — проверка выключена"""
+    global _filter, _loaded
+
+    if not _loaded:
+        _loaded = True
+        if settings.BREACHED_PASSWORDS_FILE:
+            try:
+                _filter = BreachedPasswords(settings.BREACHED_PASSWORDS_FILE)
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] Breached passwords check disabled: {e}")
+
+    return _filter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bloom filter утёкших паролей")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_cmd = commands.add_parser("build", help="собрать фильтр из списка паролей")
+    build_cmd.add_argument("source")
+    build_cmd.add_argument("target")
+    build_cmd.add_argument("--fp-rate", type=float, default=settings.BREACHED_PASSWORDS_FP_RATE)
+    build_cmd.add_argument("--format", choices=["plain", "sha1"], default="plain")
+
+    check_cmd = commands.add_parser("check", help="проверить пароль по фильтру")
+    check_cmd.add_argument("filter")
+    check_cmd.add_argument("password")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        print(build(args.source, args.target, args.fp_rate, args.format))
+    else:
+        print("breached" if args.password in BreachedPasswords(args.filter) else "not found")
+
+
+if __name__ == "__main__":
+    main()
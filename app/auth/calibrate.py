@@ -0,0 +1,105 @@
+# app/auth/calibrate.py
+"""
+Подбор параметров argon2 под конкретное железо.
+
+    python -m app.auth.calibrate --target-ms 250 --max-memory-mb 64 --write
+
+Память фиксируется на максимуме (она дороже всего для перебора на GPU),
+parallelism — по числу ядер, а time_cost растёт, пока хэш укладывается в
+бюджет. Если даже time_cost=1 не укладывается — память уменьшается вдвое.
+С --write значения пишутся в .env, после рестарта старые хэши
+перехэшируются при следующем входе пользователя (AuthService.login).
+"""
+import argparse
+import os
+import statistics
+import time
+
+from argon2.low_level import Type, hash_secret_raw
+
+from app.config.settings import ENV_PATH
+
+MIN_MEMORY_KIB = 8 * 1024
+MAX_TIME_COST = 10
+
+
+def measure(time_cost: int, memory_cost: int, parallelism: int, rounds: int = 5) -> float:
+    """Медиана времени одного хэша в секундах"""
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        hash_secret_raw(
+            b"calibration-password",
+            os.urandom(16),
+            time_cost=time_cost,
+            memory_cost=memory_cost,
+            parallelism=parallelism,
+            hash_len=32,
+            type=Type.ID,
+        )
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, max_memory_kib: int, parallelism: int) -> dict:
+    target = target_ms / 1000
+    memory_cost = max_memory_kib
+
+    while True:
+        best = None
+        for time_cost in range(1, MAX_TIME_COST + 1):
+            elapsed = measure(time_cost, memory_cost, parallelism)
+            print(f"t={time_cost} m={memory_cost}KiB p={parallelism}: {elapsed * 1000:.1f} ms")
+            if elapsed > target:
+                break
+            best = {"time_cost": time_cost, "memory_cost": memory_cost, "parallelism": parallelism, "ms": elapsed * 1000}
+
+        if best or memory_cost // 2 < MIN_MEMORY_KIB:
+            return best or {"time_cost": 1, "memory_cost": memory_cost, "parallelism": parallelism, "ms": elapsed * 1000}
+        memory_cost //= 2
+
+
+def write_env(values: dict, path=ENV_PATH):
+    """Обновляет ARGON2_* в .env, остальные строки не трогает"""
+    lines = path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+    keys = {f"ARGON2_{name.upper()}": value for name, value in values.items()}
+
+    result = []
+    for line in lines:
+        key = line.split("=", 1)[0].strip()
+        if key in keys:
+            result.append(f"{key}={keys.pop(key)}")
+        else:
+            result.append(line)
+    result.extend(f"{key}={value}" for key, value in keys.items())
+
+    path.write_text("\n".join(result) + "\n", encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Калибровка параметров argon2")
+    parser.add_argument("--target-ms", type=float, default=250, help="бюджет на один хэш")
+    parser.add_argument("--max-memory-mb", type=int, default=64, help="память на один хэш")
+    parser.add_argument("--parallelism", type=int, default=min(os.cpu_count() or 1, 4))
+    parser.add_argument("--write", action="store_true", help="записать результат в .env")
+    args = parser.parse_args()
+
+    result = calibrate(args.target_ms, args.max_memory_mb * 1024, args.parallelism)
+    print(
+        f"\nARGON2_TIME_COST={result['time_cost']}\n"
+        f"ARGON2_MEMORY_COST={result['memory_cost']}\n"
+        f"ARGON2_PARALLELISM={result['parallelism']}\n"
+        f"~{result['ms']:.1f} ms на хэш"
+    )
+
+    if args.write:
+        write_env({
+            "time_cost": result["time_cost"],
+            "memory_cost": result["memory_cost"],
+            "parallelism": result["parallelism"],
+        })
+        print(f"Записано в {ENV_PATH}")
+
+
+if __name__ == "__main__":
+    main()
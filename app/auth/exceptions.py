@@ -18,4 +18,27 @@ class ValidationError(Exception):
     def __init__(self, code: str, message: str, field: str):
         self.code = code
         self.message = message
-        self.field = field
\ No newline at end of file
+        self.field = field
+
+
+class PasswordPolicyError(ValidationError):
+    """Пароль не прошёл политику; code/message — первого нарушения, violations — всех"""
+
+    def __init__(self, violations: list[ValidationError]):
+        first = violations[0]
+        super().__init__(first.code, first.message, first.field)
+        self.violations = violations
+
+
+class ServiceOverloaded(Exception):
+    message = "Сервер перегружен, попробуйте позже"
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+
+
+class RateLimited(Exception):
+    message = "Слишком много попыток, попробуйте позже"
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
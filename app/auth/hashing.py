@@ -0,0 +1,107 @@
+# app/auth/hashing.py
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config.settings import settings
+from app.metrics import password_hash_seconds, registry, stats_families
+
+from .exceptions import ServiceOverloaded
+from .security import hash_password, verify_password
+
+
+class PasswordHasher:
+    """
+    Отдельный пул для argon2: хэширование не занимает общий threadpool
+    и не душит дешёвые эндпоинты (/auth/refresh).
+    argon2-cffi отпускает GIL, поэтому хватает потоков, процессы не нужны.
+    """
+
+    def __init__(self, workers: int, queue_size: int, retry_after: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="argon2")
+        self._lock = threading.Lock()
+
+        self.pending = 0  # в работе + в очереди
+        self.rejected = 0
+        self.completed = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.pending - self.workers)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", hash_password, password)
+
+    async def verify(self, password: str, hash_: str) -> bool:
+        return await self._submit("verify", verify_password, password, hash_)
+
+    async def _submit(self, operation: str, fn, *args):
+        # admission control: очередь полная — сразу 503, не ждём
+        if self.pending >= self.workers + self.queue_size:
+            self.rejected += 1
+            print(f"[HASHING] Queue is full ({self.queue_depth}), request rejected")
+            raise ServiceOverloaded(self.retry_after)
+
+        with self._lock:
+            self.pending += 1
+        try:
+            future = self._executor.submit(self._timed, operation, fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # слот освобождается, когда argon2 закончил, а не когда ушёл клиент:
+        # отменённый запрос не снимает задачу, уже запущенную в пуле
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future=None):
+        with self._lock:
+            self.pending -= 1
+
+    def _timed(self, operation: str, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            password_hash_seconds.observe(elapsed, operation=operation)
+            with self._lock:
+                self.completed += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            avg = self.total_seconds / self.completed if self.completed else 0.0
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": min(self.pending, self.workers),
+                "queue_depth": self.queue_depth,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_ms": round(avg * 1000, 2),
+                "max_ms": round(self.max_seconds * 1000, 2),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    workers=settings.HASH_WORKERS or os.cpu_count() or 1,
+    queue_size=settings.HASH_QUEUE_SIZE,
+    retry_after=settings.HASH_RETRY_AFTER_SECONDS,
+)
+
+
+@registry.collector
+def _hasher_metrics():
+    return stats_families("password_hasher", [({}, password_hasher.stats())], counters=("completed", "rejected"))
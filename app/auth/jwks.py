@@ -0,0 +1,220 @@
+# app/auth/jwks.py
+"""
+Подпись access токенов и публичные ключи для других сервисов.
+
+JWT_ALGORITHM=HS256 — как раньше, общий JWT_SECRET. RS256 (или ES256) —
+подпись закрытым ключом JWT_PRIVATE_KEY_FILE, в заголовке токена kid
+(RFC 7638 thumbprint ключа). Публичные ключи отдаются на
+/.well-known/jwks.json: любой сервис проверяет токен сам, без общего
+секрета и без запроса к этому приложению (JWKSVerifier).
+
+Ротация: новый ключ сначала добавить в JWT_PUBLIC_KEY_FILES и подождать
+JWKS_MAX_AGE_SECONDS, чтобы все закэшировали его; затем сделать его
+JWT_PRIVATE_KEY_FILE, а старый перенести в JWT_PUBLIC_KEY_FILES и убрать,
+когда истекут выданные им токены (ACCESS_TOKEN_EXPIRE_MINUTES).
+
+    python -m app.auth.jwks generate keys/jwt-2026-10.pem
+
+EdDSA python-jose не поддерживает, поэтому RS256 / ES256.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import httpx
+from jose import jwk, jwt
+from jose.exceptions import JWTError
+
+from app.config.settings import settings
+
+ASYMMETRIC = ("RS256", "RS384", "RS512", "ES256", "ES384", "ES512")
+
+# обязательные поля JWK для thumbprint по RFC 7638
+THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y")}
+
+
+def thumbprint(public_jwk: dict) -> str:
+    members = {name: public_jwk[name] for name in THUMBPRINT_MEMBERS[public_jwk["kty"]]}
+    canonical = json.dumps(members, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(hashlib.sha256(canonical).digest()).rstrip(b"=").decode()
+
+
+class SigningKeys:
+    """
+    Ключ подписи и ключи проверки. Ключи разобраны один раз при старте:
+    на каждый токен не парсим PEM.
+    """
+
+    def __init__(self, algorithm: str, secret: str = "", private_key: str | None = None,
+                 public_keys: tuple[str, ...] = ()):
+        self.algorithm = algorithm
+        self.kid = None
+        self._verify_keys = {}
+        self._jwks = {"keys": []}
+        self.jwks_body = None  # HS256: публиковать нечего
+        self.jwks_etag = None
+
+        if algorithm not in ASYMMETRIC:
+            if not secret:
+                raise RuntimeError(f"JWT_SECRET is required for {algorithm}")
+            self._signing_key = secret
+            return
+
+        if not private_key:
+            raise RuntimeError(f"JWT_PRIVATE_KEY_FILE is required for {algorithm}")
+
+        self._signing_key = jwk.construct(private_key, algorithm)
+        public = [self._signing_key.public_key()]
+        for pem in public_keys:
+            key = jwk.construct(pem, algorithm)
+            # прежний ключ подписи можно положить как есть — наружу только публичная часть
+            public.append(key if key.is_public() else key.public_key())
+        for key in public:
+            public_jwk = key.to_dict()
+            kid = thumbprint(public_jwk)
+            self._verify_keys[kid] = key
+            self._jwks["keys"].append({**public_jwk, "kid": kid, "use": "sig"})
+        self.kid = thumbprint(public[0].to_dict())
+
+        # отдаётся как есть на каждый запрос к /.well-known/jwks.json
+        self.jwks_body = json.dumps(self._jwks, separators=(",", ":")).encode()
+        self.jwks_etag = '"' + hashlib.sha256(self.jwks_body).hexdigest()[:32] + '"'
+
+    @classmethod
+    def from_settings(cls, settings) -> "SigningKeys":
+        if settings.JWT_ALGORITHM not in ASYMMETRIC:
+            return cls(settings.JWT_ALGORITHM, secret=settings.JWT_SECRET)
+
+        private_key = Path(settings.JWT_PRIVATE_KEY_FILE).read_text() if settings.JWT_PRIVATE_KEY_FILE else None
+        public_keys = tuple(
+            Path(path.strip()).read_text()
+            for path in settings.JWT_PUBLIC_KEY_FILES.split(",") if path.strip()
+        )
+        return cls(settings.JWT_ALGORITHM, private_key=private_key, public_keys=public_keys)
+
+    @property
+    def asymmetric(self) -> bool:
+        return self.algorithm in ASYMMETRIC
+
+    def jwks(self) -> dict:
+        return self._jwks
+
+    def encode(self, payload: dict) -> str:
+        headers = {"kid": self.kid} if self.kid else None
+        return jwt.encode(payload, self._signing_key, algorithm=self.algorithm, headers=headers)
+
+    def decode(self, token: str) -> dict:
+        if not self.asymmetric:
+            return jwt.decode(token, self._signing_key, algorithms=[self.algorithm])
+
+        key = self._verify_keys.get(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            raise JWTError("Unknown key id")
+        return jwt.decode(token, key, algorithms=[self.algorithm])
+
+
+signing_keys = SigningKeys.from_settings(settings)
+
+
+class JWKSVerifier:
+    """
+    Проверка access токенов в другом сервисе по /.well-known/jwks.json.
+
+        verifier = JWKSVerifier("http://auth:8000/.well-known/jwks.json")
+        claims = await verifier.verify(token)
+
+    Ключи кэшируются на max_age секунд. Неизвестный kid (ключ только что
+    ротировали) — внеочередная загрузка, но не чаще раза в
+    min_refresh_interval: токены с выдуманным kid не превратятся в поток
+    запросов к auth.
+    """
+
+    def __init__(self, url: str, algorithms: tuple[str, ...] = ("RS256",), max_age: float = 300.0,
+                 min_refresh_interval: float = 30.0, client=None):
+        self.url = url
+        self.algorithms = list(algorithms)
+        self.max_age = max_age
+        self.min_refresh_interval = min_refresh_interval
+        self._client = client
+        self._keys = {}
+        self._fetched_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def _fetch(self):
+        if self._client is not None:
+            response = await self._client.get(self.url)
+        else:
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                response = await client.get(self.url)
+        response.raise_for_status()
+
+        keys = {}
+        for entry in response.json()["keys"]:
+            if entry.get("alg") in self.algorithms and entry.get("use", "sig") == "sig":
+                keys[entry["kid"]] = jwk.construct(entry, entry["alg"])
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+
+    async def key(self, kid: str):
+        age = time.monotonic() - self._fetched_at
+        if kid in self._keys and age < self.max_age:
+            return self._keys[kid]
+
+        async with self._lock:
+            # пока ждали lock, ключи мог загрузить другой запрос
+            age = time.monotonic() - self._fetched_at
+            stale = age >= self.max_age
+            if stale or (kid not in self._keys and age >= self.min_refresh_interval):
+                await self._fetch()
+
+        key = self._keys.get(kid)
+        if key is None:
+            raise JWTError("Unknown key id")
+        return key
+
+    async def verify(self, token: str, **options) -> dict:
+        """Claims токена; JWTError — подпись, срок, неизвестный kid"""
+        key = await self.key(jwt.get_unverified_header(token).get("kid"))
+        return jwt.decode(token, key, algorithms=self.algorithms, **options)
+
+
+def generate(target: str | Path, algorithm: str = "RS256") -> str:
+    """Новый закрытый ключ в PEM; возвращает kid"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+    if algorithm.startswith("RS"):
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        curve = {"ES256": ec.SECP256R1(), "ES384": ec.SECP384R1(), "ES512": ec.SECP521R1()}[algorithm]
+        private = ec.generate_private_key(curve)
+
+    pem = private.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    target = Path(target)
+    target.write_bytes(pem)
+    target.chmod(0o600)
+    return thumbprint(jwk.construct(pem, algorithm).public_key().to_dict())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ключи подписи JWT")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_cmd = commands.add_parser("generate", help="создать закрытый ключ в PEM")
+    generate_cmd.add_argument("target")
+    generate_cmd.add_argument("--algorithm", choices=ASYMMETRIC, default="RS256")
+
+    args = parser.parse_args()
+    print(f"kid: {generate(args.target, args.algorithm)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# app/auth/rate_limit.py
+"""
+Ограничение частоты для login, register и password-reset.
+
+Скользящее окно (журнал попыток, а не счётчик на фиксированную минуту):
+"5/60" — не больше 5 запросов за любые 60 секунд. Каждый маршрут
+ограничивается по IP и по email (RATE_LIMITS): с одного IP не перебрать
+много адресов, а с многих IP — пароль одного адреса.
+
+Логин дополнительно блокируется после LOGIN_LOCKOUT_THRESHOLD неудач
+подряд для пары email + IP: на LOGIN_LOCKOUT_BASE_SECONDS, дальше каждая
+неудача удваивает срок (до LOGIN_LOCKOUT_MAX_SECONDS). Успешный вход
+сбрасывает счётчик.
+
+Проверка идёт в начале обработчика, до argon2 и до запросов к базе.
+Email в ключах — SHA-256: в Redis не лежат адреса. IP — request.client:
+за прокси uvicorn нужен --proxy-headers.
+"""
+import hashlib
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from uuid import uuid4
+
+from app.config.settings import settings
+from app.metrics import registry
+
+from .exceptions import RateLimited
+
+rate_limit_rejections = registry.counter(
+    "rate_limit_rejections_total", "Запросы, отклонённые ограничением частоты или блокировкой", ("route",),
+)
+rate_limit_lockouts = registry.counter(
+    "rate_limit_lockouts_total", "Блокировки пары email + IP после неудачных попыток", ("route",),
+)
+rate_limit_errors = registry.counter(
+    "rate_limit_errors_total", "Ошибки хранилища ограничений; запрос пропущен без проверки",
+)
+
+
+def parse_limit(value: str) -> tuple[int, float]:
+    """"10/60" → (10, 60.0): запросов за секунд"""
+    count, _, seconds = value.partition("/")
+    return int(count), float(seconds)
+
+
+class RateLimitBackend(ABC):
+
+    @abstractmethod
+    async def acquire(self, lock: str | None, windows: list[tuple[str, int, float]]) -> float:
+        """
+        Записать попытку во все окна [(ключ, лимит, секунд), ...], если
+        ни одно не заполнено и нет блокировки lock. Возвращает, через сколько
+        секунд повторить; 0 — попытка разрешена.
+        """
+
+    @abstractmethod
+    async def fail(self, counter: str, lock: str, threshold: int, base: float, maximum: float) -> float:
+        """Неудачная попытка; возвращает срок блокировки (0 — порог не достигнут)"""
+
+    @abstractmethod
+    async def reset(self, counter: str, lock: str) -> None: ...
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Для тестов: окна в словаре процесса"""
+
+    def __init__(self):
+        self.windows: dict[str, deque[float]] = {}
+        self.failures: dict[str, int] = {}
+        self.locks: dict[str, float] = {}
+
+    async def acquire(self, lock, windows):
+        now = time.monotonic()
+        retry_after = self.locks.get(lock, now) - now if lock else 0.0
+
+        for key, limit, seconds in windows:
+            attempts = self.windows.setdefault(key, deque())
+            while attempts and attempts[0] <= now - seconds:
+                attempts.popleft()
+            if len(attempts) >= limit:
+                retry_after = max(retry_after, attempts[0] + seconds - now)
+
+        if retry_after > 0:
+            return retry_after
+        for key, _, _ in windows:
+            self.windows[key].append(now)
+        return 0.0
+
+    async def fail(self, counter, lock, threshold, base, maximum):
+        failures = self.failures[counter] = self.failures.get(counter, 0) + 1
+        if failures < threshold:
+            return 0.0
+        duration = min(base * 2 ** (failures - threshold), maximum)
+        self.locks[lock] = time.monotonic() + duration
+        return duration
+
+    async def reset(self, counter, lock):
+        self.failures.pop(counter, None)
+        self.locks.pop(lock, None)
+
+
+# KEYS: lock, окна...; ARGV: now_ms, member, затем лимит и окно_ms на каждое окно
+ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local retry = 0
+if KEYS[1] ~= '' then
+    retry = math.max(redis.call('PTTL', KEYS[1]), 0)
+end
+
+for i = 2, #KEYS do
+    local limit = tonumber(ARGV[2 * i - 1])
+    local window = tonumber(ARGV[2 * i])
+    redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now - window)
+    if redis.call('ZCARD', KEYS[i]) >= limit then
+        local oldest = redis.call('ZRANGE', KEYS[i], 0, 0, 'WITHSCORES')
+        retry = math.max(retry, tonumber(oldest[2]) + window - now)
+    end
+end
+
+if retry > 0 then
+    return retry
+end
+for i = 2, #KEYS do
+    redis.call('ZADD', KEYS[i], now, ARGV[2])
+    redis.call('PEXPIRE', KEYS[i], ARGV[2 * i])
+end
+return 0
+"""
+
+# KEYS: счётчик неудач, lock; ARGV: порог, base_ms, max_ms
+FAIL_SCRIPT = """
+local failures = redis.call('INCR', KEYS[1])
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+local threshold = tonumber(ARGV[1])
+if failures < threshold then
+    return 0
+end
+local duration = math.floor(math.min(tonumber(ARGV[2]) * 2 ^ (failures - threshold), tonumber(ARGV[3])))
+redis.call('SET', KEYS[2], 1, 'PX', duration)
+return duration
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Окно — sorted set попыток; проверка и запись одним Lua скриптом"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self._acquire = redis.register_script(ACQUIRE_SCRIPT)
+        self._fail = redis.register_script(FAIL_SCRIPT)
+
+    async def acquire(self, lock, windows):
+        now_ms = int(time.time() * 1000)
+        # member уникален и между процессами: попытки в одну миллисекунду не схлопываются
+        args = [now_ms, uuid4().hex]
+        for _, limit, seconds in windows:
+            args += [limit, int(seconds * 1000)]
+
+        retry_ms = await self._acquire(keys=[lock or "", *(key for key, _, _ in windows)], args=args)
+        return int(retry_ms) / 1000
+
+    async def fail(self, counter, lock, threshold, base, maximum):
+        duration_ms = await self._fail(keys=[counter, lock], args=[threshold, int(base * 1000), int(maximum * 1000)])
+        return int(duration_ms) / 1000
+
+    async def reset(self, counter, lock):
+        await self.redis.delete(counter, lock)
+
+
+class RateLimiter:
+    """
+    limits — {маршрут: {"ip": "N/секунд", "email": "N/секунд"}}; маршрута
+    нет в limits — без ограничения. Хранилище недоступно — запрос
+    пропускается: ограничение частоты не должно ронять вход.
+    """
+
+    def __init__(self, backend: RateLimitBackend, limits: dict, lockout_threshold: int,
+                 lockout_base: float, lockout_max: float, enabled: bool = True, prefix: str = "ratelimit"):
+        self.backend = backend
+        self.enabled = enabled
+        self.limits = {
+            route: {scope: parse_limit(value) for scope, value in scopes.items()}
+            for route, scopes in limits.items()
+        }
+        self.lockout_threshold = lockout_threshold
+        self.lockout_base = lockout_base
+        self.lockout_max = lockout_max
+        self.prefix = prefix
+
+    @staticmethod
+    def _email(email: str) -> str:
+        return hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+
+    def _lockout_keys(self, route: str, ip: str, email: str) -> tuple[str, str]:
+        subject = f"{route}:{self._email(email)}:{ip}"
+        return f"{self.prefix}:fail:{subject}", f"{self.prefix}:lock:{subject}"
+
+    async def check(self, route: str, ip: str, email: str | None = None, lockout: bool = False):
+        """RateLimited, если окно маршрута заполнено или пара email + IP заблокирована"""
+        if not self.enabled:
+            return
+
+        scopes = self.limits.get(route, {})
+        subjects = {"ip": ip, "email": self._email(email) if email else None}
+        windows = [
+            (f"{self.prefix}:{route}:{scope}:{subjects[scope]}", limit, seconds)
+            for scope, (limit, seconds) in scopes.items() if subjects.get(scope)
+        ]
+        lock = self._lockout_keys(route, ip, email)[1] if lockout and email else None
+        if not windows and not lock:
+            return
+
+        try:
+            retry_after = await self.backend.acquire(lock, windows)
+        except Exception as e:
+            rate_limit_errors.inc()
+            print(f"[RATE LIMIT] Store unavailable, request not limited: {e}")
+            return
+
+        if retry_after > 0:
+            rate_limit_rejections.inc(route=route)
+            raise RateLimited(math.ceil(retry_after))
+
+    async def failed(self, route: str, ip: str, email: str):
+        if not self.enabled:
+            return
+
+        counter, lock = self._lockout_keys(route, ip, email)
+        try:
+            duration = await self.backend.fail(
+                counter, lock, self.lockout_threshold, self.lockout_base, self.lockout_max,
+            )
+        except Exception as e:
+            rate_limit_errors.inc()
+            print(f"[RATE LIMIT] Store unavailable, failure not counted: {e}")
+            return
+        if duration:
+            rate_limit_lockouts.inc(route=route)
+            print(f"[RATE LIMIT] {route} locked for {duration:.0f}s after repeated failures from {ip}")
+
+    async def succeeded(self, route: str, ip: str, email: str):
+        if not self.enabled:
+            return
+
+        try:
+            await self.backend.reset(*self._lockout_keys(route, ip, email))
+        except Exception as e:
+            rate_limit_errors.inc()
+            print(f"[RATE LIMIT] Store unavailable, failures not reset: {e}")
+
+
+_rate_limiter: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Бэкенд выбирается RATE_LIMIT_BACKEND, экземпляр один на процесс"""
+    global _rate_limiter
+
+    if _rate_limiter is None:
+        backend = settings.RATE_LIMIT_BACKEND
+        if backend == "redis":
+            from app.config.redis import redis_client
+
+            # с таймаутами: зависший Redis — запрос пропускается без проверки
+            store = RedisRateLimitBackend(redis_client())
+        elif backend == "memory":
+            store = MemoryRateLimitBackend()
+        else:
+            raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
+
+        _rate_limiter = RateLimiter(
+            store,
+            settings.RATE_LIMITS,
+            settings.LOGIN_LOCKOUT_THRESHOLD,
+            settings.LOGIN_LOCKOUT_BASE_SECONDS,
+            settings.LOGIN_LOCKOUT_MAX_SECONDS,
+            enabled=settings.RATE_LIMIT_ENABLED,
+        )
+
+    return _rate_limiter
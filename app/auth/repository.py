@@ -1,65 +1,79 @@
 # app/auth/repository.py
-from datetime import datetime, timezone
-from sqlmodel import Session, select, update
+from datetime import datetime
+from sqlmodel import select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import UUID, uuid4
 
+from app.config.settings import settings
+from app.models.email_outbox import EmailOutbox
 from app.models.user import User, Tokens
+from .token_store import TokenStore, get_token_store
 
 
 class AuthRepository:
+    """
+    Unit of work: методы только добавляют изменения в сессию (и при
+    необходимости делают flush), commit — один раз в AuthService.
+    id генерируются на клиенте (uuid4), поэтому refresh после insert не нужен.
+    """
 
-    def get_user_by_email(self, session: Session, email: str) -> User | None:
+    def __init__(self, tokens: TokenStore | None = None):
+        # где живут токены — Postgres, Redis или память — решает TOKEN_STORE_BACKEND
+        self.tokens = tokens or get_token_store()
+
+    async def get_user_by_email(self, session: AsyncSession, email: str) -> User | None:
         stmt = select(User).where(User.email == email)
-        return session.exec(stmt).first()
+        return (await session.exec(stmt)).first()
+
+    async def get_user(self, session: AsyncSession, user_id: UUID) -> User | None:
+        return await session.get(User, user_id)
 
-    def create_user(self, session: Session, user: User):
+    async def create_user(self, session: AsyncSession, user: User):
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        # flush сразу: токены пользователя ссылаются на него по FK
+        await session.flush()
         return user
 
+    async def activate_user(self, session: AsyncSession, user_id: UUID):
+        # UPDATE без предварительного SELECT пользователя
+        await session.exec(update(User).where(User.id == user_id).values(is_active=True))
+
+    async def set_password_hash(self, session: AsyncSession, user_id: UUID, password_hash: str):
+        await session.exec(update(User).where(User.id == user_id).values(password_hash=password_hash))
+
     # refresh tokens
 
-    def save_refresh_token(self, session: Session, token: Tokens):
-        session.add(token)
-        session.commit()
+    async def save_refresh_token(self, session: AsyncSession, token: Tokens):
+        await self.tokens.save(session, token)
 
-    def get_refresh_token(self, session: Session, token_hash: str) -> Tokens | None:
-        stmt = select(Tokens).where(
-            Tokens.token_hash == token_hash,
-            Tokens.revoked_at.is_(None),
-            Tokens.expires_at > datetime.now(timezone.utc),
-        )
-        return session.exec(stmt).first()
+    async def get_refresh_token(self, session: AsyncSession, token_hash: str) -> Tokens | None:
+        return await self.tokens.get_valid(session, settings.REFRESH_TOKEN_TYPE, token_hash=token_hash)
+
+    async def revoke_refresh_token(self, session: AsyncSession, token: Tokens): # отзыв токена
+        await self.tokens.revoke(session, token)
 
-    def revoke_refresh_token(self, session: Session, token: Tokens): # отзыв токена
-        token.revoked_at = datetime.now(timezone.utc)
-        session.add(token)
-        session.commit()
+    async def rotate_refresh_token(
+            self,
+            session: AsyncSession,
+            old_hash: str,
+            new_hash: str,
+            expires_at: datetime,
+    ) -> UUID | None: # отзыв старого и выпуск нового одной операцией
+        return await self.tokens.rotate(session, old_hash, new_hash, expires_at)
 
 
 # отзыв всех токенов
-    def revoke_all_refresh_tokens(
+    async def revoke_all_refresh_tokens(
             self,
-            session: Session,
+            session: AsyncSession,
             user_id,
     ) -> None:
-        stmt = (
-            update(Tokens)
-            .where(
-                Tokens.user_id == user_id,
-                Tokens.revoked_at.is_(None),
-            )
-            .values(revoked_at=datetime.now(timezone.utc))
-        )
-
-        session.exec(stmt)
-        session.commit()
+        await self.tokens.revoke_all(session, user_id)
 
 # email confirmation tokens
-    def create_token(
+    async def create_token(
                     self,
-                    session: Session,
+                    session: AsyncSession,
                     user_id: UUID,
                     token_type: str,
                     expires_at: datetime
@@ -71,28 +85,28 @@ class AuthRepository:
             token_type=token_type,
             expires_at=expires_at
         )
-        session.add(token)
-        session.commit()
-        session.refresh(token)
-        return token
+        return await self.tokens.save(session, token)
 
     # email validation tokens
-    def get_valid_token(
+    async def get_valid_token(
                         self,
-                        session: Session,
+                        session: AsyncSession,
                         token: str | None,
                         token_type: str
                         ) -> Tokens | None:
-        stmt = select(Tokens).where(
-            Tokens.token == token,
-            Tokens.token_type == token_type,
-            Tokens.is_used == False,
-            Tokens.expires_at > datetime.now(timezone.utc)
-        )
-        return session.exec(stmt).first()
-
-    def update_token(self, session: Session, token: Tokens):
-        session.add(token)
-        session.commit()
-        session.refresh(token)
-
+        return await self.tokens.get_valid(session, token_type, token=token)
+
+    async def mark_token_used(self, session: AsyncSession, token: Tokens) -> bool:
+        return await self.tokens.mark_used(session, token)
+
+    async def release_token(self, session: AsyncSession, token: Tokens):
+        await self.tokens.release(session, token)
+
+    # email outbox: письмо сохраняется в той же транзакции, отправляет relay
+    async def enqueue_email(self, session: AsyncSession, email_type: str, to_email: str, token: str):
+        session.add(EmailOutbox(
+            dedup_key=f"{email_type}:{token}",
+            email_type=email_type,
+            to_email=to_email,
+            token=token,
+        ))
@@ -1,7 +1,8 @@
 # app/auth/router.py
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .schemas import (
     RegisterRequest,
@@ -14,8 +15,9 @@ from .schemas import (
 )
 from .service import AuthService
 from .repository import AuthRepository
-from .exceptions import AuthError, ValidationError
-from app.config.database import get_session
+from .exceptions import AuthError, InvalidCredentials, PasswordPolicyError, ValidationError
+from .rate_limit import RateLimiter, get_rate_limiter
+from app.config.database import get_async_session, get_read_session
 
 from uuid import UUID
 from .security import get_current_user_id
@@ -29,128 +31,161 @@ def get_service():
     return AuthService(AuthRepository())
 
 
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def validation_detail(e: ValidationError) -> dict:
+    detail = {
+        "code": e.code,
+        "message": e.message,
+        "field": e.field,
+    }
+    # политика паролей отдаёт все нарушения сразу
+    if isinstance(e, PasswordPolicyError):
+        detail["violations"] = [
+            {"code": v.code, "message": v.message, "field": v.field} for v in e.violations
+        ]
+    return detail
+
+
 @router.post("/register", response_model=MessageResponse)
-def register(
+async def register(
             data: RegisterRequest,
-            session: Session = Depends(get_session),
+            request: Request,
+            session: AsyncSession = Depends(get_async_session),
             service: AuthService = Depends(get_service),
+            limiter: RateLimiter = Depends(get_rate_limiter),
             ):
+    await limiter.check("register", client_ip(request), data.email)
     try:
-        service.register(session, data)
+        await service.register(session, data)
         return MessageResponse(message="Проверьте почту для подтверждения email")
 
 
     except ValidationError as e:
         raise HTTPException(
             status_code=410 if e.code == "INVALID_TOKEN" else 400,
-            detail={
-                "code": e.code,
-                "message": e.message,
-                "field": e.field,
-            },
+            detail=validation_detail(e),
         )
 
 @router.post("/login", response_model=TokenPairResponse) # Вход через форму с помощью OAuth2PasswordRequestForm
-def login_form(
+async def login_form(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     service: AuthService = Depends(get_service),
+    limiter: RateLimiter = Depends(get_rate_limiter),
 ):
-    try:
-        return service.login(
-            session,
-            email=form_data.username,  # ← email здесь
-            password=form_data.password,
-        )
-    except AuthError as e:
-        raise HTTPException(status_code=400, detail=e.message)
+    return await limited_login(limiter, client_ip(request), service, session, form_data.username, form_data.password)
 
 @router.post("/login/json", response_model=TokenPairResponse) # Вход через json для апи
-def login_json(
+async def login_json(
     data: LoginRequest,
-    session: Session = Depends(get_session),
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
     service: AuthService = Depends(get_service),
+    limiter: RateLimiter = Depends(get_rate_limiter),
 ):
+    return await limited_login(limiter, client_ip(request), service, session, data.email, data.password)
+
+
+async def limited_login(limiter: RateLimiter, ip: str, service: AuthService, session: AsyncSession,
+                        email: str, password: str):
+    # до argon2: перебор отсекается без хэширования и запросов к базе
+    await limiter.check("login", ip, email, lockout=True)
     try:
-        return service.login(session, data.email, data.password)
+        tokens = await service.login(session, email, password)
+    except InvalidCredentials as e:
+        await limiter.failed("login", ip, email)
+        raise HTTPException(status_code=400, detail=e.message)
     except AuthError as e:
         raise HTTPException(status_code=400, detail=e.message)
 
+    await limiter.succeeded("login", ip, email)
+    return tokens
+
 
 @router.post("/refresh", response_model=TokenPairResponse)
-def refresh(
+async def refresh(
     data: RefreshRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     service: AuthService = Depends(get_service),
 ):
     try:
-        return service.refresh(session, data.refresh_token)
+        return await service.refresh(session, data.refresh_token)
     except AuthError as e:
         raise HTTPException(status_code=401, detail=e.message)
 
 
 @router.post("/logout-all", response_model=MessageResponse)
-def logout_all(
+async def logout_all(
     user_id: UUID = Depends(get_current_user_id),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     service: AuthService = Depends(get_service),
 ):
-    service.logout_all(session, user_id)
+    await service.logout_all(session, user_id)
     return {"message": "Вы вышли со всех устройств"}
 
 
 @router.get("/confirm-email", response_model=MessageResponse)
-def confirm_email(
+async def confirm_email(
     token: str = Query(...),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     service: AuthService = Depends(get_service),
 ):
     try:
-        service.confirm_email(session, token)
+        await service.confirm_email(session, token)
         return MessageResponse(message="Email подтверждён")
 
     except ValidationError as e:
         raise HTTPException(
             status_code=400,
-            detail={
-                "code": e.code,
-                "message": e.message,
-                "field": e.field,
-            },
+            detail=validation_detail(e),
         )
 
 
 @router.post("/password-reset/request", response_model=MessageResponse)
-def password_reset_request(
+async def password_reset_request(
     data: PasswordResetRequest,
-    session: Session = Depends(get_session),
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
     service: AuthService = Depends(get_service),
+    limiter: RateLimiter = Depends(get_rate_limiter),
 ):
-    service.request_password_reset(session, data.email)
+    await limiter.check("password_reset", client_ip(request), data.email)
+    await service.request_password_reset(session, data.email)
     return MessageResponse(
         message="Если email существует, инструкция отправлена"
     )
 
 
 @router.post("/password-reset/confirm", response_model=MessageResponse)
-def password_reset_confirm(
+async def password_reset_confirm(
     data: PasswordResetConfirmRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     service: AuthService = Depends(get_service),
 ):
-    service.reset_password(
-        session,
-        data.token,
-        data.new_password,
-        data.confirm_password,
-        data.email,
-    )
+    try:
+        await service.reset_password(
+            session,
+            data.token,
+            data.new_password,
+            data.confirm_password,
+            data.email,
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=410 if e.code == "INVALID_TOKEN" else 400,
+            detail=validation_detail(e),
+        )
     return MessageResponse(message="Пароль успешно изменён")
 
 @router.get("/password-reset/confirm") # только для фронтенда
-def password_reset_confirm_get(
+async def password_reset_confirm_get(
     token: str,
-    session: Session = Depends(get_session),
+    read_session: AsyncSession = Depends(get_read_session),  # только чтение — можно с реплики
+    session: AsyncSession = Depends(get_async_session),  # соединение берёт только при запросе
     service: AuthService = Depends(get_service),
 ):
     """
@@ -158,7 +193,11 @@ def password_reset_confirm_get(
     Проверяет валидность токена и редиректит на фронтенд с query-параметром token.
     """
 
-    db_token = service.repo.get_valid_token(session, token, settings.PASSWORD_RESET_TOKEN_TYPE)
+    db_token = await service.repo.get_valid_token(read_session, token, settings.PASSWORD_RESET_TOKEN_TYPE)
+
+    if not db_token and read_session is not session:
+        # письмо приходит через секунды после записи токена — реплика могла отстать
+        db_token = await service.repo.get_valid_token(session, token, settings.PASSWORD_RESET_TOKEN_TYPE)
 
     if not db_token:
         raise HTTPException(
@@ -8,29 +8,51 @@ from secrets import token_urlsafe
 from app.config.settings import settings
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError
 
+from .jwks import signing_keys
+from .token_cache import access_token_cache
+from .token_epochs import CLAIM as EPOCH_CLAIM, get_token_epochs
 
 
 
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user_id(
+async def get_current_user_id( # async: проверка jwt дешёвая, threadpool не нужен
     token: str = Depends(oauth2_scheme),
 ) -> UUID:
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        return UUID(payload["sub"])
+        payload = access_token_cache.get(token)
+        if payload is None:
+            payload = signing_keys.decode(token)
+            access_token_cache.put(token, payload)
+        user_id = UUID(payload["sub"])
     except (JWTError, KeyError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Недействительный токен",
         )
 
+    # после кэша: в нём claims, отзыв проверяется на каждом запросе
+    epochs = get_token_epochs()
+    if epochs.is_revoked(payload, await epochs.current(user_id)):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Токен отозван",
+        )
+    return user_id
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -39,12 +61,17 @@ def verify_password(password: str, hash_: str) -> bool:
     return pwd_context.verify(password, hash_)
 
 
-def create_access_token(user_id: UUID) -> str:
+def password_needs_rehash(hash_: str) -> bool: # хэш сделан со старыми параметрами argon2
+    return pwd_context.needs_update(hash_)
+
+
+def create_access_token(user_id: UUID, epoch: int = 0) -> str:
     payload = {
         "sub": str(user_id),
         "exp": datetime.now(timezone.utc) + settings.ACCESS_TOKEN_TTL,
+        EPOCH_CLAIM: epoch,
     }
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return signing_keys.encode(payload)
 
 
 def create_refresh_token() -> str:
@@ -1,33 +1,24 @@
 # app/auth/service.py
 from datetime import datetime, timezone
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import UUID
 from .repository import AuthRepository
 from .schemas import RegisterRequest
 from app.models.user import User, Tokens
 from .security import (
-    hash_password,
-    verify_password,
     create_access_token,
     create_refresh_token,
+    password_needs_rehash,
     hash_refresh_token,
     generate_token,
     token_expiration,
 )
 from app.config.settings import settings
 
+from .hashing import password_hasher
+from .token_epochs import get_token_epochs
 from .validators import validate_password
 from .exceptions import InvalidCredentials, EmailAlreadyExists, EmailNotVerified, ValidationError
-from .templates import email_confirmation, password_reset
-
-# Импорт задач Celery с обработкой ошибок
-try:
-    from app.tasks.email_tasks import send_email_confirmation, send_password_reset
-    CELERY_AVAILABLE = True
-except (ImportError, ModuleNotFoundError):
-    CELERY_AVAILABLE = False
-    print("[WARNING] Celery not available. Email sending will be synchronous.")
-
 
 
 class AuthService:
@@ -35,9 +26,9 @@ class AuthService:
     def __init__(self, repo: AuthRepository):
         self.repo = repo
 
-    def register(self, session, data):
+    async def register(self, session: AsyncSession, data):
 
-        if self.repo.get_user_by_email(session, data.email):
+        if await self.repo.get_user_by_email(session, data.email):
             raise ValidationError(
                 "EMAIL_EXISTS",
                 "Пользователь с таким email уже существует",
@@ -56,85 +47,36 @@ class AuthService:
             )
         #  создать пользователя (is_active=False)
 
-        user = self.repo.create_user(
+        # argon2 — в своём пуле, не в event loop
+        password_hash = await password_hasher.hash(data.password)
+
+        user = await self.repo.create_user(
             session,
             User(
                 email=data.email,
-                password_hash=hash_password(data.password),
+                password_hash=password_hash,
                 is_active=False,
             )
         )
 
         #  создать токен
-        token = self.repo.create_token(
+        token = await self.repo.create_token(
             session,
             user.id,
             settings.EMAIL_CONFIRM_TOKEN_TYPE,
             token_expiration(24),
         )
 
-        # отправить письмо через Celery (или синхронно при ошибке)
-        self._send_confirmation_email(user.email, token.token)
-
-        return {"message": "Проверьте почту для подтверждения"}
-
-    def _send_confirmation_email(self, email: str, token: str):
-        """Отправка письма подтверждения с обработкой ошибок"""
-        if CELERY_AVAILABLE:
-            try:
-                send_email_confirmation.delay(email, token)
-                print(f"[CELERY] Email task queued for {email}")
-            except Exception as e:
-                print(f"[CELERY ERROR] Failed to queue email task: {e}")
-                # Отправляем синхронно как резервный вариант
-                self._send_email_sync(email, token, "confirmation")
-        else:
-            print(f"[SYNC] Sending email synchronously to {email}")
-            self._send_email_sync(email, token, "confirmation")
-
-    def _send_password_reset_email(self, email: str, token: str):
-        """Отправка письма сброса пароля с обработкой ошибок"""
-        if CELERY_AVAILABLE:
-            try:
-                send_password_reset.delay(email, token)
-                print(f"[CELERY] Password reset task queued for {email}")
-            except Exception as e:
-                print(f"[CELERY ERROR] Failed to queue password reset task: {e}")
-                self._send_email_sync(email, token, "password_reset")
-        else:
-            print(f"[SYNC] Sending password reset email synchronously to {email}")
-            self._send_email_sync(email, token, "password_reset")
-
-    def _send_email_sync(self, email: str, token: str, email_type: str):
-        """Синхронная отправка письма (резервный вариант)"""
-        try:
-            from app.tasks.email_tasks import _email
-
-            # Генерируем ссылки
-            if email_type == "confirmation":
-                confirm_url = f"http://localhost:8000/auth/confirm-email?token={token}"
-                template = email_confirmation(confirm_url)
-            else:
-                reset_url = f"http://localhost:8000/auth/password-reset/confirm?token={token}"
-                template = password_reset(reset_url)
-
-            # Отправляем письмо
-            _email(
-                email,
-                template.subject,
-                template.html,
-                template.text
-            )
-            print(f"[SYNC EMAIL SENT] To: {email}")
-
-        except Exception as e:
-            print(f"[SYNC EMAIL ERROR] Failed to send email to {email}: {e}")
-            # Не выбрасываем исключение, чтобы не сломать регистрацию
+        # письмо — в outbox, отправит relay (app/tasks/outbox.py)
+        await self.repo.enqueue_email(session, "confirmation", user.email, token.token)
 
+        # пользователь, токен и письмо — одним commit: не бывает юзера без письма
+        await session.commit()
 
+        return {"message": "Проверьте почту для подтверждения"}
 
-    def confirm_email(self, session, token_str: str):
-        token = self.repo.get_valid_token(session, token_str, settings.EMAIL_CONFIRM_TOKEN_TYPE)
+    async def confirm_email(self, session: AsyncSession, token_str: str):
+        token = await self.repo.get_valid_token(session, token_str, settings.EMAIL_CONFIRM_TOKEN_TYPE)
 
         if not token:
             raise ValidationError(
@@ -143,34 +85,35 @@ class AuthService:
                 "token",
             )
 
-        user = session.get(User, token.user_id)
-        user.is_active = True
-        token.is_used = True
+        # погашение атомарно: из двух параллельных подтверждений пройдёт одно
+        if not await self.repo.mark_token_used(session, token):
+            raise ValidationError("INVALID_TOKEN", "Ссылка недействительна или устарела", "token")
+        await self.repo.activate_user(session, token.user_id)
 
-        session.commit()
+        await self._commit_consuming(session, token)
         return {"message": "Email подтверждён"}
 
 # запрос на сброс пароля
-    def request_password_reset(self, session, email: str):
-        user = self.repo.get_user_by_email(session, email)
+    async def request_password_reset(self, session: AsyncSession, email: str):
+        user = await self.repo.get_user_by_email(session, email)
         if not user:
             return {"message": "Такого пользователя не существует, проверьте email"}
 
-        token = self.repo.create_token(
+        token = await self.repo.create_token(
             session,
             user.id,
             settings.PASSWORD_RESET_TOKEN_TYPE,
             token_expiration(1),
         )
-
-        self._send_password_reset_email(user.email, token.token)
+        await self.repo.enqueue_email(session, "password_reset", user.email, token.token)
+        await session.commit()
 
         return {"message": "Если email существует, инструкция отправлена"}
 
 # установка нового пароля
-    def reset_password(self, session, token_str: str, new_password: str, confirm_password: str, email: str):
+    async def reset_password(self, session: AsyncSession, token_str: str, new_password: str, confirm_password: str, email: str):
 
-        token = self.repo.get_valid_token(session, token_str, settings.PASSWORD_RESET_TOKEN_TYPE)
+        token = await self.repo.get_valid_token(session, token_str, settings.PASSWORD_RESET_TOKEN_TYPE)
         if not token:
             raise ValidationError(
                 "INVALID_TOKEN",
@@ -186,39 +129,54 @@ class AuthService:
 
         validate_password(new_password, email)
 
-        user = session.get(User, token.user_id)
-        user.password_hash = hash_password(new_password)
-        token.is_used = True
+        password_hash = await password_hasher.hash(new_password)
+        if not await self.repo.mark_token_used(session, token):
+            raise ValidationError("INVALID_TOKEN", "Ссылка недействительна или устарела", "token")
+        await self.repo.set_password_hash(session, token.user_id, password_hash)
+        # иначе украденный refresh токен выдаст новый access токен со свежей эпохой
+        await self.repo.revoke_all_refresh_tokens(session, token.user_id)
 
-        session.commit()
+        await self._commit_consuming(session, token)
+        await self._revoke_access_tokens(token.user_id)
         return {"message": "Пароль успешно изменён"}
 
-    def login(self, session: Session, email: str, password: str):
-        user = self.repo.get_user_by_email(session, email)
+    async def login(self, session: AsyncSession, email: str, password: str):
+        user = await self.repo.get_user_by_email(session, email)
 
-        if not user or not verify_password(password, user.password_hash):
+        if not user or not await password_hasher.verify(password, user.password_hash):
             raise InvalidCredentials()
 
         if not user.is_active:
             raise EmailNotVerified()
 
-        return self._issue_token_pair(session, user)
+        # параметры argon2 поменялись — перехэшируем пароль, пока он у нас в руках.
+        # user сохранится тем же commit, что и refresh токен
+        if password_needs_rehash(user.password_hash):
+            user.password_hash = await password_hasher.hash(password)
 
-    def refresh(self, session: Session, refresh_token: str):
-        token_hash = hash_refresh_token(refresh_token)
+        return await self._issue_token_pair(session, user)
 
-        stored = self.repo.get_refresh_token(session, token_hash)
-        if not stored:
-            raise InvalidCredentials()
+    async def refresh(self, session: AsyncSession, refresh_token: str):
+        new_refresh = create_refresh_token()
 
-        # ротация токенов
-        self.repo.revoke_refresh_token(session, stored)
+        # ротация токенов: старый отзывается, новый сохраняется атомарно в хранилище
+        user_id = await self.repo.rotate_refresh_token(
+            session,
+            hash_refresh_token(refresh_token),
+            hash_refresh_token(new_refresh),
+            datetime.now(timezone.utc) + settings.REFRESH_TOKEN_TTL,
+        )
+        if not user_id:
+            raise InvalidCredentials()
+        await session.commit()
 
-        user = session.get(User, stored.user_id)
-        return self._issue_token_pair(session, user)
+        return {
+            "access_token": create_access_token(user_id, await get_token_epochs().fresh(user_id)),
+            "refresh_token": new_refresh,
+        }
 
-    def _issue_token_pair(self, session: Session, user: User):
-        access = create_access_token(user.id)
+    async def _issue_token_pair(self, session: AsyncSession, user: User):
+        access = create_access_token(user.id, await get_token_epochs().fresh(user.id))
         refresh = create_refresh_token()
 
         refresh_db = Tokens(
@@ -229,15 +187,36 @@ class AuthService:
             expires_at=datetime.now(timezone.utc) + settings.REFRESH_TOKEN_TTL,
         )
 
-        self.repo.save_refresh_token(session, refresh_db)
+        await self.repo.save_refresh_token(session, refresh_db)
+        await session.commit()
 
         return {
             "access_token": access,
             "refresh_token": refresh,
         }
 
-    def logout_all(self, session: Session, user_id: UUID):
+    async def logout_all(self, session: AsyncSession, user_id: UUID):
         # если user_id валиден — просто отзываем все refresh
-        self.repo.revoke_all_refresh_tokens(session, user_id)
+        await self.repo.revoke_all_refresh_tokens(session, user_id)
+        await session.commit()
+        await self._revoke_access_tokens(user_id)
 
         return {"message": "Вы вышли со всех устройств"}
+
+    async def _commit_consuming(self, session: AsyncSession, token: Tokens):
+        # Redis-хранилище гасит токен сразу, вне транзакции: если commit упал,
+        # ссылка из письма должна остаться рабочей
+        try:
+            await session.commit()
+        except Exception:
+            await self.repo.release_token(session, token)
+            raise
+
+    @staticmethod
+    async def _revoke_access_tokens(user_id: UUID):
+        # после commit: refresh токены уже отозваны. Хранилище эпох недоступно —
+        # access токены доживут до exp, как было до эпох
+        try:
+            await get_token_epochs().bump(user_id)
+        except Exception as e:
+            print(f"[TOKEN EPOCH] Access tokens of {user_id} not revoked: {e}")
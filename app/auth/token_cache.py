@@ -0,0 +1,93 @@
+# app/auth/token_cache.py
+"""
+Кэш проверенных access токенов: digest токена → claims.
+
+Клиент шлёт один и тот же access токен сотни раз за его жизнь; подпись
+(особенно RS256 / ES256) проверяется один раз, дальше — поиск в dict.
+Запись живёт до exp токена: просроченная удаляется при обращении,
+а при переполнении вытесняется самая давно использованная (LRU).
+
+Ключ — SHA-256 токена: в памяти процесса не лежат сами токены.
+Кэш на процесс, без lock: get_current_user_id async, обращения идут
+только из event loop.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+
+from app.config.settings import settings
+from app.metrics import registry, stats_families
+
+
+class VerifiedTokenCache:
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        if not self.max_size:
+            return None
+
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, claims = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def put(self, token: str, claims: dict):
+        """Только для уже проверенного токена; без exp не кэшируем"""
+        expires_at = claims.get("exp")
+        if not self.max_size or not isinstance(expires_at, (int, float)):
+            return
+
+        self._entries[self._key(token)] = (expires_at, claims)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "max_size": self.max_size,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+access_token_cache = VerifiedTokenCache(settings.ACCESS_TOKEN_CACHE_SIZE)
+
+
+@registry.collector
+def _token_cache_metrics():
+    return stats_families(
+        "access_token_cache",
+        [({}, access_token_cache.stats())],
+        counters=("hits", "misses", "expired", "evicted"),
+    )
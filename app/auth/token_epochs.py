@@ -0,0 +1,168 @@
+# app/auth/token_epochs.py
+"""
+Эпоха токенов пользователя: отзыв access токенов за O(1).
+
+Access токен несёт claim "ep" — эпоху пользователя на момент выдачи.
+logout-all и сброс пароля увеличивают эпоху; токен с ep меньше текущей
+эпохи отклоняется, хотя подпись и exp в порядке. Ни списка отозванных
+токенов, ни запроса к базе на каждый запрос.
+
+Эпохи лежат в Redis (TOKEN_EPOCH_BACKEND), в процессе — кэш на
+TOKEN_EPOCH_CACHE_SECONDS: проверка токена — поиск в dict. Процесс,
+который увеличил эпоху, видит её сразу, остальные — не позже чем через
+TOKEN_EPOCH_CACHE_SECONDS.
+
+Ключи без TTL: если эпоха исчезнет, токены, выданные до её сброса,
+снова станут валидными. Одно число на пользователя, делавшего logout-all.
+"""
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from uuid import UUID
+
+from app.config.settings import settings
+from app.metrics import registry, stats_families
+
+CLAIM = "ep"
+
+
+class EpochStore(ABC):
+
+    @abstractmethod
+    async def get(self, user_id: UUID) -> int: ...
+
+    @abstractmethod
+    async def bump(self, user_id: UUID) -> int:
+        """Увеличить эпоху; возвращает новую"""
+
+
+class MemoryEpochStore(EpochStore):
+    """Для тестов: эпохи в словаре процесса"""
+
+    def __init__(self):
+        self.epochs: dict[str, int] = {}
+
+    async def get(self, user_id):
+        return self.epochs.get(str(user_id), 0)
+
+    async def bump(self, user_id):
+        self.epochs[str(user_id)] = self.epochs.get(str(user_id), 0) + 1
+        return self.epochs[str(user_id)]
+
+
+class RedisEpochStore(EpochStore):
+
+    def __init__(self, redis, prefix: str = "epoch"):
+        self.redis = redis
+        self.prefix = prefix
+
+    def _key(self, user_id) -> str:
+        return f"{self.prefix}:{user_id}"
+
+    async def get(self, user_id):
+        return int(await self.redis.get(self._key(user_id)) or 0)
+
+    async def bump(self, user_id):
+        return await self.redis.incr(self._key(user_id))
+
+
+class TokenEpochs:
+    """
+    Кэш эпох поверх EpochStore. Без lock: обращения только из event loop.
+
+    Хранилище недоступно — проверка не роняет запросы: берётся последняя
+    известная эпоха (или 0), отзыв работает снова, когда хранилище вернётся.
+    """
+
+    def __init__(self, store: EpochStore, ttl: float, max_size: int):
+        self.store = store
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[UUID, tuple[float, int]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _remember(self, user_id: UUID, epoch: int) -> int:
+        self._entries[user_id] = (time.monotonic() + self.ttl, epoch)
+        self._entries.move_to_end(user_id)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return epoch
+
+    async def _load(self, user_id: UUID) -> int:
+        try:
+            epoch = await self.store.get(user_id)
+        except Exception as e:
+            self.errors += 1
+            print(f"[TOKEN EPOCH] Store unavailable, revocation check skipped: {e}")
+            entry = self._entries.get(user_id)
+            epoch = entry[1] if entry else 0
+        return self._remember(user_id, epoch)
+
+    async def current(self, user_id: UUID) -> int:
+        """Для проверки токена: из кэша, пока не истёк ttl"""
+        entry = self._entries.get(user_id)
+        if entry is not None and time.monotonic() < entry[0]:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        return await self._load(user_id)
+
+    async def fresh(self, user_id: UUID) -> int:
+        """
+        Для выдачи токена: мимо кэша. Иначе процесс с устаревшим кэшем
+        выдаст после logout-all токен, который другие процессы отклонят.
+        """
+        return await self._load(user_id)
+
+    async def bump(self, user_id: UUID) -> int:
+        epoch = await self.store.bump(user_id)
+        return self._remember(user_id, epoch)
+
+    def is_revoked(self, claims: dict, epoch: int) -> bool:
+        # токены без "ep" выданы до эпох — эпоха 0
+        return claims.get(CLAIM, 0) < epoch
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+
+_token_epochs: TokenEpochs | None = None
+
+
+def get_token_epochs() -> TokenEpochs:
+    """Бэкенд выбирается TOKEN_EPOCH_BACKEND, экземпляр один на процесс"""
+    global _token_epochs
+
+    if _token_epochs is None:
+        backend = settings.TOKEN_EPOCH_BACKEND
+        if backend == "redis":
+            from app.config.redis import redis_client
+
+            # с таймаутами: зависший Redis — ошибка и последняя известная эпоха
+            store = RedisEpochStore(redis_client())
+        elif backend == "memory":
+            store = MemoryEpochStore()
+        else:
+            raise ValueError(f"Unknown TOKEN_EPOCH_BACKEND: {backend}")
+
+        _token_epochs = TokenEpochs(store, settings.TOKEN_EPOCH_CACHE_SECONDS, settings.TOKEN_EPOCH_CACHE_SIZE)
+
+    return _token_epochs
+
+
+@registry.collector
+def _token_epoch_metrics():
+    if _token_epochs is None:
+        return []
+    return stats_families("token_epoch_cache", [({}, _token_epochs.stats())], counters=("hits", "misses", "errors"))
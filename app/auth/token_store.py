@@ -0,0 +1,366 @@
+# app/auth/token_store.py
+import json
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+
+from sqlalchemy import insert, literal
+from sqlmodel import select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config.redis import redis_client
+from app.config.settings import settings
+from app.models.user import Tokens
+
+
+class TokenStore(ABC):
+    """
+    Хранилище refresh / email-confirm / password-reset токенов.
+    session передаётся всем бэкендам, но нужна только Postgres.
+
+    Одноразовые токены ищутся по token, refresh — по token_hash.
+    Postgres-бэкенд ничего не коммитит: commit делает AuthService.
+    Redis и memory работают вне транзакции: mark_used гасит токен сразу,
+    и если commit запроса потом упал, AuthService возвращает его release.
+    """
+
+    @abstractmethod
+    async def save(self, session: AsyncSession, token: Tokens) -> Tokens: ...
+
+    @abstractmethod
+    async def get_valid(
+            self,
+            session: AsyncSession,
+            token_type: str,
+            token: str | None = None,
+            token_hash: str | None = None,
+    ) -> Tokens | None: ...
+
+    @abstractmethod
+    async def revoke(self, session: AsyncSession, token: Tokens) -> None: ...
+
+    @abstractmethod
+    async def revoke_all(self, session: AsyncSession, user_id: UUID) -> None:
+        """Отзыв всех refresh токенов пользователя"""
+
+    @abstractmethod
+    async def mark_used(self, session: AsyncSession, token: Tokens) -> bool:
+        """
+        Погасить одноразовый токен. False — его уже погасил параллельный
+        запрос: проверка и запись атомарны, пройдёт только один.
+        """
+
+    async def release(self, session: AsyncSession, token: Tokens) -> None:
+        """
+        Вернуть токен, погашенный mark_used, когда commit запроса не прошёл.
+        В Postgres mark_used откатывается вместе с транзакцией — ничего не делать.
+        """
+
+    @abstractmethod
+    async def rotate(
+            self,
+            session: AsyncSession,
+            old_hash: str,
+            new_hash: str,
+            expires_at: datetime,
+    ) -> UUID | None:
+        """
+        Атомарно отзывает живой refresh токен old_hash и сохраняет new_hash
+        для того же пользователя. Возвращает user_id или None, если старый
+        токен не найден, истёк или уже отозван.
+        """
+
+
+class PostgresTokenStore(TokenStore):
+
+    async def save(self, session, token):
+        session.add(token)
+        return token
+
+    async def get_valid(self, session, token_type, token=None, token_hash=None):
+        now = datetime.now(timezone.utc)
+        if token_hash is not None:
+            stmt = select(Tokens).where(
+                Tokens.token_hash == token_hash,
+                Tokens.revoked_at.is_(None),
+                Tokens.expires_at > now,
+            )
+        else:
+            stmt = select(Tokens).where(
+                Tokens.token == token,
+                Tokens.token_type == token_type,
+                Tokens.is_used == False,
+                Tokens.expires_at > now,
+            )
+        return (await session.exec(stmt)).first()
+
+    async def revoke(self, session, token):
+        token.revoked_at = datetime.now(timezone.utc)
+        session.add(token)
+
+    async def revoke_all(self, session, user_id):
+        stmt = (
+            update(Tokens)
+            .where(
+                Tokens.user_id == user_id,
+                Tokens.revoked_at.is_(None),
+            )
+            .values(revoked_at=datetime.now(timezone.utc))
+        )
+        await session.exec(stmt)
+
+    async def mark_used(self, session, token):
+        # UPDATE под блокировкой строки перепроверяет is_used
+        stmt = (
+            update(Tokens)
+            .where(Tokens.id == token.id, Tokens.is_used == False)
+            .values(is_used=True)
+            .execution_options(synchronize_session=False)
+        )
+        return (await session.exec(stmt)).rowcount == 1
+
+    async def rotate(self, session, old_hash, new_hash, expires_at):
+        now = datetime.now(timezone.utc)
+        revoke = (
+            update(Tokens)
+            .where(
+                Tokens.token_hash == old_hash,
+                Tokens.revoked_at.is_(None),
+                Tokens.expires_at > now,
+            )
+            .values(revoked_at=now)
+            .returning(Tokens.user_id)
+        )
+
+        # UPDATE под блокировкой строки перепроверяет revoked_at IS NULL,
+        # поэтому из двух параллельных ротаций одного токена пройдёт одна
+        if session.bind.dialect.name == "postgresql":
+            # один запрос: UPDATE ... RETURNING в CTE + INSERT ... SELECT
+            old = revoke.cte("old")
+            stmt = insert(Tokens).from_select(
+                ["id", "user_id", "token_hash", "token_type", "expires_at", "created_at", "is_used"],
+                select(
+                    literal(uuid4(), Tokens.__table__.c.id.type),
+                    old.c.user_id,
+                    literal(new_hash),
+                    literal(settings.REFRESH_TOKEN_TYPE),
+                    literal(expires_at, Tokens.__table__.c.expires_at.type),
+                    literal(now, Tokens.__table__.c.created_at.type),
+                    literal(False),
+                ),
+            ).returning(Tokens.user_id)
+            user_id = (await session.exec(stmt)).scalar_one_or_none()
+        else:
+            # sqlite не умеет DML в CTE: два запроса в одной транзакции
+            user_id = (await session.exec(revoke)).scalar_one_or_none()
+            if user_id:
+                session.add(Tokens(
+                    user_id=user_id,
+                    token_type=settings.REFRESH_TOKEN_TYPE,
+                    token_hash=new_hash,
+                    expires_at=expires_at,
+                ))
+
+        return user_id
+
+
+class MemoryTokenStore(TokenStore):
+    """Для тестов: всё в словаре процесса"""
+
+    def __init__(self):
+        self.tokens: dict[str, Tokens] = {}
+
+    @staticmethod
+    def _key(token_type: str, token: str | None, token_hash: str | None) -> str:
+        return f"{token_type}:{token_hash if token_hash is not None else token}"
+
+    async def save(self, session, token):
+        self.tokens[self._key(token.token_type, token.token, token.token_hash)] = token
+        return token
+
+    async def get_valid(self, session, token_type, token=None, token_hash=None):
+        stored = self.tokens.get(self._key(token_type, token, token_hash))
+        if (
+            not stored
+            or stored.is_used
+            or stored.revoked_at is not None
+            or _aware(stored.expires_at) <= datetime.now(timezone.utc)
+        ):
+            return None
+        return stored
+
+    async def revoke(self, session, token):
+        token.revoked_at = datetime.now(timezone.utc)
+
+    async def revoke_all(self, session, user_id):
+        now = datetime.now(timezone.utc)
+        for token in self.tokens.values():
+            if token.user_id == user_id and token.revoked_at is None:
+                token.revoked_at = now
+
+    async def mark_used(self, session, token):
+        # без await между проверкой и записью — в одном event loop это атомарно
+        if token.is_used:
+            return False
+        token.is_used = True
+        return True
+
+    async def release(self, session, token):
+        token.is_used = False
+
+    async def rotate(self, session, old_hash, new_hash, expires_at):
+        # без await между проверкой и записью — в одном event loop это атомарно
+        stored = await self.get_valid(session, settings.REFRESH_TOKEN_TYPE, token_hash=old_hash)
+        if not stored:
+            return None
+
+        stored.revoked_at = datetime.now(timezone.utc)
+        await self.save(session, Tokens(
+            user_id=stored.user_id,
+            token_type=settings.REFRESH_TOKEN_TYPE,
+            token_hash=new_hash,
+            expires_at=expires_at,
+        ))
+        return stored.user_id
+
+
+# Токен удаляется целиком, поэтому отозванные и использованные токены
+# в Redis просто отсутствуют, а истёкшие убирает TTL.
+# Ключи пользователя вычисляются внутри скрипта — для Redis Cluster не годится.
+ROTATE_SCRIPT = """
+local old = redis.call('GET', KEYS[1])
+if not old then
+    return false
+end
+local token = cjson.decode(old)
+redis.call('DEL', KEYS[1])
+redis.call('SREM', ARGV[1] .. token['user_id'], KEYS[1])
+
+token['id'] = ARGV[2]
+token['token_hash'] = ARGV[3]
+token['expires_at'] = ARGV[4]
+token['created_at'] = ARGV[5]
+redis.call('SET', KEYS[2], cjson.encode(token), 'PX', ARGV[6])
+redis.call('SADD', ARGV[1] .. token['user_id'], KEYS[2])
+if redis.call('PTTL', ARGV[1] .. token['user_id']) < tonumber(ARGV[6]) then
+    redis.call('PEXPIRE', ARGV[1] .. token['user_id'], ARGV[6])
+end
+return token['user_id']
+"""
+
+# KEYS: токен[, множество пользователя]; ARGV: json, ttl_ms
+# множество живёт не меньше самого долгого токена в нём; PTTL вместо
+# PEXPIRE NX/GT — те только с Redis 7
+SAVE_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+if KEYS[2] then
+    redis.call('SADD', KEYS[2], KEYS[1])
+    if redis.call('PTTL', KEYS[2]) < tonumber(ARGV[2]) then
+        redis.call('PEXPIRE', KEYS[2], ARGV[2])
+    end
+end
+return 1
+"""
+
+REVOKE_ALL_SCRIPT = """
+local keys = redis.call('SMEMBERS', KEYS[1])
+for _, key in ipairs(keys) do
+    redis.call('DEL', key)
+end
+redis.call('DEL', KEYS[1])
+return #keys
+"""
+
+
+class RedisTokenStore(TokenStore):
+
+    def __init__(self, redis, prefix: str = "tokens"):
+        self.redis = redis
+        self.prefix = prefix
+        self._save = redis.register_script(SAVE_SCRIPT)
+        self._rotate = redis.register_script(ROTATE_SCRIPT)
+        self._revoke_all = redis.register_script(REVOKE_ALL_SCRIPT)
+
+    def _key(self, token_type: str, token: str | None, token_hash: str | None) -> str:
+        return f"{self.prefix}:{token_type}:{token_hash if token_hash is not None else token}"
+
+    def _user_key(self, user_id) -> str:
+        return f"{self.prefix}:user:{user_id}"
+
+    @staticmethod
+    def _ttl_ms(expires_at: datetime) -> int:
+        return max(1, int((_aware(expires_at) - datetime.now(timezone.utc)).total_seconds() * 1000))
+
+    async def save(self, session, token):
+        keys = [self._key(token.token_type, token.token, token.token_hash)]
+        if token.token_type == settings.REFRESH_TOKEN_TYPE:
+            keys.append(self._user_key(token.user_id))
+        await self._save(keys=keys, args=[token.model_dump_json(), self._ttl_ms(token.expires_at)])
+        return token
+
+    async def get_valid(self, session, token_type, token=None, token_hash=None):
+        raw = await self.redis.get(self._key(token_type, token, token_hash))
+        # model_validate_json у table-моделей не приводит типы
+        return Tokens.model_validate(json.loads(raw)) if raw else None
+
+    async def revoke(self, session, token):
+        key = self._key(token.token_type, token.token, token.token_hash)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.srem(self._user_key(token.user_id), key)
+            await pipe.execute()
+
+    async def revoke_all(self, session, user_id):
+        await self._revoke_all(keys=[self._user_key(user_id)])
+
+    async def mark_used(self, session, token):
+        # DEL атомарен: ключ удалит только один из параллельных запросов
+        return await self.redis.delete(self._key(token.token_type, token.token, token.token_hash)) == 1
+
+    async def release(self, session, token):
+        # токен снова живой до своего expires_at (уже истёк — ключ сразу уйдёт по TTL)
+        await self.save(session, token)
+
+    async def rotate(self, session, old_hash, new_hash, expires_at):
+        now = datetime.now(timezone.utc)
+        user_id = await self._rotate(
+            keys=[
+                self._key(settings.REFRESH_TOKEN_TYPE, None, old_hash),
+                self._key(settings.REFRESH_TOKEN_TYPE, None, new_hash),
+            ],
+            args=[
+                f"{self.prefix}:user:",
+                str(uuid4()),
+                new_hash,
+                _aware(expires_at).isoformat(),
+                now.isoformat(),
+                self._ttl_ms(expires_at),
+            ],
+        )
+        return UUID(user_id) if user_id else None
+
+
+def _aware(value: datetime) -> datetime:
+    # sqlite и старые строки отдают naive datetime — считаем их UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+_token_store: TokenStore | None = None
+
+
+def get_token_store() -> TokenStore:
+    """Бэкенд выбирается TOKEN_STORE_BACKEND, экземпляр один на процесс"""
+    global _token_store
+
+    if _token_store is None:
+        backend = settings.TOKEN_STORE_BACKEND
+        if backend == "redis":
+            _token_store = RedisTokenStore(redis_client())
+        elif backend == "memory":
+            _token_store = MemoryTokenStore()
+        elif backend == "postgres":
+            _token_store = PostgresTokenStore()
+        else:
+            raise ValueError(f"Unknown TOKEN_STORE_BACKEND: {backend}")
+
+    return _token_store
@@ -1,101 +1,143 @@
 # app/auth/validators.py
+"""
+Политика паролей: собирается один раз из Settings при импорте.
+
+Пароль проверяется целиком и возвращает все нарушения сразу — клиент
+показывает их одним списком, а не по одному на каждую отправку формы.
+
+Обязательные классы (PASSWORD_REQUIRED_REGEX) — регулярки на один символ:
+каждый символ пароля классифицируется один раз на процесс (кэш), поэтому
+пароль проходится один раз, а не по разу на каждую регулярку. Регулярка,
+которая не совпадает ни с одним символом ([A-Z]{2}, \d.*\d), так никогда
+не выполнилась бы — такая настройка падает при старте.
+FORBIDDEN_PASSWORD_CHARS может содержать последовательности (--), поэтому
+это отдельный скомпилированный поиск.
+"""
+import re
 
 from app.config.settings import settings
 
-from .exceptions import ValidationError
+from .breached import get_breached_passwords
+from .exceptions import PasswordPolicyError, ValidationError
 
-import re
+REQUIRED_MESSAGES = {
+    "uppercase": "Пароль должен содержать минимум одну заглавную букву (A–Z)",
+    "lowercase": "Пароль должен содержать минимум одну строчную букву (a–z)",
+    "digit": "Пароль должен содержать минимум одну цифру (0–9)",
+    "special": "Пароль должен содержать минимум один специальный символ",
+}
 
+EMAIL_SEPARATORS = re.compile(r"[.\-_]")
 
-def validate_password(password: str, email: str):
-    # обязательность
-    if not password:
-        raise ValidationError(
-            code="PASSWORD_REQUIRED",
-            message="Пароль обязателен к заполнению",
-            field="password",
-        )
+# символы, которые пароль может прислать, выбирает клиент — кэш ограничен
+CHAR_CACHE_SIZE = 4096
 
-    # длина
-    if not (settings.PASSWORD_MIN_LENGTH <= len(password) <= settings.PASSWORD_MAX_LENGTH):
-        raise ValidationError(
-            code="PASSWORD_LENGTH",
-            message=(
-                f"Пароль должен быть длиной от "
-                f"{settings.PASSWORD_MIN_LENGTH} до {settings.PASSWORD_MAX_LENGTH} символов"
-            ),
-            field="password",
-        )
+# на них проверяется, что обязательная регулярка описывает один символ:
+# ASCII, латиница, кириллица, знаки пунктуации и валют
+PROBE_CHARS = [chr(code) for code in range(0x20, 0x3000)]
 
-    # запрещённые символы
-    if re.search(settings.FORBIDDEN_PASSWORD_CHARS, password):
-        raise ValidationError(
-            code="PASSWORD_FORBIDDEN_CHARS",
-            message="Пароль содержит недопустимый символ",
-            field="password",
-        )
 
-    # обязательные символы
-    if not re.search(settings.PASSWORD_REQUIRED_REGEX["uppercase"], password):
-        raise ValidationError(
-            code="PASSWORD_UPPERCASE",
-            message="Пароль должен содержать минимум одну заглавную букву (A–Z)",
-            field="password",
-        )
+def _violation(code: str, message: str) -> ValidationError:
+    return ValidationError(code=code, message=message, field="password")
 
-    if not re.search(settings.PASSWORD_REQUIRED_REGEX["lowercase"], password):
-        raise ValidationError(
-            code="PASSWORD_LOWERCASE",
-            message="Пароль должен содержать минимум одну строчную букву (a–z)",
-            field="password",
-        )
 
-    if not re.search(settings.PASSWORD_REQUIRED_REGEX["digit"], password):
-        raise ValidationError(
-            code="PASSWORD_DIGIT",
-            message="Пароль должен содержать минимум одну цифру (0–9)",
-            field="password",
-        )
+class PasswordPolicy:
 
-    if not re.search(settings.PASSWORD_REQUIRED_REGEX["special"], password):
-        raise ValidationError(
-            code="PASSWORD_SPECIAL",
-            message="Пароль должен содержать минимум один специальный символ",
-            field="password",
+    def __init__(self, min_length: int, max_length: int, required: dict[str, str], forbidden: str):
+        self.min_length = min_length
+        self.max_length = max_length
+        self.forbidden = re.compile(forbidden)
+        self.required = [(name, re.compile(pattern)) for name, pattern in required.items()]
+        for name, pattern in self.required:
+            if not any(pattern.fullmatch(char) for char in PROBE_CHARS):
+                raise ValueError(
+                    f"PASSWORD_REQUIRED_REGEX[{name!r}] must match a single character: {pattern.pattern!r}"
+                )
+        self._classes: dict[str, frozenset[str]] = {}
+
+        self.length_violation = _violation(
+            "PASSWORD_LENGTH",
+            f"Пароль должен быть длиной от {min_length} до {max_length} символов",
+        )
+        self.required_violations = {
+            name: _violation(
+                f"PASSWORD_{name.upper()}",
+                REQUIRED_MESSAGES.get(name, f"Пароль должен содержать символ из группы {name}"),
+            )
+            for name in required
+        }
+
+    @classmethod
+    def from_settings(cls, settings) -> "PasswordPolicy":
+        return cls(
+            settings.PASSWORD_MIN_LENGTH,
+            settings.PASSWORD_MAX_LENGTH,
+            settings.PASSWORD_REQUIRED_REGEX,
+            settings.FORBIDDEN_PASSWORD_CHARS,
         )
 
-    # email в пароле не нужна проверка так как ниже проверяем части email
+    def _char_classes(self, char: str) -> frozenset[str]:
+        classes = self._classes.get(char)
+        if classes is None:
+            classes = frozenset(name for name, pattern in self.required if pattern.fullmatch(char))
+            if len(self._classes) < CHAR_CACHE_SIZE:
+                self._classes[char] = classes
+        return classes
 
+    def violations(self, password: str, email: str) -> list[ValidationError]:
+        """Все нарушения политики; пустой список — пароль подходит"""
+        if not password:
+            return [_violation("PASSWORD_REQUIRED", "Пароль обязателен к заполнению")]
 
-    # проверка 2 частей email перед и после @
-    local_part, domain_part = email.lower().split("@")
+        found = []
 
-    password_lower = password.lower()
+        if not (self.min_length <= len(password) <= self.max_length):
+            found.append(self.length_violation)
 
-    # --- часть ДО @ ---
-    local_chunks = re.split(r"[.\-_]", local_part)
+        if self.forbidden.search(password):
+            found.append(_violation("PASSWORD_FORBIDDEN_CHARS", "Пароль содержит недопустимый символ"))
 
-    for chunk in local_chunks:
-        if len(chunk) >= 3 and chunk in password_lower: # чтобы не ловить мусор из 2 букв
-            raise ValidationError(
-                code="PASSWORD_CONTAINS_EMAIL_PART",
-                message=(
-                    "Пароль не должен содержать часть email "
-                    "до символа @"
-                ),
-                field="password",
-            )
+        # один проход по уникальным символам пароля; обычно все уже в кэше
+        chars = set(password)
+        try:
+            present = frozenset().union(*map(self._classes.__getitem__, chars))
+        except KeyError:
+            present = frozenset().union(*map(self._char_classes, chars))
+        for name, _ in self.required:
+            if name not in present:
+                found.append(self.required_violations[name])
 
-    # --- часть ПОСЛЕ @ ---
-    domain_chunks = re.split(r"[.\-_]", domain_part)
-
-    for chunk in domain_chunks:
-        if len(chunk) >= 4 and chunk in password_lower: # чтобы не ловить мусор вроде jo, gm, ru, etc, com
-            raise ValidationError(
-                code="PASSWORD_CONTAINS_EMAIL_DOMAIN",
-                message=(
-                    "Пароль не должен содержать часть email "
-                    "после символа @"
-                ),
-                field="password",
-            )
+        # части email до и после @; короткие куски (jo, gm, ru, com) не считаем
+        local_part, _, domain_part = email.lower().rpartition("@")
+        password_lower = password.lower()
+
+        if any(len(chunk) >= 3 and chunk in password_lower for chunk in EMAIL_SEPARATORS.split(local_part)):
+            found.append(_violation(
+                "PASSWORD_CONTAINS_EMAIL_PART",
+                "Пароль не должен содержать часть email до символа @",
+            ))
+
+        if any(len(chunk) >= 4 and chunk in password_lower for chunk in EMAIL_SEPARATORS.split(domain_part)):
+            found.append(_violation(
+                "PASSWORD_CONTAINS_EMAIL_DOMAIN",
+                "Пароль не должен содержать часть email после символа @",
+            ))
+
+        # утёкшие пароли: последней, остальные проверки дешевле
+        breached = get_breached_passwords()
+        if breached is not None and password in breached:
+            found.append(_violation(
+                "PASSWORD_BREACHED",
+                "Этот пароль встречается в утечках, выберите другой",
+            ))
+
+        return found
+
+
+password_policy = PasswordPolicy.from_settings(settings)
+
+
+def validate_password(password: str, email: str):
+    violations = password_policy.violations(password, email)
+    if violations:
+        raise PasswordPolicyError(violations)
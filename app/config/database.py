@@ -1,10 +1,86 @@
 # app/config/database
+from fastapi import Depends
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app.config.pool import engine_options, pool_stats
+from app.config.replicas import ReplicaRouter
 from app.config.settings import settings
+from app.metrics import instrument_engine, registry, stats_families
 
 
-engine = create_engine(settings.DATABASE_URL, echo=False)
+engine = create_engine(settings.DATABASE_URL, echo=False, **engine_options(settings.DATABASE_URL))
+
+# async движок для роутов: запросы ждут базу в event loop, а не в threadpool
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    echo=False,
+    **engine_options(settings.ASYNC_DATABASE_URL, is_async=True),
+)
+
+async_session_maker = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
+replica_router = ReplicaRouter(
+    settings.ASYNC_REPLICA_URLS,
+    settings.REPLICA_CHECK_INTERVAL_SECONDS,
+    settings.REPLICA_CHECK_TIMEOUT_SECONDS,
+)
+
+# SQL запросы считаются в метриках HTTP запроса, в котором выполнены:
+# все движки процесса, и реплики, и созданные позже
+instrument_engine(Engine)
+
 
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+async def get_async_session():
+    async with async_session_maker() as session:
+        yield session
+
+
+async def get_read_session(primary: AsyncSession = Depends(get_async_session)):
+    """
+    Сессия для запросов только на чтение: реплика по кругу, если есть живая,
+    иначе та же сессия primary, что и у get_async_session в этом запросе.
+    """
+    replica = await replica_router.pick()
+    if replica is None:
+        yield primary
+        return
+
+    async with replica.session_maker() as session:
+        try:
+            yield session
+        except (OperationalError, InterfaceError):
+            replica_router.mark_failed(replica)
+            raise
+
+
+def database_pool_stats() -> dict:
+    return {
+        "sync": pool_stats(engine),
+        "async": pool_stats(async_engine),
+        "replicas": {str(r.engine.url): pool_stats(r.engine) for r in replica_router.replicas},
+    }
+
+
+@registry.collector
+def _pool_metrics():
+    stats = database_pool_stats()
+    rows = [({"engine": name}, stats[name]) for name in ("sync", "async") if stats[name]]
+    rows += [({"engine": "replica", "url": url}, pool) for url, pool in stats["replicas"].items() if pool]
+    families = stats_families("db_pool", rows, counters=("checkouts", "timeouts"))
+    if replica_router.replicas:
+        families.append(("db_replica_healthy", "gauge", "Реплика прошла последнюю проверку", [
+            ({"url": str(r.engine.url)}, int(r.healthy)) for r in replica_router.replicas
+        ]))
+    return families
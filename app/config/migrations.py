@@ -0,0 +1,41 @@
+# app/config/migrations.py
+"""
+Схема базы меняется только миграциями (alembic upgrade head), не при старте.
+Старт проверяет одно: ревизия в alembic_version совпадает с head —
+один SELECT вместо рефлексии всех таблиц в каждом воркере.
+"""
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config.settings import BASE_DIR
+
+ALEMBIC_INI = BASE_DIR / "alembic.ini"
+
+
+def head_revisions() -> set[str]:
+    # только чтение файлов migrations/versions, без базы
+    return set(ScriptDirectory.from_config(Config(str(ALEMBIC_INI))).get_heads())
+
+
+def current_revisions(conn: Connection) -> set[str]:
+    try:
+        return set(conn.execute(text("SELECT version_num FROM alembic_version")).scalars())
+    except DBAPIError:
+        # таблицы alembic_version нет — миграции ни разу не применялись
+        return set()
+
+
+async def check_schema_revision(engine: AsyncEngine):
+    async with engine.connect() as conn:
+        current = await conn.run_sync(current_revisions)
+
+    expected = head_revisions()
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema revision {sorted(current) or 'none'} != {sorted(expected)}: "
+            "run `alembic upgrade head`"
+        )
@@ -0,0 +1,128 @@
+# app/config/pool.py
+"""
+Настройки пула соединений из Settings и метрики пула.
+
+Обычный режим — QueuePool на DB_POOL_SIZE + DB_MAX_OVERFLOW соединений
+на процесс с pre-ping и recycle. DB_PGBOUNCER — пулом управляет PgBouncer
+(transaction pooling): NullPool и никаких prepared statements, соединение
+между транзакциями может оказаться другим.
+
+Метрики: занятые соединения, overflow, ожидание checkout (вместе с открытием
+нового соединения, если пул его создаёт). Если ожидание
+растёт, а checked_out упирается в size + overflow — пула на воркер мало.
+"""
+import threading
+import time
+from uuid import uuid4
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.config.settings import settings
+
+
+class PoolMetrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def observe(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def stats(self, pool) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            avg = self.wait_seconds / attempts if attempts else 0.0
+            return {
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                # QueuePool считает overflow от -size: отрицательное — свободные слоты
+                "overflow": max(0, pool.overflow()),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(avg * 1000, 3),
+                "wait_max_ms": round(self.max_wait_seconds * 1000, 3),
+            }
+
+
+class _TimedPool:
+    """Меряет, сколько запрос ждал соединение в пуле"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.observe(time.perf_counter() - started, timed_out=True)
+            print(f"[DB POOL] Checkout timed out: {self.metrics.stats(self)}")
+            raise
+        self.metrics.observe(time.perf_counter() - started)
+        return conn
+
+    def recreate(self):
+        # dispose() пересоздаёт пул — метрики переезжают в новый
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedPool, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Аргументы create_engine / create_async_engine для пула"""
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        # у sqlite свои пулы (SingletonThreadPool / StaticPool), размеры им не нужны
+        return {}
+
+    if settings.DB_PGBOUNCER:
+        options = {"poolclass": NullPool}
+        if is_async:
+            # asyncpg кэширует prepared statements на соединении — за PgBouncer
+            # следующий запрос может уйти в другое серверное соединение
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        return options
+
+    pool = TimedAsyncQueuePool if is_async else TimedQueuePool
+    return {
+        "poolclass": pool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+def pool_stats(engine) -> dict | None:
+    """Метрики пула движка; None — пул без метрик (NullPool, sqlite)"""
+    pool = engine.pool
+    metrics = getattr(pool, "metrics", None)
+    return metrics.stats(pool) if metrics else None
@@ -0,0 +1,30 @@
+# app/config/redis.py
+from app.config.settings import settings
+
+
+def redis_client():
+    """
+    async Redis для токенов, эпох и ограничения частоты. Таймауты обязательны:
+    зависший Redis должен дать ошибку (и fallback в вызывающем коде),
+    а не держать запрос до таймаута TCP.
+    """
+    from redis.asyncio import Redis
+
+    return Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    )
+
+
+def redis_sync_client():
+    """sync Redis с теми же таймаутами — для Celery воркера"""
+    from redis import Redis
+
+    return Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    )
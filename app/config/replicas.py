@@ -0,0 +1,83 @@
+# app/config/replicas.py
+"""
+Чтение с реплик: DATABASE_REPLICA_URLS через запятую, по кругу.
+
+Реплика проверяется SELECT 1 не чаще раза в REPLICA_CHECK_INTERVAL_SECONDS;
+недоступная пропускается до следующей проверки. Проверка идёт в запросе,
+поэтому ограничена REPLICA_CHECK_TIMEOUT_SECONDS: зависшая реплика (нет
+ответа на SYN, полный пул) считается упавшей, а не держит запрос. Нет живых реплик (или они
+не заданы) — читаем с primary.
+
+Реплики отстают: на них идут только запросы, которым не нужно видеть
+только что записанное. Записи и read-after-write остаются на primary.
+"""
+import asyncio
+import itertools
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config.pool import engine_options
+
+
+class Replica:
+
+    def __init__(self, url: str):
+        self.engine = create_async_engine(url, echo=False, **engine_options(url, is_async=True))
+        self.session_maker = async_sessionmaker(
+            self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
+        self.healthy = True
+        self.checked_at = 0.0
+
+
+class ReplicaRouter:
+
+    def __init__(self, urls: list[str], check_interval: float, check_timeout: float = 1.0):
+        self.replicas = [Replica(url) for url in urls]
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._next = itertools.count()
+
+    async def pick(self) -> Replica | None:
+        """Следующая живая реплика по кругу или None — читать с primary"""
+        if not self.replicas:
+            return None
+
+        start = next(self._next)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            if time.monotonic() - replica.checked_at >= self.check_interval:
+                await self.check(replica)
+            if replica.healthy:
+                return replica
+        return None
+
+    async def _ping(self, replica: Replica):
+        async with replica.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def check(self, replica: Replica):
+        replica.checked_at = time.monotonic()
+        try:
+            await asyncio.wait_for(self._ping(replica), self.check_timeout)
+            if not replica.healthy:
+                print(f"[REPLICA] {replica.engine.url} is back")
+            replica.healthy = True
+        except Exception as e:
+            if replica.healthy:
+                print(f"[REPLICA] {replica.engine.url} is down: {e!r}")
+            replica.healthy = False
+
+    def mark_failed(self, replica: Replica):
+        # запрос упал на соединении — не ждать следующей плановой проверки
+        replica.healthy = False
+        replica.checked_at = time.monotonic()
+
+    async def dispose(self):
+        for replica in self.replicas:
+            await replica.engine.dispose()
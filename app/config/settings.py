@@ -4,6 +4,8 @@ from pathlib import Path
 from datetime import timedelta
 import warnings
 
+from sqlalchemy.engine import make_url
+
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 ENV_PATH = BASE_DIR / ".env"
@@ -15,6 +17,20 @@ if not ENV_PATH.exists():
         UserWarning
     )
 
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+
+def async_url(database_url: str) -> str:
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver and url.drivername != driver:
+        url = url.set(drivername=driver)
+    return url.render_as_string(hide_password=False)
+
 
 class Settings(BaseSettings):
     # -------------------- Database --------------------
@@ -22,11 +38,33 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
+    # при старте сверить ревизию схемы с alembic head (сама схема — alembic upgrade head)
+    DB_SCHEMA_CHECK: bool = True
+
+    # пул соединений на процесс (воркер uvicorn / celery)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # сколько ждать свободное соединение
+    DB_POOL_PRE_PING: bool = True  # проверять соединение перед выдачей
+    DB_POOL_RECYCLE: int = 1800  # секунд; -1 — не пересоздавать
+    # за PgBouncer в transaction mode: NullPool и без prepared statements
+    DB_PGBOUNCER: bool = False
+
+    # реплики только для чтения, через запятую; пусто — всё читается с primary
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_CHECK_INTERVAL_SECONDS: float = 5.0
+    REPLICA_CHECK_TIMEOUT_SECONDS: float = 1.0  # проверка идёт в запросе — дольше не ждём
 
     # -------------------- JWT --------------------
-    JWT_SECRET: str
-    JWT_ALGORITHM: str = "HS256"
+    JWT_SECRET: str = ""  # обязателен для HS256
+    JWT_ALGORITHM: str = "HS256"  # HS256 | RS256 | ES256
+    # RS256 / ES256: ключ подписи (python -m app.auth.jwks generate) и через
+    # запятую прежние ключи, токены которых ещё принимаются (ротация)
+    JWT_PRIVATE_KEY_FILE: str = ""
+    JWT_PUBLIC_KEY_FILES: str = ""
+    JWKS_MAX_AGE_SECONDS: int = 300  # Cache-Control для /.well-known/jwks.json
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ACCESS_TOKEN_CACHE_SIZE: int = 10000  # проверенных access токенов в памяти процесса; 0 — без кэша
 
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
 
@@ -35,6 +73,14 @@ class Settings(BaseSettings):
     PASSWORD_RESET_TOKEN_TYPE: str = "password_reset"
     REFRESH_TOKEN_TYPE: str = "refresh_token"
 
+    # где хранятся токены: postgres | redis | memory (memory — только для тестов)
+    TOKEN_STORE_BACKEND: str = "postgres"
+
+    # эпохи для отзыва access токенов (logout-all, сброс пароля): redis | memory (только для тестов)
+    TOKEN_EPOCH_BACKEND: str = "redis"
+    TOKEN_EPOCH_CACHE_SECONDS: float = 5.0  # столько другие процессы могут принимать отозванный токен
+    TOKEN_EPOCH_CACHE_SIZE: int = 100000  # пользователей в кэше процесса
+
     # -------------------- Password policy --------------------
     PASSWORD_MIN_LENGTH: int = 12
     PASSWORD_MAX_LENGTH: int = 100
@@ -48,6 +94,35 @@ class Settings(BaseSettings):
 
     FORBIDDEN_PASSWORD_CHARS: str = r"(\'|\"|\\|\/|;|--|#|<|>|&|@)"
 
+    # Bloom filter утёкших паролей (python -m app.auth.breached build); пусто — без проверки
+    BREACHED_PASSWORDS_FILE: str = ""
+    BREACHED_PASSWORDS_FP_RATE: float = 0.001  # по умолчанию для сборки фильтра
+
+    # -------------------- Password hashing --------------------
+    HASH_WORKERS: int = 0  # 0 — по числу ядер
+    HASH_QUEUE_SIZE: int = 64  # сколько хэшей может ждать свободный поток
+    HASH_RETRY_AFTER_SECONDS: int = 1
+
+    # параметры argon2 подбираются под железо: python -m app.auth.calibrate
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+
+    # -------------------- Rate limiting --------------------
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "redis"  # redis | memory (только для тестов)
+    # "запросов/секунд" в скользящем окне, отдельно на IP и на email
+    RATE_LIMITS: dict = {
+        "login": {"ip": "30/60", "email": "10/60"},
+        "register": {"ip": "10/3600", "email": "3/3600"},
+        "password_reset": {"ip": "10/3600", "email": "3/3600"},
+    }
+    # после стольких неудачных входов подряд пара email + IP блокируется на
+    # BASE секунд, каждая следующая неудача удваивает срок до MAX
+    LOGIN_LOCKOUT_THRESHOLD: int = 5
+    LOGIN_LOCKOUT_BASE_SECONDS: float = 30.0
+    LOGIN_LOCKOUT_MAX_SECONDS: float = 3600.0
+
     # -------------------- App --------------------
     DEBUG: bool = True
     ENVIRONMENT: str = "development"
@@ -59,11 +134,59 @@ class Settings(BaseSettings):
     EMAIL_HOST_PASSWORD: str = ""
     EMAIL_USE_TLS: bool = True
     EMAIL_FROM: str = ""
+    EMAIL_TIMEOUT_SECONDS: float = 10.0
+
+    # воркер писем: потоков и SMTP соединений на процесс
+    EMAIL_WORKER_CONCURRENCY: int = 10
+    EMAIL_POOL_SIZE: int = 10
+    EMAIL_MAX_MESSAGES_PER_CONNECTION: int = 100
+    EMAIL_NOOP_AFTER_SECONDS: float = 30.0  # дольше простаивало — проверить NOOP
+
+    # -------------------- Email outbox --------------------
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    # отправленные и брошенные письма (в них токены) удаляет cleanup_expired_tokens
+    OUTBOX_RETENTION_HOURS: int = 24
+    EMAIL_BATCH_MODE: bool = False  # send_email_batch вместо задачи на каждое письмо
+    EMAIL_BATCH_SIZE: int = 50  # писем в одной задаче
+    # повтор задачи из outbox (at-least-once) воркер пропускает по dedup_key
+    EMAIL_DEDUP_BACKEND: str = "redis"  # redis | memory (только для тестов)
+    EMAIL_DEDUP_TTL_SECONDS: int = 86400
+
+    # -------------------- Token cleanup --------------------
+    TOKEN_CLEANUP_BATCH_SIZE: int = 5000  # строк в одном DELETE
+    TOKEN_CLEANUP_PAUSE_SECONDS: float = 0.1  # пауза между пачками
+    TOKEN_CLEANUP_MAX_SECONDS: float = 300.0  # бюджет одного запуска
+
+    # -------------------- Token partitioning (Postgres) --------------------
+    # "" — обычная таблица, "day" | "week" — tokens партиционирована по expires_at
+    TOKEN_PARTITION_INTERVAL: str = ""
+    TOKEN_PARTITIONS_PREMAKE: int = 3  # партиций сверх REFRESH_TOKEN_TTL
+
+    # -------------------- Metrics --------------------
+    METRICS_ENABLED: bool = True  # GET /metrics и middleware в api
+    METRICS_WORKER_PORT: int = 9101  # /metrics Celery воркера; 0 — выключено
+    METRICS_RELAY_PORT: int = 9102  # /metrics outbox relay; 0 — выключено
+    SQL_PROFILE_LOG: bool = False  # строка [SQL] на каждый запрос: число запросов, время, самый медленный
+    SQL_PROFILE_HEADERS: bool = False  # X-DB-* в ответе; не включать там, где ответы видят клиенты
 
     # -------------------- Redis --------------------
     REDIS_URL: str = "redis://redis:6379/0"
+    # для токенов, эпох и ограничения частоты (не Celery): запрос не ждёт зависший Redis
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = 0.5
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.5
 
     # -------------------- Derived values --------------------
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        # тот же DATABASE_URL, но с async-драйвером
+        return async_url(self.DATABASE_URL)
+
+    @property
+    def ASYNC_REPLICA_URLS(self) -> list[str]:
+        return [async_url(url.strip()) for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
     @property
     def ACCESS_TOKEN_TTL(self) -> timedelta:
         return timedelta(minutes=self.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -1,20 +1,72 @@
 # app\main.py
-from fastapi import FastAPI
-from sqlmodel import SQLModel
-from app.config.database import engine
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from app.config.database import async_engine, replica_router
+from app.config.migrations import check_schema_revision
+from app.config.settings import settings
+from app.metrics import CONTENT_TYPE, MetricsMiddleware, registry
 
 from .auth import router as auth
+from .auth.exceptions import RateLimited, ServiceOverloaded
+from .auth.hashing import password_hasher
+from .auth.jwks import signing_keys
 from .routers import users, projects, lists, tasks, tags
 from contextlib import asynccontextmanager
 import os
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    SQLModel.metadata.create_all(engine)
+    # схему создают и меняют миграции, здесь только проверка ревизии
+    if settings.DB_SCHEMA_CHECK:
+        await check_schema_revision(async_engine)
     yield
+    await async_engine.dispose()
+    await replica_router.dispose()
+    password_hasher.shutdown()
 
 app = FastAPI(title="TODOLIST", lifespan=lifespan)
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, headers=settings.SQL_PROFILE_HEADERS, log=settings.SQL_PROFILE_LOG)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/.well-known/jwks.json", include_in_schema=False)
+async def jwks(request: Request):
+    if signing_keys.jwks_body is None:
+        # HS256: ключ общий, публиковать нечего
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+
+    # тело и ETag посчитаны при старте; ключи меняются только с рестартом
+    headers = {
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}",
+        "ETag": signing_keys.jwks_etag,
+    }
+    if request.headers.get("if-none-match") == signing_keys.jwks_etag:
+        return Response(status_code=304, headers=headers)
+    return Response(signing_keys.jwks_body, media_type="application/json", headers=headers)
+
+
+@app.exception_handler(ServiceOverloaded)
+async def service_overloaded_handler(request: Request, exc: ServiceOverloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": exc.message},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(RateLimited)
+async def rate_limited_handler(request: Request, exc: RateLimited):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": exc.message},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 
 
 
@@ -0,0 +1,331 @@
+# app/metrics.py
+"""
+Метрики в текстовом формате Prometheus, без prometheus_client.
+
+api отдаёт их на GET /metrics (METRICS_ENABLED). Celery воркер и outbox
+relay — отдельные процессы: у каждого свой порт (METRICS_WORKER_PORT,
+METRICS_RELAY_PORT), см. start_http_server. Метрики живут в памяти
+процесса и обнуляются при рестарте — Prometheus это понимает по counter.
+
+Гистограммы: задержка запросов по route и статусу, argon2 hash/verify,
+число SQL запросов и их время на запрос (и самый медленный — в заголовках
+и логе, см. MetricsMiddleware), постановка письма в Celery,
+отправка письма в воркере. Пулы (БД, argon2) отдают текущее состояние
+через collector — функцию, которую registry вызывает при каждом scrape.
+"""
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sqlalchemy import event
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+SLOWEST_STATEMENT_CHARS = 200  # текст самого медленного запроса в логе
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labels
+        self._lock = threading.Lock()
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # ключ — значения меток; значение — [счётчики по бакетам (не накопленные)..., +Inf, sum]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        series = self._values.get(tuple(str(labels[name]) for name in self.labelnames))
+        return sum(series[:-1]) if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        """
+        fn() -> [(name, type, help, [(labels: dict, value), ...]), ...];
+        вызывается на каждом scrape — для текущего состояния пулов и очередей
+        """
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            try:
+                families = collect()
+            except Exception as e:
+                print(f"[METRICS] Collector {collect.__name__} failed: {e}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def stats_families(prefix: str, rows: list[tuple[dict, dict]], counters: tuple[str, ...] = ()) -> list:
+    """
+    Словари stats() (PoolMetrics, PasswordHasher) в метрики для collector:
+    rows — [(метки, stats), ...], каждый числовой ключ — отдельная метрика
+    """
+    families = {}
+    for labels, stats in rows:
+        for key, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                kind = "counter" if key in counters else "gauge"
+                name = f"{prefix}_{key}_total" if kind == "counter" else f"{prefix}_{key}"
+                families.setdefault(name, (name, kind, f"{prefix} {key}", []))[3].append((labels, value))
+    return list(families.values())
+
+
+registry = Registry()
+
+# -------------------- HTTP --------------------
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Время обработки запроса", ("method", "route", "status"),
+)
+http_request_db_statements = registry.histogram(
+    "http_request_db_statements", "SQL запросов на HTTP запрос", ("route",), COUNT_BUCKETS,
+)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Время SQL запросов на HTTP запрос", ("route",),
+)
+
+# -------------------- argon2 --------------------
+password_hash_seconds = registry.histogram(
+    "password_hash_seconds", "Время argon2 в пуле хэширования", ("operation",), HASH_BUCKETS,
+)
+
+# -------------------- email --------------------
+email_enqueue_seconds = registry.histogram(
+    "email_enqueue_seconds", "Постановка задачи письма в Celery из outbox relay", ("task",),
+)
+email_enqueue_failures = registry.counter(
+    "email_enqueue_failures_total", "Ошибки постановки задачи письма в Celery", ("task",),
+)
+email_sync_fallbacks = registry.counter(
+    "email_sync_fallbacks_total", "Письма, отправленные relay напрямую без Celery",
+)
+email_send_seconds = registry.histogram(
+    "email_send_seconds", "Отправка письма через SMTP в воркере",
+)
+email_send_failures = registry.counter(
+    "email_send_failures_total", "Ошибки отправки письма через SMTP",
+)
+
+
+# -------------------- SQL на запрос --------------------
+class RequestStats:
+    __slots__ = ("statements", "db_seconds", "slowest_seconds", "slowest_statement")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = ""
+
+    def headers(self) -> list[tuple[bytes, bytes]]:
+        return [
+            (b"x-db-statements", str(self.statements).encode()),
+            (b"x-db-time-ms", f"{self.db_seconds * 1000:.2f}".encode()),
+            (b"x-db-slowest-ms", f"{self.slowest_seconds * 1000:.2f}".encode()),
+        ]
+
+    def log_line(self, method: str, route: str, status: int, elapsed: float) -> str:
+        return "[SQL] " + json.dumps({
+            "method": method,
+            "route": route,
+            "status": status,
+            "ms": round(elapsed * 1000, 2),
+            "statements": self.statements,
+            "db_ms": round(self.db_seconds * 1000, 2),
+            "slowest_ms": round(self.slowest_seconds * 1000, 2),
+            "slowest": " ".join(self.slowest_statement.split())[:SLOWEST_STATEMENT_CHARS],
+        }, ensure_ascii=False)
+
+# задаёт middleware; вне HTTP запроса (relay, воркер, тесты) — None
+request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and request_stats.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = request_stats.get()
+    started = getattr(context, "_metrics_started", None)
+    if stats is not None and started is not None:
+        elapsed = time.perf_counter() - started
+        stats.statements += 1
+        stats.db_seconds += elapsed
+        if elapsed > stats.slowest_seconds:
+            stats.slowest_seconds = elapsed
+            stats.slowest_statement = statement
+
+
+def instrument_engine(engine):
+    """Считает запросы движка в RequestStats текущего запроса; класс Engine — все движки"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: время запроса по шаблону route (не по пути — иначе
+    по метке на каждый токен в query) и статусу, плюс SQL запросы.
+
+    headers — X-DB-Statements / X-DB-Time-Ms / X-DB-Slowest-Ms в ответе
+    (только DEBUG: наружу не нужно знать про устройство базы);
+    log — строка [SQL] с JSON на каждый запрос.
+    """
+
+    def __init__(self, app, headers: bool = False, log: bool = False):
+        self.app = app
+        self.headers = headers
+        self.log = log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        stats = RequestStats()
+        token = request_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.headers:
+                    # тело ещё не отправлено, но запросы обработчика уже выполнены
+                    message["headers"] = list(message.get("headers", [])) + stats.headers()
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_stats.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_seconds.observe(elapsed, method=scope["method"], route=route, status=str(status))
+            http_request_db_statements.observe(stats.statements, route=route)
+            http_request_db_seconds.observe(stats.db_seconds, route=route)
+            if self.log:
+                print(stats.log_line(scope["method"], route, status, elapsed))
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """/metrics для процессов без FastAPI (Celery воркер, outbox relay)"""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"[METRICS] Serving on {host}:{port}")
+    return server
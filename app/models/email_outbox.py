@@ -0,0 +1,25 @@
+#app/models/email_outbox.py
+from sqlalchemy import DateTime
+from sqlmodel import SQLModel, Field
+from uuid import UUID, uuid4
+from datetime import datetime
+from typing import Optional
+
+from .user import utcnow
+
+
+class EmailOutbox(SQLModel, table=True):
+    """Письмо, записанное в той же транзакции, что и пользователь/токен"""
+    __tablename__ = "email_outbox"
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    dedup_key: str = Field(unique=True)  # "<email_type>:<token>", он же task_id в Celery
+
+    email_type: str  # "confirmation", "password_reset"
+    to_email: str
+    token: str
+
+    created_at: datetime = Field(default_factory=utcnow, sa_type=DateTime(timezone=True))
+    sent_at: Optional[datetime] = Field(default=None, index=True, sa_type=DateTime(timezone=True))
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = None
@@ -0,0 +1,197 @@
+#app/models/partitions.py
+"""
+Обслуживание партиций tokens (Postgres, TOKEN_PARTITION_INTERVAL = day | week).
+
+Партиция покрывает диапазон expires_at. Вперёд создаются партиции на
+REFRESH_TOKEN_TTL + TOKEN_PARTITIONS_PREMAKE интервалов, а партиция, у
+которой верхняя граница уже в прошлом, содержит только истёкшие токены и
+удаляется целиком — DROP TABLE вместо DELETE миллионов строк и vacuum.
+Строки вне созданных партиций попадают в tokens_default, вставка не падает.
+Если beat не работал дольше запаса и в tokens_default уже есть строки
+диапазона новой партиции, CREATE ... PARTITION OF упал бы: такие строки
+переносятся в новую таблицу, и она подключается через ATTACH PARTITION.
+
+Каждое создание и удаление — в своей транзакции (или savepoint, если
+передано соединение): ошибка одной партиции не откатывает остальные.
+
+Запросы AuthRepository не меняются: условие expires_at > now отсекает
+истёкшие партиции (partition pruning).
+"""
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.config.settings import settings
+from app.models.user import utcnow
+
+INTERVALS = {
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def partition_start(moment: datetime, interval: str) -> datetime:
+    """Начало партиции, в которую попадает moment (неделя — с понедельника)"""
+    start = moment.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "week":
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def partition_name(table: str, start: datetime) -> str:
+    return f"{table}_p{start:%Y%m%d}"
+
+
+def is_partition_name(name: str, table: str = "tokens") -> bool:
+    return re.fullmatch(rf"{table}_(p\d{{8}}|default)", name) is not None
+
+
+def is_partitioned(conn: Connection, table: str = "tokens") -> bool:
+    return conn.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {"table": table},
+    ).scalar()
+
+
+@contextmanager
+def _step(bind: Engine | Connection):
+    """Engine — своя транзакция на шаг, Connection (миграция, тест) — savepoint"""
+    if isinstance(bind, Engine):
+        with bind.begin() as conn:
+            yield conn
+    else:
+        with bind.begin_nested():
+            yield bind
+
+
+def _lock_timeout(conn: Connection):
+    # DDL берёт блокировку на tokens: не ждать в очереди за долгой транзакцией,
+    # блокируя все запросы к таблице, — лучше повторить в следующий запуск
+    conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+
+
+def _partitions(conn: Connection, table: str) -> list[tuple[str, str]]:
+    return conn.execute(
+        text("SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+             "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+             "WHERE i.inhparent = to_regclass(:table)"),
+        {"table": table},
+    ).all()
+
+
+def create_partition(conn: Connection, table: str, name: str, start: datetime, end: datetime):
+    bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    in_range = {"start": start, "end": end}
+    stray = conn.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {table}_default WHERE expires_at >= :start AND expires_at < :end)"),
+        in_range,
+    ).scalar()
+    if not stray:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {bounds}"))
+        return
+
+    # строки диапазона уже в default-партиции: Postgres не даст создать партицию
+    # поверх них. Переносим их в отдельную таблицу и подключаем её
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {table}_default WHERE expires_at >= :start AND expires_at < :end "
+        f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+    ), in_range)
+    conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {bounds}"))
+
+
+def create_partitions(
+        bind: Engine | Connection,
+        interval: str,
+        table: str = "tokens",
+        now: datetime | None = None,
+        failed: list | None = None,
+) -> list[str]:
+    """Создаёт недостающие партиции от текущей до now + REFRESH_TOKEN_TTL + запас"""
+    step = INTERVALS[interval]
+    now = now or utcnow()
+    start = partition_start(now, interval)
+    until = now + settings.REFRESH_TOKEN_TTL + step * settings.TOKEN_PARTITIONS_PREMAKE
+    failed = [] if failed is None else failed
+
+    with _step(bind) as conn:
+        existing = {name for name, _ in _partitions(conn, table)}
+
+    created = []
+    if f"{table}_default" not in existing:
+        with _step(bind) as conn:
+            conn.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+        created.append(f"{table}_default")
+
+    while start < until:
+        name = partition_name(table, start)
+        if name not in existing:
+            try:
+                with _step(bind) as conn:
+                    _lock_timeout(conn)
+                    create_partition(conn, table, name, start, start + step)
+                created.append(name)
+            except Exception as e:
+                failed.append((name, str(e)))
+        start += step
+
+    return created
+
+
+def drop_expired_partitions(
+        bind: Engine | Connection,
+        table: str = "tokens",
+        now: datetime | None = None,
+        failed: list | None = None,
+) -> list[str]:
+    """Удаляет партиции, все токены которых уже истекли"""
+    now = now or utcnow()
+    failed = [] if failed is None else failed
+    with _step(bind) as conn:
+        rows = _partitions(conn, table)
+
+    dropped = []
+    for name, bound in rows:
+        upper = _UPPER_BOUND.search(bound)  # у default-партиции границ нет
+        if upper and datetime.fromisoformat(upper.group(1)) <= now:
+            try:
+                with _step(bind) as conn:
+                    _lock_timeout(conn)
+                    conn.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+            except Exception as e:
+                failed.append((name, str(e)))
+
+    return dropped
+
+
+def maintain_partitions(
+        bind: Engine | Connection,
+        interval: str | None = None,
+        table: str = "tokens",
+        now: datetime | None = None,
+) -> dict:
+    """
+    Создать будущие партиции, удалить истёкшие. Упавшие шаги — в "failed"
+    как (партиция, ошибка): их повторит следующий запуск
+    """
+    interval = interval or settings.TOKEN_PARTITION_INTERVAL
+    if interval not in INTERVALS:
+        raise ValueError(f"Unknown TOKEN_PARTITION_INTERVAL: {interval}")
+    with _step(bind) as conn:
+        partitioned = is_partitioned(conn, table)
+    if not partitioned:
+        # таблица ещё не переведена — migrations/partition_tokens.sql
+        return {"created": [], "dropped": [], "failed": [], "skipped": f"{table} is not partitioned"}
+
+    failed = []
+    return {
+        "created": create_partitions(bind, interval, table, now, failed),
+        "dropped": drop_expired_partitions(bind, table, now, failed),
+        "failed": failed,
+    }
@@ -1,9 +1,19 @@
 #app/models/user.py
+from sqlalchemy import DateTime, Index
 from sqlmodel import SQLModel, Field
 from uuid import UUID, uuid4
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
+from app.config.settings import settings
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# asyncpg не принимает aware datetime для timestamp without time zone,
+# поэтому все даты — timestamptz и всегда в UTC
 class User(SQLModel, table=True):
     __tablename__ = "user"
     id: UUID = Field(default_factory=uuid4, primary_key=True)
@@ -12,20 +22,41 @@ class User(SQLModel, table=True):
     password_hash: str
 
     is_active: bool = Field(default=False)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utcnow, sa_type=DateTime(timezone=True))
+
+
+# Партиционированная таблица (TOKEN_PARTITION_INTERVAL): ключ партиции обязан
+# входить в первичный ключ. Таблицу переводит migrations/partition_tokens.sql,
+# партиции создаёт app/models/partitions.py
+TOKENS_PARTITIONED = bool(settings.TOKEN_PARTITION_INTERVAL)
 
 
 class Tokens(SQLModel, table=True):
     __tablename__ = "tokens"
+    __table_args__ = {"postgresql_partition_by": "RANGE (expires_at)"} if TOKENS_PARTITIONED else {}
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     user_id: UUID = Field(foreign_key="user.id")
 
-    token: Optional[str] = Field(default=None, index=True)
-    token_hash: Optional[str] = Field(default=None, index=True)  # Для refresh токенов
+    token: Optional[str] = None
+    token_hash: Optional[str] = None  # Для refresh токенов
     token_type: str  # "email_confirm", "password_reset", "refresh_token"
 
-    expires_at: datetime
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(sa_type=DateTime(timezone=True), primary_key=TOKENS_PARTITIONED)
+    created_at: datetime = Field(default_factory=utcnow, sa_type=DateTime(timezone=True))
     is_used: bool = Field(default=False)  # Для одноразовых токенов
-    revoked_at: datetime | None = None  # Для refresh токенов
\ No newline at end of file
+    revoked_at: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))  # Для refresh токенов
+
+
+def _live(condition) -> dict:
+    return {"postgresql_where": condition, "sqlite_where": condition}
+
+
+# Индексы под горячие запросы и только по живым токенам: отозванные и
+# использованные строки (большая часть таблицы до очистки) в них не попадают.
+# get_refresh_token / rotate: token_hash + revoked_at IS NULL + expires_at
+Index("ix_tokens_refresh_live", Tokens.token_hash, Tokens.expires_at, **_live(Tokens.revoked_at.is_(None)))
+# get_valid_token: token + token_type + is_used = false + expires_at
+Index("ix_tokens_onetime_live", Tokens.token, Tokens.token_type, **_live(Tokens.is_used == False))
+# revoke_all_refresh_tokens: user_id + revoked_at IS NULL
+Index("ix_tokens_user_live", Tokens.user_id, **_live(Tokens.revoked_at.is_(None)))
@@ -3,6 +3,8 @@ import os
 from celery import Celery
 from celery.schedules import crontab
 
+from app.config.settings import settings
+
 
 # Устанавливаем переменную окружения для Django/Flask (не обязательно для FastAPI)
 #os.environ.setdefault('FORKED_BY_MULTIPROCESSING', '1')
@@ -12,7 +14,7 @@ celery_app = Celery(
     'todolist',
     broker='redis://redis:6379/0',  # Redis как брокер сообщений
     backend='redis://redis:6379/0',  # Redis как бэкенд результатов
-    include=['app.tasks.email_tasks']  # Импортируем задачи
+    include=['app.tasks.email_tasks', 'app.tasks.tasks']  # Импортируем задачи
 )
 
 # Настройки по умолчанию
@@ -29,13 +31,25 @@ celery_app.conf.update(
     broker_connection_max_retries=3, # Максимальное количество попыток переподключения
     broker_transport='redis', # ЯВНО указываем транспорт
     result_backend_transport='redis', # ЯВНО указываем транспорт
+
+    # Отправка писем — это ожидание SMTP, а не CPU: потоки вместо --pool=solo.
+    # _email потокобезопасен (SMTPPool), одновременных SMTP сессий не больше
+    # EMAIL_POOL_SIZE — остальные потоки ждут свободное соединение
+    worker_pool='threads',
+    worker_concurrency=settings.EMAIL_WORKER_CONCURRENCY,
+    worker_prefetch_multiplier=1,  # не набирать задач больше, чем можем отправить
 )
 
-# Периодические задачи (если понадобятся)
-# celery_app.conf.beat_schedule = {
-#     Пример: очистка старых токенов каждый день в 2:00
-#     'cleanup-expired-tokens': {
-#     'task': 'app.tasks.email_tasks.cleanup_expired_tokens',
-#     'schedule': crontab(hour=2, minute=0),
-#     },
-# }
\ No newline at end of file
+# Периодические задачи (нужен запущенный celery beat)
+celery_app.conf.beat_schedule = {
+    # очистка старых токенов каждый день в 2:00
+    'cleanup-expired-tokens': {
+        'task': 'cleanup_expired_tokens',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    # партиции tokens (TOKEN_PARTITION_INTERVAL): без партиционирования ничего не делает
+    'maintain-token-partitions': {
+        'task': 'maintain_token_partitions',
+        'schedule': crontab(minute=15),
+    },
+}
@@ -0,0 +1,101 @@
+# app/tasks/email_dedup.py
+"""
+Дедупликация писем в воркере.
+
+Outbox доставляет at-least-once: если relay упал между публикацией задачи
+и commit, та же строка уйдёт в брокер ещё раз. Перед отправкой воркер
+занимает dedup_key (SET NX EX); ключ уже занят — письмо отправлено или
+отправляется другой задачей, повтор пропускается. Отправка упала — ключ
+освобождается, и retry Celery отправит письмо.
+
+Ключ живёт EMAIL_DEDUP_TTL_SECONDS — дольше, чем relay повторяет строку.
+Хранилище недоступно — письмо отправляется: лучше дубль, чем потеря.
+"""
+import time
+from abc import ABC, abstractmethod
+
+from app.config.settings import settings
+
+
+class EmailDedup(ABC):
+
+    @abstractmethod
+    def claim(self, key: str) -> bool:
+        """True — письмо с этим ключом ещё не отправлялось, отправляем мы"""
+
+    @abstractmethod
+    def release(self, key: str) -> None:
+        """Отправка не удалась: ключ свободен для retry"""
+
+
+class MemoryEmailDedup(EmailDedup):
+    """Для тестов: ключи в словаре процесса"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.keys: dict[str, float] = {}
+
+    def claim(self, key):
+        now = time.monotonic()
+        if self.keys.get(key, 0.0) > now:
+            return False
+        self.keys[key] = now + self.ttl
+        return True
+
+    def release(self, key):
+        self.keys.pop(key, None)
+
+
+class RedisEmailDedup(EmailDedup):
+
+    def __init__(self, redis, ttl: int, prefix: str = "email:sent"):
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def claim(self, key):
+        return bool(self.redis.set(f"{self.prefix}:{key}", 1, nx=True, ex=self.ttl))
+
+    def release(self, key):
+        self.redis.delete(f"{self.prefix}:{key}")
+
+
+def claim(dedup: EmailDedup, key: str | None) -> bool:
+    """Занять ключ; без ключа (вызов не из relay) и при ошибке хранилища — отправлять"""
+    if not key:
+        return True
+    try:
+        return dedup.claim(key)
+    except Exception as e:
+        print(f"[EMAIL DEDUP] Store unavailable, {key} sent without check: {e}")
+        return True
+
+
+def release(dedup: EmailDedup, key: str | None):
+    if not key:
+        return
+    try:
+        dedup.release(key)
+    except Exception as e:
+        print(f"[EMAIL DEDUP] Store unavailable, {key} not released: {e}")
+
+
+_email_dedup: EmailDedup | None = None
+
+
+def get_email_dedup() -> EmailDedup:
+    """Бэкенд выбирается EMAIL_DEDUP_BACKEND, экземпляр один на процесс"""
+    global _email_dedup
+
+    if _email_dedup is None:
+        backend = settings.EMAIL_DEDUP_BACKEND
+        if backend == "redis":
+            from app.config.redis import redis_sync_client
+
+            _email_dedup = RedisEmailDedup(redis_sync_client(), settings.EMAIL_DEDUP_TTL_SECONDS)
+        elif backend == "memory":
+            _email_dedup = MemoryEmailDedup(settings.EMAIL_DEDUP_TTL_SECONDS)
+        else:
+            raise ValueError(f"Unknown EMAIL_DEDUP_BACKEND: {backend}")
+
+    return _email_dedup
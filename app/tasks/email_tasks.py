@@ -1,11 +1,15 @@
 # app/tasks/email_tasks.py
 from celery import shared_task
+from celery.signals import worker_init, worker_shutdown
+import time
 from typing import Optional
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.config.settings import settings
 from app.auth.templates import email_confirmation, password_reset
+from app.tasks.email_dedup import claim, get_email_dedup, release
+from app.tasks.smtp_pool import smtp_pool
+from app.metrics import email_send_failures, email_send_seconds, start_http_server
 
 
 @shared_task(name='send_email_confirmation', bind=True, max_retries=3)
@@ -14,15 +18,11 @@ def send_email_confirmation(self, to_email: str, token: str):
     Отправка письма для подтверждения регистрации
     """
     try:
-        confirm_url = f"http://localhost:8000/auth/confirm-email?token={token}"
-        template = email_confirmation(confirm_url)
+        template = render_email("confirmation", token)
 
-        _email(
-            to_email=to_email,
-            subject=template.subject,
-            html_body=template.html,
-            text_body=template.text,
-        )
+        # task_id от relay — dedup_key строки outbox
+        if not _send_once(self.request.id, to_email, template):
+            return {"status": "duplicate", "email": to_email, "type": "confirmation"}
 
         return {"status": "success", "email": to_email, "type": "confirmation"}
 
@@ -37,20 +37,71 @@ def send_password_reset(self, to_email: str, token: str):
     Отправка письма для сброса пароля
     """
     try:
-        reset_url = f"http://localhost:8000/auth/password-reset/confirm?token={token}"
-        template = password_reset(reset_url)
+        template = render_email("password_reset", token)
+
+        if not _send_once(self.request.id, to_email, template):
+            return {"status": "duplicate", "email": to_email, "type": "password_reset"}
+
+        return {"status": "success", "email": to_email, "type": "password_reset"}
+
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(name='send_email_batch', bind=True, max_retries=3)
+def send_email_batch(self, messages: list[dict]):
+    """
+    Пачка писем от outbox relay: все уходят через одно SMTP соединение из пула.
+    messages — [{"email_type", "to_email", "token", "dedup_key"}, ...].
+    Повторяются только письма, которые не удалось отправить.
+    """
+    failed = []
+    sent = 0
+
+    for message in messages:
+        try:
+            template = render_email(message["email_type"], message["token"])
+            sent += _send_once(message["dedup_key"], message["to_email"], template)
+        except Exception as exc:
+            print(f"[EMAIL BATCH ERROR] {message['dedup_key']}: {exc}")
+            failed.append(message)
+
+    if failed:
+        raise self.retry(args=(failed,), countdown=60)
 
+    return {"status": "success", "sent": sent}
+
+
+def render_email(email_type: str, token: str):
+    """Шаблон письма по типу из outbox"""
+    if email_type == "confirmation":
+        return email_confirmation(f"http://localhost:8000/auth/confirm-email?token={token}")
+    if email_type == "password_reset":
+        return password_reset(f"http://localhost:8000/auth/password-reset/confirm?token={token}")
+    raise ValueError(f"Unknown email type: {email_type}")
+
+
+def _send_once(dedup_key: str | None, to_email: str, template) -> bool:
+    """
+    Отправить, если письмо с dedup_key ещё не уходило (app/tasks/email_dedup.py).
+    False — дубль, пропущен.
+    """
+    dedup = get_email_dedup()
+    if not claim(dedup, dedup_key):
+        print(f"[EMAIL DUPLICATE] {dedup_key} already sent, skipped")
+        return False
+
+    try:
         _email(
             to_email=to_email,
             subject=template.subject,
             html_body=template.html,
             text_body=template.text,
         )
-
-        return {"status": "success", "email": to_email, "type": "password_reset"}
-
-    except Exception as exc:
-        raise self.retry(exc=exc, countdown=60)
+    except Exception:
+        release(dedup, dedup_key)
+        raise
+    return True
 
 
 def _email(
@@ -88,25 +139,27 @@ def _email(
         msg.attach(part1)
         msg.attach(part2)
 
-        # Подключаемся к SMTP серверу
-        if settings.EMAIL_USE_TLS:
-            server = smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT)
-            server.starttls()
-        else:
-            server = smtplib.SMTP_SSL(settings.EMAIL_HOST, settings.EMAIL_PORT)
-
-        # Авторизация
-        if settings.EMAIL_HOST_USER and settings.EMAIL_HOST_PASSWORD:
-            server.login(settings.EMAIL_HOST_USER, settings.EMAIL_HOST_PASSWORD)
-
-        # Отправка
-        server.send_message(msg)
-        server.quit()
+        # Отправка через пул: TLS и логин уже сделаны на соединении
+        started = time.perf_counter()
+        smtp_pool.send(msg)
+        email_send_seconds.observe(time.perf_counter() - started)
 
         print(f"[EMAIL SENT] To: {to_email}, Subject: {subject}")
 
     except Exception as e:
+        email_send_failures.inc()
         print(f"[EMAIL ERROR] To: {to_email}, Error: {str(e)}")
         raise
 
 
+@worker_init.connect
+def _start_metrics_server(**kwargs):
+    # воркер с --pool=threads — один процесс, один порт
+    if settings.METRICS_WORKER_PORT:
+        start_http_server(settings.METRICS_WORKER_PORT)
+
+
+# --pool=threads: один процесс без fork, worker_process_* сигналы не приходят
+@worker_shutdown.connect
+def _close_smtp_pool(**kwargs):
+    smtp_pool.close()
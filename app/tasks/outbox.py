@@ -0,0 +1,152 @@
+# app/tasks/outbox.py
+"""
+Relay для email outbox: забирает неотправленные письма пачками и
+ставит их в Celery (или шлёт напрямую, если Celery недоступен).
+С EMAIL_BATCH_MODE письма уходят задачами send_email_batch: письмо ждёт
+не дольше OUTBOX_POLL_INTERVAL_SECONDS, в задаче до EMAIL_BATCH_SIZE писем.
+
+    python -m app.tasks.outbox
+
+Доставка at-least-once: если relay упадёт между отправкой в брокер и
+commit, пачка уйдёт ещё раз. dedup_key передаётся как task_id (и в
+сообщениях пачки): воркер отправляет письмо с одним ключом один раз
+(app/tasks/email_dedup.py).
+"""
+import time
+
+from sqlmodel import Session, select
+
+from app.config.database import engine
+from app.config.settings import settings
+from app.metrics import email_enqueue_failures, email_enqueue_seconds, email_sync_fallbacks, start_http_server
+from app.models.email_outbox import EmailOutbox
+from app.models.user import utcnow
+
+try:
+    from app.tasks.celery_app import celery_app
+    from app.tasks.email_tasks import send_email_batch, send_email_confirmation, send_password_reset
+    CELERY_AVAILABLE = True
+except (ImportError, ModuleNotFoundError):
+    CELERY_AVAILABLE = False
+    print("[WARNING] Celery not available. Outbox will send emails directly.")
+
+
+def _celery_tasks() -> dict:
+    return {
+        "confirmation": send_email_confirmation,
+        "password_reset": send_password_reset,
+    }
+
+
+def relay_batch(session: Session, limit: int | None = None) -> int:
+    """Отправляет одну пачку, возвращает число обработанных писем"""
+    stmt = (
+        select(EmailOutbox)
+        .where(
+            EmailOutbox.sent_at.is_(None),
+            EmailOutbox.attempts < settings.OUTBOX_MAX_ATTEMPTS,
+        )
+        .order_by(EmailOutbox.created_at)
+        .limit(limit or settings.OUTBOX_BATCH_SIZE)
+        # несколько relay не возьмут одни и те же строки
+        .with_for_update(skip_locked=True)
+    )
+    rows = session.exec(stmt).all()
+    if not rows:
+        return 0
+
+    if CELERY_AVAILABLE and settings.EMAIL_BATCH_MODE:
+        # одна задача на EMAIL_BATCH_SIZE писем: меньше сообщений в брокере
+        # и одна SMTP сессия на пачку в воркере
+        with celery_app.producer_or_acquire() as producer:
+            for start in range(0, len(rows), settings.EMAIL_BATCH_SIZE):
+                chunk = rows[start:start + settings.EMAIL_BATCH_SIZE]
+                _deliver_batch(chunk, lambda: _enqueue(
+                    send_email_batch,
+                    args=([_payload(row) for row in chunk],),
+                    task_id=f"batch:{chunk[0].dedup_key}",
+                    producer=producer,
+                ))
+    elif CELERY_AVAILABLE:
+        tasks = _celery_tasks()
+        # одно соединение с брокером на всю пачку
+        with celery_app.producer_or_acquire() as producer:
+            for row in rows:
+                _deliver(row, lambda: _enqueue(
+                    tasks[row.email_type],
+                    args=(row.to_email, row.token),
+                    task_id=row.dedup_key,
+                    producer=producer,
+                ))
+    else:
+        email_sync_fallbacks.inc(len(rows))
+        for row in rows:
+            _deliver(row, lambda: _send_directly(row))
+
+    session.commit()
+    return len(rows)
+
+
+def _enqueue(task, **options):
+    started = time.perf_counter()
+    try:
+        return task.apply_async(**options)
+    except Exception:
+        email_enqueue_failures.inc(task=task.name)
+        raise
+    finally:
+        email_enqueue_seconds.observe(time.perf_counter() - started, task=task.name)
+
+
+def _deliver(row: EmailOutbox, send):
+    try:
+        send()
+        row.sent_at = utcnow()
+    except Exception as e:
+        row.attempts += 1
+        row.last_error = str(e)
+        print(f"[OUTBOX ERROR] {row.dedup_key}: {e}")
+
+
+def _deliver_batch(rows: list[EmailOutbox], send):
+    try:
+        send()
+        sent_at = utcnow()
+        for row in rows:
+            row.sent_at = sent_at
+    except Exception as e:
+        for row in rows:
+            row.attempts += 1
+            row.last_error = str(e)
+        print(f"[OUTBOX ERROR] batch of {len(rows)}: {e}")
+
+
+def _payload(row: EmailOutbox) -> dict:
+    return {
+        "email_type": row.email_type,
+        "to_email": row.to_email,
+        "token": row.token,
+        "dedup_key": row.dedup_key,
+    }
+
+
+def _send_directly(row: EmailOutbox):
+    from app.tasks.email_tasks import _send_once, render_email
+
+    _send_once(row.dedup_key, row.to_email, render_email(row.email_type, row.token))
+
+
+def run():
+    print("[OUTBOX] Relay started")
+    if settings.METRICS_RELAY_PORT:
+        start_http_server(settings.METRICS_RELAY_PORT)
+    while True:
+        with Session(engine) as session:
+            processed = relay_batch(session)
+        # полная пачка — скорее всего есть ещё, не спим
+        if processed < settings.OUTBOX_BATCH_SIZE:
+            time.sleep(settings.OUTBOX_POLL_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    run()
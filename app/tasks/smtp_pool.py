@@ -0,0 +1,139 @@
+# app/tasks/smtp_pool.py
+import queue
+import smtplib
+import threading
+import time
+from email.message import Message
+
+from app.config.settings import settings
+
+
+# сервер отверг письмо, но сессия жива
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException)
+
+
+class PooledConnection:
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.messages = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    """
+    Пул SMTP соединений на процесс воркера.
+    TLS и AUTH делаются один раз на соединение, а не на каждое письмо.
+
+    - соединение, простаивавшее дольше noop_after, проверяется NOOP
+    - после max_messages писем соединение закрывается (лимиты серверов)
+    - если сервер сам закрыл соединение, письмо уходит через новое
+    - отказ по конкретному письму (адрес, содержимое) соединение не рвёт:
+      RSET и обратно в пул, без нового TLS и логина
+    """
+
+    def __init__(
+            self,
+            connect,
+            size: int = 4,
+            max_messages: int = 100,
+            noop_after: float = 30.0,
+    ):
+        self.connect = connect
+        self.size = size
+        self.max_messages = max_messages
+        self.noop_after = noop_after
+        self._idle: queue.LifoQueue[PooledConnection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def send(self, msg: Message):
+        with self._slots:
+            conn = self._acquire()
+            try:
+                try:
+                    conn.server.send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    # сервер закрыл соединение между проверкой и отправкой — один повтор
+                    self._close(conn)
+                    conn = PooledConnection(self.connect())
+                    conn.server.send_message(msg)
+            except MESSAGE_ERRORS:
+                self._reset(conn)
+                raise
+            except Exception:
+                # обрыв, таймаут, ошибка TLS — состояние сессии неизвестно
+                self._close(conn)
+                raise
+
+            conn.messages += 1
+            self._release(conn)
+
+    def _release(self, conn: PooledConnection):
+        conn.last_used = time.monotonic()
+        if conn.messages >= self.max_messages:
+            self._close(conn)
+        else:
+            self._idle.put(conn)
+
+    def _reset(self, conn: PooledConnection):
+        try:
+            conn.server.rset()
+        except (smtplib.SMTPException, OSError):
+            self._close(conn)
+            return
+        self._release(conn)
+
+    def _acquire(self) -> PooledConnection:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return PooledConnection(self.connect())
+
+            if time.monotonic() - conn.last_used < self.noop_after or self._alive(conn):
+                return conn
+            self._close(conn)
+
+    @staticmethod
+    def _alive(conn: PooledConnection) -> bool:
+        try:
+            return conn.server.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    @staticmethod
+    def _close(conn: PooledConnection):
+        try:
+            conn.server.quit()
+        except Exception:
+            conn.server.close()
+
+    def close(self):
+        """Закрывает простаивающие соединения (QUIT) при остановке воркера"""
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def connect_from_settings() -> smtplib.SMTP:
+    timeout = settings.EMAIL_TIMEOUT_SECONDS
+    if settings.EMAIL_USE_TLS:
+        server = smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT, timeout=timeout)
+        server.starttls()
+    else:
+        server = smtplib.SMTP_SSL(settings.EMAIL_HOST, settings.EMAIL_PORT, timeout=timeout)
+
+    if settings.EMAIL_HOST_USER and settings.EMAIL_HOST_PASSWORD:
+        server.login(settings.EMAIL_HOST_USER, settings.EMAIL_HOST_PASSWORD)
+    return server
+
+
+smtp_pool = SMTPPool(
+    connect_from_settings,
+    size=settings.EMAIL_POOL_SIZE,
+    max_messages=settings.EMAIL_MAX_MESSAGES_PER_CONNECTION,
+    noop_after=settings.EMAIL_NOOP_AFTER_SECONDS,
+)
@@ -0,0 +1,146 @@
+# app/tasks/tasks.py
+"""
+Периодическая очистка таблиц tokens и email_outbox (celery beat, cleanup-expired-tokens).
+
+Удаляются истёкшие, отозванные и использованные токены пачками по
+TOKEN_CLEANUP_BATCH_SIZE строк, каждая пачка в своей короткой транзакции,
+между пачками пауза — блокировки держатся недолго, autovacuum и реплики
+успевают за удалением.
+
+Тем же способом из email_outbox уходят отправленные письма и письма,
+исчерпавшие OUTBOX_MAX_ATTEMPTS, старше OUTBOX_RETENTION_HOURS: в строке
+лежит токен подтверждения или сброса пароля в открытом виде.
+"""
+import time
+
+from celery import shared_task
+from datetime import timedelta
+
+from sqlalchemy import and_, delete, literal_column, or_, tuple_
+from sqlmodel import Session, select
+
+from app.config.database import engine
+from app.config.settings import settings
+from app.models.email_outbox import EmailOutbox
+from app.models.partitions import maintain_partitions
+from app.models.user import Tokens, TOKENS_PARTITIONED, utcnow
+
+
+def _dead_tokens():
+    return or_(
+        Tokens.expires_at < utcnow(),
+        Tokens.revoked_at.is_not(None),
+        Tokens.is_used == True,
+    )
+
+
+def _dead_outbox():
+    cutoff = utcnow() - timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+    return or_(
+        EmailOutbox.sent_at < cutoff,
+        and_(
+            EmailOutbox.sent_at.is_(None),
+            EmailOutbox.attempts >= settings.OUTBOX_MAX_ATTEMPTS,
+            EmailOutbox.created_at < cutoff,
+        ),
+    )
+
+
+def delete_batch(session: Session, limit: int, model=Tokens, dead=_dead_tokens) -> int:
+    """Удаляет до limit мёртвых строк model, возвращает число удалённых строк"""
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        # по ctid без сортировки; строки, которые сейчас держит ротация, пропускаем.
+        # ctid уникален только внутри партиции, поэтому вместе с tableoid
+        row = tuple_(literal_column("tableoid"), literal_column("ctid"))
+        batch = (
+            select(literal_column("tableoid"), literal_column("ctid"))
+            .select_from(model)
+            .where(dead())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+    elif dialect == "sqlite":
+        row = literal_column("rowid")
+        batch = select(row).select_from(model).where(dead()).limit(limit)
+    else:
+        row = model.id
+        batch = select(row).where(dead()).limit(limit)
+
+    result = session.exec(delete(model).where(row.in_(batch)))
+    session.commit()
+    return result.rowcount
+
+
+def cleanup_tokens(
+        session: Session,
+        batch_size: int | None = None,
+        pause: float | None = None,
+        max_seconds: float | None = None,
+        model=Tokens,
+        dead=_dead_tokens,
+) -> dict:
+    """
+    Удаляет пачки, пока они приходят полными и не вышел бюджет времени.
+    Возвращает статистику запуска.
+    """
+    batch_size = batch_size or settings.TOKEN_CLEANUP_BATCH_SIZE
+    pause = settings.TOKEN_CLEANUP_PAUSE_SECONDS if pause is None else pause
+    max_seconds = max_seconds or settings.TOKEN_CLEANUP_MAX_SECONDS
+
+    started = time.monotonic()
+    deleted = batches = 0
+    while True:
+        removed = delete_batch(session, batch_size, model, dead)
+        deleted += removed
+        batches += 1
+        if removed < batch_size or time.monotonic() - started >= max_seconds:
+            break
+        time.sleep(pause)
+
+    return {
+        "deleted": deleted,
+        "batches": batches,
+        "seconds": round(time.monotonic() - started, 3),
+        # бюджет кончился раньше, чем мёртвые токены — доберёт следующий запуск
+        "complete": removed < batch_size,
+    }
+
+
+def cleanup_outbox(session: Session, **options) -> dict:
+    """Отправленные и брошенные письма старше OUTBOX_RETENTION_HOURS"""
+    return cleanup_tokens(session, model=EmailOutbox, dead=_dead_outbox, **options)
+
+
+@shared_task(name='cleanup_expired_tokens')
+def cleanup_expired_tokens():
+    """
+    Очистка истёкших, отозванных и использованных токенов и старых писем outbox
+    """
+    with Session(engine) as session:
+        stats = cleanup_tokens(session)
+        outbox = cleanup_outbox(session)
+
+    for name, run in (("TOKEN CLEANUP", stats), ("OUTBOX CLEANUP", outbox)):
+        print(
+            f"[{name}] deleted {run['deleted']} rows in {run['batches']} batches, "
+            f"{run['seconds']}s{'' if run['complete'] else ' (time budget exhausted)'}"
+        )
+    return {**stats, "outbox": outbox}
+
+
+@shared_task(name='maintain_token_partitions')
+def maintain_token_partitions():
+    """
+    Создание будущих и удаление истёкших партиций tokens
+    """
+    if not TOKENS_PARTITIONED or engine.dialect.name != "postgresql":
+        return {"created": [], "dropped": [], "failed": [], "skipped": "partitioning is off"}
+
+    # каждая партиция в своей транзакции: одна ошибка не блокирует остальные
+    stats = maintain_partitions(engine)
+
+    print(f"[TOKEN PARTITIONS] created {stats['created']}, dropped {stats['dropped']}")
+    for name, error in stats["failed"]:
+        print(f"[TOKEN PARTITIONS] {name} failed: {error}")
+    return stats
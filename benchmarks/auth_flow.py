@@ -0,0 +1,173 @@
+# benchmarks/auth_flow.py
+"""
+Сценарная нагрузка на /auth без поднятого сервера: приложение вызывается
+в процессе через httpx.ASGITransport.
+
+    python -m benchmarks.auth_flow --users 20 --flows 5 --output flow.json
+    python -m benchmarks.auth_flow --database-url postgresql+asyncpg://... --users 50
+
+Каждый виртуальный пользователь крутит цепочку
+register → confirm-email → login → refresh → logout-all с новым email.
+По умолчанию база — sqlite во временном файле; с --database-url таблицы
+создаются, если их нет, и в базу пишутся тестовые пользователи.
+
+SMTP и Celery не нужны: письма остаются в email outbox (relay не
+запускается), токен подтверждения читается оттуда и в замер не входит.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from uuid import uuid4
+
+from benchmarks.common import bench_engine, bench_env, latency_stats, run_info
+
+bench_env()
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config.database import get_async_session
+from app.main import app
+from app.models.email_outbox import EmailOutbox
+
+PASSWORD = "StrongPassword123!"
+
+STEPS = ["register", "confirm_email", "login", "refresh", "logout_all"]
+
+
+class Recorder:
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, step: str, client: httpx.AsyncClient, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[step].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[step] += 1
+            return None
+        return response
+
+
+async def confirmation_token(session_maker, email: str) -> str | None:
+    async with session_maker() as session:
+        stmt = select(EmailOutbox.token).where(
+            EmailOutbox.to_email == email,
+            EmailOutbox.email_type == "confirmation",
+        )
+        return (await session.exec(stmt)).first()
+
+
+async def flow(client, session_maker, recorder: Recorder) -> bool:
+    email = f"bench-{uuid4().hex}@example.com"
+
+    if not await recorder.call("register", client, "POST", "/auth/register", json={
+        "email": email, "password": PASSWORD, "password_confirm": PASSWORD,
+    }):
+        return False
+
+    token = await confirmation_token(session_maker, email)
+    if not await recorder.call("confirm_email", client, "GET", "/auth/confirm-email", params={"token": token}):
+        return False
+
+    response = await recorder.call("login", client, "POST", "/auth/login/json", json={
+        "email": email, "password": PASSWORD,
+    })
+    if not response:
+        return False
+
+    response = await recorder.call("refresh", client, "POST", "/auth/refresh", json={
+        "refresh_token": response.json()["refresh_token"],
+    })
+    if not response:
+        return False
+
+    return bool(await recorder.call("logout_all", client, "POST", "/auth/logout-all", headers={
+        "Authorization": f"Bearer {response.json()['access_token']}",
+    }))
+
+
+async def user_worker(client, session_maker, recorder: Recorder, flows: int, completed: list):
+    for _ in range(flows):
+        if await flow(client, session_maker, recorder):
+            completed.append(1)
+
+
+async def run(database_url: str, users: int, flows: int) -> dict:
+    # пул на всех виртуальных пользователей
+    engine = bench_engine(database_url, users)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = override_session
+    recorder = Recorder()
+    completed: list[int] = []
+
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                user_worker(client, session_maker, recorder, flows, completed)
+                for _ in range(users)
+            ))
+            elapsed = time.perf_counter() - started
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    return {
+        "database": engine.dialect.name,
+        "users": users,
+        "flows_per_user": flows,
+        "flows_completed": len(completed),
+        "flows_per_sec": round(len(completed) / elapsed, 2),
+        "seconds": round(elapsed, 2),
+        "steps": {
+            step: latency_stats(recorder.latencies[step], elapsed, recorder.errors[step])
+            for step in STEPS
+        },
+    }
+
+
+def run_default(users: int, flows: int, database_url: str | None = None) -> dict:
+    if database_url:
+        return asyncio.run(run(database_url, users, flows))
+    with tempfile.TemporaryDirectory() as tmp:
+        return asyncio.run(run(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}", users, flows))
+
+
+def main(args):
+    report = {**run_info(), "auth_flow": run_default(args.users, args.flows, args.database_url)}
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Сценарная нагрузка на /auth")
+    parser.add_argument("--database-url", help="async URL; по умолчанию — sqlite во временном файле")
+    parser.add_argument("--users", type=int, default=20, help="виртуальных пользователей одновременно")
+    parser.add_argument("--flows", type=int, default=5, help="цепочек на пользователя")
+    parser.add_argument("--output", help="куда сохранить JSON с результатами")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,114 @@
+# benchmarks/breached_passwords.py
+"""
+Проверка утёкших паролей: проверок в секунду и память на воркер.
+
+    python -m benchmarks.breached_passwords --passwords 10000000 --workers 4
+
+Собирает фильтр из синтетического списка во временном каталоге и запускает
+воркеры-процессы в двух режимах: mmap (как в приложении) и heap — фильтр
+прочитан в bytes каждого процесса. Память из /proc: RssAnon — приватная
+память процесса, RssFile — страницы файла (общие через page cache),
+Pss — доля процесса с учётом общих страниц. Только Linux.
+"""
+import argparse
+import json
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import bench_env, run_info
+
+bench_env()
+
+from app.auth.breached import BreachedPasswords, build
+
+
+def memory_mb() -> dict:
+    values = {}
+    for line in Path("/proc/self/status").read_text().splitlines():
+        key, _, value = line.partition(":")
+        if key in ("VmRSS", "RssAnon", "RssFile"):
+            values[key] = int(value.split()[0])
+    rollup = Path("/proc/self/smaps_rollup")
+    if rollup.exists():
+        for line in rollup.read_text().splitlines():
+            if line.startswith("Pss:"):
+                values["Pss"] = int(line.split()[1])
+    return {key.lower() + "_mb": round(kb / 1024, 1) for key, kb in values.items()}
+
+
+def worker(path: str, mode: str, passwords: int, lookups: int, ready, start, results):
+    bloom = BreachedPasswords(path)
+    if mode == "heap":
+        mm = bloom._mm
+        bloom._mm = bytes(mm)
+        mm.close()
+
+    # половина — из списка, половина — нет
+    candidates = [
+        f"password-{i * 7919 % passwords}" if i % 2 else f"unknown-{i}"
+        for i in range(lookups)
+    ]
+    ready.wait()
+    start.wait()
+
+    started = time.perf_counter()
+    found = sum(candidate in bloom for candidate in candidates)
+    elapsed = time.perf_counter() - started
+    results.put({"per_sec": lookups / elapsed, "found": found, **memory_mb()})
+
+
+def run(path: str, mode: str, args) -> dict:
+    ready = multiprocessing.Barrier(args.workers + 1)
+    start = multiprocessing.Barrier(args.workers + 1)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(path, mode, args.passwords, args.lookups, ready, start, results))
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    ready.wait()
+    start.wait()
+    stats = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    summary = {"mode": mode, "lookups_per_sec_total": round(sum(s["per_sec"] for s in stats))}
+    for key in stats[0]:
+        if key.endswith("_mb") or key == "per_sec":
+            summary[f"{key}_per_worker"] = round(sum(s[key] for s in stats) / len(stats), 1)
+    summary["false_positive_rate"] = round(
+        (sum(s["found"] for s in stats) / len(stats) - args.lookups // 2) / (args.lookups - args.lookups // 2), 5
+    )
+    return summary
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "passwords.txt"
+        with open(source, "w") as f:
+            for i in range(args.passwords):
+                f.write(f"password-{i}\n")
+
+        started = time.perf_counter()
+        info = build(source, Path(tmp) / "breached.bloom", args.fp_rate)
+        info["build_seconds"] = round(time.perf_counter() - started, 1)
+
+        results = [run(str(Path(tmp) / "breached.bloom"), mode, args) for mode in ("mmap", "heap")]
+
+    print(json.dumps({**run_info(), "filter": info, "workers": args.workers, "results": results}, indent=2))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк Bloom filter утёкших паролей")
+    parser.add_argument("--passwords", type=int, default=1_000_000)
+    parser.add_argument("--fp-rate", type=float, default=0.001)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
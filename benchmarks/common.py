@@ -0,0 +1,80 @@
+# benchmarks/common.py
+"""
+Общее для бенчмарков: окружение, async engine, перцентили, сводка по
+задержкам, метаданные прогона.
+"""
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+
+def bench_env():
+    # Settings читаются при импорте app.*, поэтому значения по умолчанию — до импортов
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    os.environ.setdefault("POSTGRES_USER", "bench")
+    os.environ.setdefault("POSTGRES_PASSWORD", "bench")
+    os.environ.setdefault("POSTGRES_DB", "bench")
+    os.environ.setdefault("JWT_SECRET", "bench-secret")
+    os.environ.setdefault("TOKEN_EPOCH_BACKEND", "memory")
+    # сценарий регистрирует сотни пользователей с одного IP
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "memory")
+
+
+def bench_engine(database_url: str, connections: int = 0, connect_args: dict | None = None):
+    """
+    async engine с пулом как у приложения (engine_options). connections —
+    сколько соединений нужно одновременно: пул не меньше, чтобы мерить
+    запросы, а не ожидание соединения
+    """
+    # app.* читает Settings при импорте — только после bench_env()
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.config.pool import engine_options
+
+    options = engine_options(database_url, is_async=True)
+    if "pool_size" in options:
+        options["pool_size"] = max(options["pool_size"], connections)
+    if connect_args:
+        options["connect_args"] = {**options.get("connect_args", {}), **connect_args}
+    return create_async_engine(database_url, **options)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def latency_stats(latencies: list[float], elapsed: float, errors: int = 0) -> dict:
+    """latencies и elapsed — в секундах; в отчёт — мс и операций в секунду"""
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "per_sec": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 4),
+        "p95_ms": round(percentile(values, 95) * 1000, 4),
+        "p99_ms": round(percentile(values, 99) * 1000, 4),
+    }
+
+
+def run_info() -> dict:
+    """Где и на чём снят результат — чтобы сравнивать прогоны между коммитами"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ""
+
+    return {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
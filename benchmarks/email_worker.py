@@ -0,0 +1,98 @@
+# benchmarks/email_worker.py
+"""
+Пропускная способность воркера писем: один поток (--pool=solo) против
+пула потоков (--pool=threads) с общим SMTPPool.
+
+    pip install aiosmtpd
+    python -m benchmarks.email_worker --messages 300 --concurrency 10 --latency-ms 50
+
+Локальный aiosmtpd отвечает с задержкой --latency-ms на каждое письмо,
+как удалённый SMTP сервер. Задача send_email_confirmation вызывается
+так же, как её вызывает воркер, только без брокера.
+"""
+import argparse
+import asyncio
+import json
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from aiosmtpd.controller import Controller
+
+from benchmarks.common import bench_env, latency_stats, run_info
+
+bench_env()
+
+from app.tasks import email_tasks
+from app.tasks.smtp_pool import SMTPPool
+
+from .smtp_throughput import USER, PASSWORD, authenticator, free_port
+
+
+class SlowHandler:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latency)
+        self.received += 1
+        return "250 OK"
+
+
+def run(name: str, concurrency: int, port: int, messages: int) -> dict:
+    def connect():
+        server = smtplib.SMTP("127.0.0.1", port, timeout=30)
+        server.login(USER, PASSWORD)
+        return server
+
+    def send(i: int):
+        call_started = time.perf_counter()
+        email_tasks.send_email_confirmation.run(f"user{i}@test.com", f"token-{i}")
+        latencies.append(time.perf_counter() - call_started)
+
+    pool = SMTPPool(connect, size=concurrency)
+    latencies = []
+    with patch.object(email_tasks, "smtp_pool", pool), \
+            patch.object(email_tasks.settings, "EMAIL_HOST_USER", USER), \
+            patch.object(email_tasks.settings, "EMAIL_HOST_PASSWORD", PASSWORD), \
+            patch("builtins.print"):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(send, range(messages)))
+        elapsed = time.perf_counter() - started
+    pool.close()
+
+    return {"mode": name, "concurrency": concurrency, **latency_stats(latencies, elapsed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк конкурентного воркера писем")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    port = free_port()
+    handler = SlowHandler(args.latency_ms / 1000)
+    controller = Controller(
+        handler,
+        hostname="127.0.0.1",
+        port=port,
+        authenticator=authenticator,
+        auth_require_tls=False,
+    )
+    controller.start()
+
+    results = [
+        run("solo", 1, port, args.messages),
+        run("threads", args.concurrency, port, args.messages),
+    ]
+    controller.stop()
+
+    print(json.dumps({**run_info(), "latency_ms": args.latency_ms, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/micro.py
+"""
+Микробенчмарки горячих функций auth: время одного вызова, p50/p95/p99.
+
+    python -m benchmarks.micro --iterations 20000 --output micro.json
+
+hash_password — argon2 с параметрами из Settings, поэтому итераций у него
+меньше (--hash-iterations). Каждый вызов меряется отдельно: для функций
+на единицы микросекунд в перцентилях есть накладные perf_counter (~0.1 мкс).
+"""
+import argparse
+import asyncio
+import json
+import time
+from uuid import uuid4
+
+from benchmarks.common import bench_env, latency_stats, run_info
+
+bench_env()
+
+from app.auth.security import create_access_token, get_current_user_id, hash_password
+from app.auth.templates import email_confirmation, password_reset
+from app.auth.validators import validate_password
+
+PASSWORD = "StrongPassword123!"
+EMAIL = "bench.user@example.com"
+
+
+def measure(func, iterations: int, warmup: int = 100) -> dict:
+    for _ in range(min(warmup, iterations)):
+        func()
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - call_started)
+    return latency_stats(latencies, time.perf_counter() - started)
+
+
+async def measure_async(func, iterations: int, warmup: int = 100) -> dict:
+    for _ in range(min(warmup, iterations)):
+        await func()
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        await func()
+        latencies.append(time.perf_counter() - call_started)
+    return latency_stats(latencies, time.perf_counter() - started)
+
+
+def run(iterations: int, hash_iterations: int) -> dict:
+    access_token = create_access_token(uuid4())
+    url = "http://localhost:8000/auth/confirm-email?token=" + "x" * 43
+
+    results = {
+        "hash_password": measure(lambda: hash_password(PASSWORD), hash_iterations, warmup=2),
+        "create_access_token": measure(lambda: create_access_token(uuid4()), iterations),
+        "get_current_user_id": asyncio.run(
+            measure_async(lambda: get_current_user_id(access_token), iterations)
+        ),
+        "validate_password": measure(lambda: validate_password(PASSWORD, EMAIL), iterations),
+        "email_confirmation_template": measure(lambda: email_confirmation(url), iterations),
+        "password_reset_template": measure(lambda: password_reset(url), iterations),
+    }
+    return results
+
+
+def main(args):
+    report = {**run_info(), "micro": run(args.iterations, args.hash_iterations)}
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Микробенчмарки auth")
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--hash-iterations", type=int, default=20)
+    parser.add_argument("--output", help="куда сохранить JSON с результатами")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
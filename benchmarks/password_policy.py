@@ -0,0 +1,95 @@
+# benchmarks/password_policy.py
+"""
+Политика паролей: собранный один раз PasswordPolicy против прежней функции.
+
+    python -m benchmarks.password_policy --iterations 200000
+
+legacy — прежний validate_password: re.search по строке-шаблону на каждое
+правило (поиск в кэше re на каждый вызов), выход на первом нарушении.
+policy — PasswordPolicy.violations: все нарушения за один вызов.
+Для невалидных паролей legacy отдаёт одно нарушение за запрос — сколько
+нарушений, столько и отправок формы; это видно в колонке violations.
+"""
+import argparse
+import json
+import re
+
+from benchmarks.common import bench_env, run_info
+
+bench_env()
+
+from app.auth.exceptions import ValidationError
+from app.auth.validators import password_policy
+from app.config.settings import settings
+from benchmarks.micro import measure
+
+EMAIL = "john.smith@example.com"
+
+PASSWORDS = {
+    "valid": "StrongPassword123!",
+    "valid_long": "Correct-Horse-Battery-Staple-" * 3 + "X9",
+    "weak": "smith#",
+    "no_special": "StrongPassword123",
+}
+
+
+def legacy_validate(password: str, email: str):
+    """Прежняя реализация, без проверки утёкших паролей"""
+    if not password:
+        raise ValidationError("PASSWORD_REQUIRED", "", "password")
+    if not (settings.PASSWORD_MIN_LENGTH <= len(password) <= settings.PASSWORD_MAX_LENGTH):
+        raise ValidationError("PASSWORD_LENGTH", "", "password")
+    if re.search(settings.FORBIDDEN_PASSWORD_CHARS, password):
+        raise ValidationError("PASSWORD_FORBIDDEN_CHARS", "", "password")
+    for name in ("uppercase", "lowercase", "digit", "special"):
+        if not re.search(settings.PASSWORD_REQUIRED_REGEX[name], password):
+            raise ValidationError(f"PASSWORD_{name.upper()}", "", "password")
+
+    local_part, domain_part = email.lower().split("@")
+    password_lower = password.lower()
+    for chunk in re.split(r"[.\-_]", local_part):
+        if len(chunk) >= 3 and chunk in password_lower:
+            raise ValidationError("PASSWORD_CONTAINS_EMAIL_PART", "", "password")
+    for chunk in re.split(r"[.\-_]", domain_part):
+        if len(chunk) >= 4 and chunk in password_lower:
+            raise ValidationError("PASSWORD_CONTAINS_EMAIL_DOMAIN", "", "password")
+
+
+def run_legacy(password: str) -> int:
+    try:
+        legacy_validate(password, EMAIL)
+    except ValidationError:
+        return 1
+    return 0
+
+
+def run_policy(password: str) -> int:
+    return len(password_policy.violations(password, EMAIL))
+
+
+def measure_password(func, password: str, iterations: int) -> dict:
+    stats = measure(lambda: func(password), iterations, warmup=1000)
+    return {**stats, "violations": func(password)}
+
+
+def main(args):
+    results = {}
+    for label, password in PASSWORDS.items():
+        legacy = measure_password(run_legacy, password, args.iterations)
+        policy = measure_password(run_policy, password, args.iterations)
+        results[label] = {
+            "legacy": legacy,
+            "policy": policy,
+            "speedup_p50": round(legacy["p50_ms"] / policy["p50_ms"], 2),
+        }
+    print(json.dumps({**run_info(), "iterations": args.iterations, "results": results}, indent=2))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк политики паролей")
+    parser.add_argument("--iterations", type=int, default=200_000)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
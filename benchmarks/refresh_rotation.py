@@ -0,0 +1,121 @@
+# benchmarks/refresh_rotation.py
+"""
+Ротаций refresh токена в секунду: старая схема (SELECT, UPDATE+commit,
+get User, INSERT+commit) против PostgresTokenStore.rotate (один запрос).
+
+    python -m benchmarks.refresh_rotation --database-url postgresql+asyncpg://... \\
+        --concurrency 50 --duration 10
+
+По умолчанию база — sqlite во временном файле. Таблицы создаются, если
+их нет. В базу пишутся тестовые пользователи и токены.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from uuid import uuid4
+
+from benchmarks.common import bench_engine, bench_env, latency_stats, run_info
+
+bench_env()
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth.security import create_refresh_token, hash_refresh_token
+from app.auth.token_store import PostgresTokenStore
+from app.config.settings import settings
+from app.models.user import User, Tokens
+
+
+def new_refresh(user_id, token_hash) -> Tokens:
+    return Tokens(
+        user_id=user_id,
+        token_type=settings.REFRESH_TOKEN_TYPE,
+        token_hash=token_hash,
+        expires_at=datetime.now(timezone.utc) + settings.REFRESH_TOKEN_TTL,
+    )
+
+
+async def legacy_rotate(store: PostgresTokenStore, session, old_hash: str, new_hash: str):
+    """Ротация так, как она была до rotate(): пять запросов и два commit"""
+    stored = await store.get_valid(session, settings.REFRESH_TOKEN_TYPE, token_hash=old_hash)
+    await store.revoke(session, stored)
+    await session.commit()
+    user = await session.get(User, stored.user_id)
+    await store.save(session, new_refresh(user.id, new_hash))
+    await session.commit()
+
+
+async def fast_rotate(store: PostgresTokenStore, session, old_hash: str, new_hash: str):
+    await store.rotate(session, old_hash, new_hash, datetime.now(timezone.utc) + settings.REFRESH_TOKEN_TTL)
+    await session.commit()
+
+
+async def worker(session_maker, store, rotate, deadline, latencies):
+    user_id = uuid4()
+    token_hash = hash_refresh_token(create_refresh_token())
+    async with session_maker() as session:
+        session.add(User(id=user_id, email=f"bench-{user_id}@test.com", password_hash="x", is_active=True))
+        await session.commit()
+        await store.save(session, new_refresh(user_id, token_hash))
+        await session.commit()
+
+    while time.perf_counter() < deadline:
+        new_hash = hash_refresh_token(create_refresh_token())
+        started = time.perf_counter()
+        async with session_maker() as session:
+            await rotate(store, session, token_hash, new_hash)
+        latencies.append(time.perf_counter() - started)
+        token_hash = new_hash
+
+
+async def run(name, rotate, session_maker, args) -> dict:
+    store = PostgresTokenStore()
+    latencies: list[float] = []
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(
+        worker(session_maker, store, rotate, deadline, latencies)
+        for _ in range(args.concurrency)
+    ))
+    return {"mode": name, **latency_stats(latencies, time.perf_counter() - started)}
+
+
+async def run_all(database_url: str, args) -> dict:
+    engine = bench_engine(database_url, args.concurrency)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    results = [
+        await run("legacy", legacy_rotate, session_maker, args),
+        await run("rotate", fast_rotate, session_maker, args),
+    ]
+    await engine.dispose()
+    return {"database": engine.dialect.name, "concurrency": args.concurrency, "results": results}
+
+
+def main(args):
+    if args.database_url:
+        report = asyncio.run(run_all(args.database_url, args))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            report = asyncio.run(run_all(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}", args))
+    print(json.dumps({**run_info(), **report}, ensure_ascii=False, indent=2))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк ротации refresh токенов")
+    parser.add_argument("--database-url", help="async URL; по умолчанию — sqlite во временном файле")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
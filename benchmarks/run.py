@@ -0,0 +1,98 @@
+# benchmarks/run.py
+"""
+Весь набор: микробенчмарки + сценарий /auth, результат — один JSON.
+
+    python -m benchmarks.run --output bench/$(git rev-parse --short HEAD).json
+    python -m benchmarks.run --output new.json --baseline bench/abc1234.json --threshold 0.2
+
+С --baseline сравнивает p50/p95/p99 с прошлым прогоном и печатает всё,
+что стало медленнее больше чем на threshold (0.2 — на 20%). Код выхода 1,
+если такие есть. Сравнивать имеет смысл прогоны на одной машине
+с одинаковыми параметрами: они записаны в JSON рядом с результатами.
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.common import bench_env, run_info
+
+bench_env()
+
+from benchmarks import auth_flow, micro
+
+PERCENTILES = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def flatten(report: dict) -> dict[str, dict]:
+    """{"micro.validate_password": stats, "auth_flow.login": stats, ...}"""
+    results = {f"micro.{name}": stats for name, stats in report.get("micro", {}).items()}
+    results.update({
+        f"auth_flow.{step}": stats
+        for step, stats in report.get("auth_flow", {}).get("steps", {}).items()
+    })
+    return results
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[dict]:
+    regressions = []
+    old, new = flatten(baseline), flatten(current)
+    for name in sorted(old.keys() & new.keys()):
+        for key in PERCENTILES:
+            before, after = old[name].get(key), new[name].get(key)
+            if before and after and after > before * (1 + threshold):
+                regressions.append({
+                    "name": name,
+                    "metric": key,
+                    "before": before,
+                    "after": after,
+                    "change": f"+{(after / before - 1) * 100:.0f}%",
+                })
+    return regressions
+
+
+def main(args):
+    report = {
+        **run_info(),
+        "params": {
+            "iterations": args.iterations,
+            "hash_iterations": args.hash_iterations,
+            "users": args.users,
+            "flows": args.flows,
+        },
+        "micro": micro.run(args.iterations, args.hash_iterations),
+        "auth_flow": auth_flow.run_default(args.users, args.flows, args.database_url),
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        print(json.dumps({
+            "baseline": baseline.get("commit"),
+            "current": report["commit"],
+            "regressions": regressions,
+        }, ensure_ascii=False, indent=2))
+        if regressions:
+            sys.exit(1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Набор бенчмарков auth")
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--hash-iterations", type=int, default=20)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--flows", type=int, default=5)
+    parser.add_argument("--database-url", help="async URL для сценария; по умолчанию — sqlite во временном файле")
+    parser.add_argument("--output", help="куда сохранить JSON с результатами")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое замедление, доля")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
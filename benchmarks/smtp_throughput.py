@@ -0,0 +1,149 @@
+# benchmarks/smtp_throughput.py
+"""
+Писем в секунду через SMTPPool против нового соединения на каждое письмо.
+
+    pip install aiosmtpd
+    python -m benchmarks.smtp_throughput --messages 500 --starttls
+
+SMTP сервер — локальный aiosmtpd. С --starttls он поднимает TLS на
+самоподписанном сертификате, как у настоящего провайдера, и тогда
+видна основная экономия пула: TLS handshake и AUTH на каждое письмо.
+"""
+import argparse
+import datetime
+import json
+import smtplib
+import socket
+import ssl
+import tempfile
+import time
+import warnings
+from email.mime.text import MIMEText
+from pathlib import Path
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+from benchmarks.common import bench_env, latency_stats, run_info
+
+bench_env()
+
+from app.tasks.smtp_pool import SMTPPool
+
+USER, PASSWORD = "bench", "bench"
+
+warnings.filterwarnings("ignore", message="Session.login_data is deprecated")
+
+
+class CountingHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def authenticator(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=auth_data.login == USER.encode() and auth_data.password == PASSWORD.encode())
+
+
+def self_signed_context(directory: Path) -> ssl.SSLContext:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = directory / "cert.pem", directory / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.TraditionalOpenSSL,
+        serialization.NoEncryption(),
+    ))
+
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert_path, key_path)
+    return context
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_message(i: int) -> MIMEText:
+    msg = MIMEText(f"benchmark message {i}")
+    msg["Subject"] = "benchmark"
+    msg["From"] = "noreply@todolist.com"
+    msg["To"] = f"user{i}@test.com"
+    return msg
+
+
+def run(name: str, pool: SMTPPool, messages: int) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for i in range(messages):
+        call_started = time.perf_counter()
+        pool.send(make_message(i))
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    pool.close()
+    return {"mode": name, **latency_stats(latencies, elapsed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк пула SMTP соединений")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--starttls", action="store_true", help="STARTTLS + AUTH, как у реального SMTP")
+    parser.add_argument("--max-messages", type=int, default=100, help="писем на одно соединение в пуле")
+    args = parser.parse_args()
+
+    handler = CountingHandler()
+    with tempfile.TemporaryDirectory() as tmp:
+        tls_context = self_signed_context(Path(tmp)) if args.starttls else None
+        port = free_port()
+        controller = Controller(
+            handler,
+            hostname="127.0.0.1",
+            port=port,
+            tls_context=tls_context,
+            require_starttls=args.starttls,
+            authenticator=authenticator,
+            auth_require_tls=args.starttls,
+        )
+        controller.start()
+
+        client_context = ssl._create_unverified_context()
+
+        def connect():
+            server = smtplib.SMTP("127.0.0.1", port, timeout=10)
+            if args.starttls:
+                server.starttls(context=client_context)
+            server.login(USER, PASSWORD)
+            return server
+
+        results = [
+            run("connection_per_message", SMTPPool(connect, size=1, max_messages=1), args.messages),
+            run("pooled", SMTPPool(connect, size=1, max_messages=args.max_messages), args.messages),
+        ]
+        controller.stop()
+
+    assert handler.received == 2 * args.messages
+    print(json.dumps({**run_info(), "starttls": args.starttls, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
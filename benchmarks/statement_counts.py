@@ -0,0 +1,107 @@
+# benchmarks/statement_counts.py
+"""
+Сколько SQL запросов и commit делает каждый auth эндпоинт.
+
+    python -m benchmarks.statement_counts
+
+Прогоняет register → confirm → login → refresh → logout-all →
+password reset на in-memory sqlite. Письма остаются в outbox.
+"""
+import asyncio
+import json
+
+from benchmarks.common import bench_env
+
+bench_env()
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config.database import get_async_session
+from app.main import app
+from app.models.email_outbox import EmailOutbox
+
+PASSWORD = "StrongPassword123!"
+
+
+class Counter:
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+
+    def reset(self):
+        self.statements = 0
+        self.commits = 0
+
+
+def make_client(counter: Counter):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    async def create_all():
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+    asyncio.run(create_all())
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: setattr(counter, "statements", counter.statements + 1))
+    event.listen(engine.sync_engine, "commit", lambda *args: setattr(counter, "commits", counter.commits + 1))
+
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = override_session
+    return TestClient(app), session_maker
+
+
+def outbox_token(session_maker, email_type: str) -> str:
+    async def fetch():
+        async with session_maker() as session:
+            stmt = (
+                select(EmailOutbox.token)
+                .where(EmailOutbox.email_type == email_type)
+                .order_by(EmailOutbox.created_at.desc())
+            )
+            return (await session.exec(stmt)).first()
+
+    return asyncio.run(fetch())
+
+
+def main():
+    counter = Counter()
+    client, session_maker = make_client(counter)
+    results = {}
+
+    def call(name, method, url, **kwargs):
+        counter.reset()
+        response = client.request(method, url, **kwargs)
+        assert response.status_code < 400, (name, response.status_code, response.text)
+        results[name] = {"statements": counter.statements, "commits": counter.commits}
+        return response
+
+    email = "counts@test.com"
+    call("register", "POST", "/auth/register", json={"email": email, "password": PASSWORD, "password_confirm": PASSWORD})
+    call("confirm_email", "GET", "/auth/confirm-email", params={"token": outbox_token(session_maker, "confirmation")})
+    pair = call("login", "POST", "/auth/login/json", json={"email": email, "password": PASSWORD}).json()
+    pair = call("refresh", "POST", "/auth/refresh", json={"refresh_token": pair["refresh_token"]}).json()
+    call("logout_all", "POST", "/auth/logout-all", headers={"Authorization": f"Bearer {pair['access_token']}"})
+    call("password_reset_request", "POST", "/auth/password-reset/request", json={"email": email})
+    new_password = "AnotherPassword456!"
+    call("password_reset_confirm", "POST", "/auth/password-reset/confirm", json={
+        "token": outbox_token(session_maker, "password_reset"),
+        "new_password": new_password,
+        "confirm_password": new_password,
+        "email": email,
+    })
+
+    app.dependency_overrides.clear()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/token_cache.py
+"""
+Проверка access токена в get_current_user_id: с кэшем и без.
+
+    python -m benchmarks.token_cache --tokens 1000 --requests 100000
+
+tokens разных токенов, запросы идут по ним по кругу — как клиенты,
+которые шлют свой токен много раз за его жизнь. Для каждого алгоритма
+(HS256, RS256, ES256) — без кэша (ACCESS_TOKEN_CACHE_SIZE=0) и с кэшем;
+ключи RS256 / ES256 создаются во временном каталоге.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+from uuid import uuid4
+
+from benchmarks.common import bench_env, run_info
+
+bench_env()
+
+from app.auth import security
+from app.auth.jwks import SigningKeys, generate
+from app.auth.token_cache import VerifiedTokenCache
+from benchmarks.micro import measure_async
+
+
+def signing_keys(algorithm: str, tmp: Path) -> SigningKeys:
+    if algorithm == "HS256":
+        return SigningKeys(algorithm, secret="bench-secret")
+    generate(tmp / f"{algorithm}.pem", algorithm)
+    return SigningKeys(algorithm, private_key=(tmp / f"{algorithm}.pem").read_text())
+
+
+async def run_case(keys: SigningKeys, cache_size: int, tokens: int, requests: int) -> dict:
+    security.signing_keys = keys
+    security.access_token_cache = VerifiedTokenCache(cache_size)
+    pool = [security.create_access_token(uuid4()) for _ in range(tokens)]
+    position = 0
+
+    async def call():
+        nonlocal position
+        position += 1
+        return await security.get_current_user_id(pool[position % tokens])
+
+    stats = await measure_async(call, requests, warmup=0)
+    stats["cache"] = security.access_token_cache.stats()
+    return stats
+
+
+async def main_async(args) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for algorithm in ("HS256", "RS256", "ES256"):
+            keys = signing_keys(algorithm, Path(tmp))
+            without = await run_case(keys, 0, args.tokens, args.requests)
+            with_cache = await run_case(keys, args.cache_size, args.tokens, args.requests)
+            results[algorithm] = {
+                "no_cache": without,
+                "cache": with_cache,
+                "speedup_p50": round(without["p50_ms"] / with_cache["p50_ms"], 1),
+            }
+    return results
+
+
+def main(args):
+    report = {**run_info(), "tokens": args.tokens, "requests": args.requests, "results": asyncio.run(main_async(args))}
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк кэша проверенных access токенов")
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--cache-size", type=int, default=10_000)
+    parser.add_argument("--output", help="куда сохранить JSON с результатами")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,194 @@
+# benchmarks/token_partitions.py
+"""
+tokens обычной таблицей против партиционированной по expires_at.
+
+    python -m benchmarks.token_partitions --database-url postgresql+asyncpg://... \\
+        --rows 10000000 --lookups 5000 --interval day
+
+В схемах tokens_plain и tokens_partitioned создаётся по таблице tokens с
+одинаковыми данными: expires_at равномерно от -30 до +30 дней.
+
+Сравниваются задержка PostgresTokenStore.get_valid по token_hash, размер
+таблицы с индексами и цена удаления истёкших токенов: cleanup_tokens
+(пачки DELETE) против drop_expired_partitions. Схемы удаляются в конце.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from datetime import timedelta
+
+from benchmarks.common import bench_engine, bench_env, latency_stats, run_info
+
+bench_env()
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth.token_store import PostgresTokenStore
+from app.config.settings import settings
+from app.models.partitions import INTERVALS, create_partitions, drop_expired_partitions
+from app.models.user import utcnow
+from app.tasks.tasks import cleanup_tokens
+
+SCHEMAS = {"plain": "tokens_plain", "partitioned": "tokens_partitioned"}
+
+# как app.models.user.Tokens, но без FK на user — пользователи бенчмарку не нужны
+TABLE = """
+CREATE TABLE tokens (
+    id uuid NOT NULL,
+    user_id uuid NOT NULL,
+    token varchar,
+    token_hash varchar,
+    token_type varchar NOT NULL,
+    expires_at timestamptz NOT NULL,
+    created_at timestamptz NOT NULL,
+    is_used boolean NOT NULL,
+    revoked_at timestamptz,
+    PRIMARY KEY ({pk})
+) {partition_by}
+"""
+
+FILL = """
+INSERT INTO tokens (id, user_id, token_hash, token_type, expires_at, created_at, is_used)
+SELECT gen_random_uuid(), gen_random_uuid(), md5(i::text), 'refresh_token',
+       now() - interval '30 days' + i * interval '60 days' / :rows,
+       now() - interval '30 days', false
+FROM generate_series(:start, :stop - 1) AS i
+"""
+
+
+def sync_engine(url: str, schema: str):
+    engine = create_engine(make_url(url).set(drivername="postgresql+psycopg2"))
+
+    @event.listens_for(engine, "connect")
+    def use_schema(dbapi_conn, record):
+        with dbapi_conn.cursor() as cursor:
+            cursor.execute(f"SET search_path TO {schema}")
+
+    return engine
+
+
+def prepare(url: str, mode: str, rows: int, interval: str) -> float:
+    """Создаёт и заполняет таблицу, возвращает время загрузки"""
+    schema = SCHEMAS[mode]
+    engine = sync_engine(url, schema)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+        if mode == "partitioned":
+            conn.execute(text(TABLE.format(pk="id, expires_at", partition_by="PARTITION BY RANGE (expires_at)")))
+            now = utcnow()
+            # история на 30 дней назад и всё, что нужно вперёд
+            create_partitions(conn, interval, now=now - timedelta(days=31))
+            create_partitions(conn, interval, now=now)
+        else:
+            conn.execute(text(TABLE.format(pk="id", partition_by="")))
+
+    for start in range(0, rows, 1_000_000):
+        with engine.begin() as conn:
+            conn.execute(text(FILL), {"start": start, "stop": min(start + 1_000_000, rows), "rows": rows})
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX ON tokens (token)"))
+        conn.execute(text("CREATE INDEX ON tokens (token_hash)"))
+        conn.execute(text("ANALYZE tokens"))
+    engine.dispose()
+    return time.perf_counter() - started
+
+
+def size_mb(url: str, mode: str) -> float:
+    engine = sync_engine(url, SCHEMAS[mode])
+    with engine.connect() as conn:
+        size = conn.execute(text(
+            # pg_partition_tree пуст для обычной таблицы
+            "SELECT coalesce((SELECT sum(pg_total_relation_size(relid)) FROM pg_partition_tree('tokens')), "
+            "pg_total_relation_size('tokens'))"
+        )).scalar()
+    engine.dispose()
+    return round(int(size) / 2 ** 20, 1)
+
+
+async def lookups(url: str, mode: str, hashes: list[str]) -> dict:
+    engine = bench_engine(url, connect_args={"server_settings": {"search_path": SCHEMAS[mode]}})
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    store = PostgresTokenStore()
+    latencies = []
+    found = 0
+    started = time.perf_counter()
+    async with session_maker() as session:
+        for token_hash in hashes:
+            call_started = time.perf_counter()
+            token = await store.get_valid(session, settings.REFRESH_TOKEN_TYPE, token_hash=token_hash)
+            latencies.append(time.perf_counter() - call_started)
+            found += token is not None
+            await session.rollback()
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return {"found": found, **latency_stats(latencies, elapsed)}
+
+
+def expire(url: str, mode: str) -> dict:
+    """Цена удаления всего, что уже истекло"""
+    engine = sync_engine(url, SCHEMAS[mode])
+    started = time.perf_counter()
+    if mode == "partitioned":
+        with engine.begin() as conn:
+            removed = len(drop_expired_partitions(conn))
+        unit = "partitions"
+    else:
+        with Session(engine) as session:
+            removed = cleanup_tokens(session, pause=0, max_seconds=3600)["deleted"]
+        unit = "rows"
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return {f"removed_{unit}": removed, "seconds": round(elapsed, 2)}
+
+
+def main(args):
+    sample = random.Random(0)
+    # живые токены — вторая половина строк (с запасом на время прогона)
+    live = range(args.rows // 2 + args.rows // 100, args.rows)
+    hashes = [hashlib.md5(str(sample.choice(live)).encode()).hexdigest() for _ in range(args.lookups)]
+
+    results = {}
+    for mode in SCHEMAS:
+        load = prepare(args.database_url, mode, args.rows, args.interval)
+        results[mode] = {
+            "load_seconds": round(load, 1),
+            "size_mb": size_mb(args.database_url, mode),
+            "lookup": asyncio.run(lookups(args.database_url, mode, hashes)),
+            "expire": expire(args.database_url, mode),
+            "size_after_expire_mb": size_mb(args.database_url, mode),
+        }
+        if not args.keep:
+            with sync_engine(args.database_url, "public").begin() as conn:
+                conn.execute(text(f"DROP SCHEMA {SCHEMAS[mode]} CASCADE"))
+
+    print(json.dumps({
+        **run_info(),
+        "rows": args.rows,
+        "lookups": len(hashes),
+        "interval": args.interval,
+        "results": results,
+    }, indent=2))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк партиционирования tokens")
+    parser.add_argument("--database-url", required=True, help="postgresql+asyncpg://...")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--interval", choices=sorted(INTERVALS), default="day")
+    parser.add_argument("--keep", action="store_true", help="не удалять схемы после прогона")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
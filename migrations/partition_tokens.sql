@@ -0,0 +1,37 @@
+-- migrations/partition_tokens.sql
+-- Перевод tokens на партиционирование по expires_at (Postgres).
+--
+-- Ручной шаг, не ревизия alembic: партиционирование включается не везде
+-- (TOKEN_PARTITION_INTERVAL), а ревизии — неизменный снимок схемы.
+-- Запускать после `alembic upgrade head`, в окно обслуживания: tokens
+-- заблокирована до конца транзакции.
+--
+--     psql "$DATABASE_URL" -f migrations/partition_tokens.sql
+--
+-- Затем задать TOKEN_PARTITION_INTERVAL=day|week, перезапустить api и воркеры
+-- и выполнить задачу maintain_token_partitions: она создаёт партиции и
+-- переносит в них строки из tokens_default. Переносятся только живые токены —
+-- истёкшие всё равно удалил бы cleanup_expired_tokens.
+
+BEGIN;
+
+LOCK TABLE tokens IN ACCESS EXCLUSIVE MODE;
+ALTER TABLE tokens RENAME TO tokens_unpartitioned;
+
+CREATE TABLE tokens (LIKE tokens_unpartitioned INCLUDING DEFAULTS)
+    PARTITION BY RANGE (expires_at);
+CREATE TABLE tokens_default PARTITION OF tokens DEFAULT;
+
+INSERT INTO tokens SELECT * FROM tokens_unpartitioned WHERE expires_at > now();
+DROP TABLE tokens_unpartitioned;
+
+-- ключ партиции обязан входить в первичный ключ
+ALTER TABLE tokens ADD CONSTRAINT tokens_pkey PRIMARY KEY (id, expires_at);
+ALTER TABLE tokens ADD CONSTRAINT tokens_user_id_fkey FOREIGN KEY (user_id) REFERENCES "user" (id);
+
+-- индексы 0002; у партиционированной таблицы без CONCURRENTLY
+CREATE INDEX ix_tokens_refresh_live ON tokens (token_hash, expires_at) WHERE revoked_at IS NULL;
+CREATE INDEX ix_tokens_onetime_live ON tokens (token, token_type) WHERE is_used = false;
+CREATE INDEX ix_tokens_user_live ON tokens (user_id) WHERE revoked_at IS NULL;
+
+COMMIT;
@@ -0,0 +1,70 @@
+"""live token indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 11:22:53.971086
+
+Частичные индексы под горячие запросы tokens вместо полных индексов
+по token и token_hash. В Postgres индексы строятся CONCURRENTLY — без
+блокировки записи; у партиционированной таблицы так нельзя, там обычный
+CREATE INDEX.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (имя, колонки, условие Postgres, условие SQLite)
+LIVE_INDEXES = [
+    ('ix_tokens_refresh_live', ['token_hash', 'expires_at'], 'revoked_at IS NULL', 'revoked_at IS NULL'),
+    ('ix_tokens_onetime_live', ['token', 'token_type'], 'is_used = false', 'is_used = 0'),
+    ('ix_tokens_user_live', ['user_id'], 'revoked_at IS NULL', 'revoked_at IS NULL'),
+]
+
+OLD_INDEXES = [
+    ('ix_tokens_token', ['token']),
+    ('ix_tokens_token_hash', ['token_hash']),
+]
+
+
+def _concurrently() -> bool:
+    bind = op.get_bind()
+    return bind.dialect.name == 'postgresql' and not bind.execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('tokens'))"
+    )).scalar()
+
+
+def _create_live_indexes(concurrently: bool) -> None:
+    for name, columns, pg_where, sqlite_where in LIVE_INDEXES:
+        op.create_index(
+            name, 'tokens', columns,
+            postgresql_where=sa.text(pg_where),
+            sqlite_where=sa.text(sqlite_where),
+            postgresql_concurrently=concurrently,
+            if_not_exists=True,
+        )
+
+
+def upgrade() -> None:
+    if _concurrently():
+        # CONCURRENTLY не работает внутри транзакции
+        with op.get_context().autocommit_block():
+            _create_live_indexes(concurrently=True)
+            for name, _ in OLD_INDEXES:
+                op.drop_index(name, table_name='tokens', postgresql_concurrently=True, if_exists=True)
+    else:
+        _create_live_indexes(concurrently=False)
+        for name, _ in OLD_INDEXES:
+            op.drop_index(name, table_name='tokens', if_exists=True)
+
+
+def downgrade() -> None:
+    for name, columns in OLD_INDEXES:
+        op.create_index(name, 'tokens', columns, unique=False)
+    for name, *_ in LIVE_INDEXES:
+        op.drop_index(name, table_name='tokens')
@@ -0,0 +1,75 @@
+"""timestamptz
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:08:04.130000
+
+Даты в user и tokens — timestamp without time zone (так их создавал
+create_all с datetime.utcnow), а приложение пишет aware UTC — asyncpg такие
+параметры для naive колонок не принимает. Значения в naive колонках —
+UTC, поэтому USING ... AT TIME ZONE 'UTC'.
+
+ALTER TYPE переписывает таблицу под ACCESS EXCLUSIVE: на большой tokens
+сначала прогнать очистку (cleanup_expired_tokens). Колонки, которые уже
+timestamptz, пропускаются. SQLite часовых поясов не хранит — там
+миграция ничего не делает.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = [
+    ('user', 'created_at'),
+    ('tokens', 'expires_at'),
+    ('tokens', 'created_at'),
+    ('tokens', 'revoked_at'),
+]
+
+
+def _tokens_partitioned(bind) -> bool:
+    return bind.execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('tokens'))"
+    )).scalar()
+
+
+def _columns(data_type: str) -> list[tuple[str, str]]:
+    bind = op.get_bind()
+    found = []
+    for table, column in COLUMNS:
+        # ключ партиции менять нельзя (tokens после migrations/partition_tokens.sql)
+        if table == 'tokens' and column == 'expires_at' and _tokens_partitioned(bind):
+            continue
+        current = bind.execute(
+            sa.text("SELECT data_type FROM information_schema.columns "
+                    "WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column"),
+            {'table': table, 'column': column},
+        ).scalar()
+        if current == data_type:
+            found.append((table, column))
+    return found
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, column in _columns('timestamp without time zone'):
+        op.execute(
+            f'ALTER TABLE "{table}" ALTER COLUMN {column} '
+            f"TYPE timestamp with time zone USING {column} AT TIME ZONE 'UTC'"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, column in _columns('timestamp with time zone'):
+        op.execute(
+            f'ALTER TABLE "{table}" ALTER COLUMN {column} '
+            f"TYPE timestamp without time zone USING {column} AT TIME ZONE 'UTC'"
+        )
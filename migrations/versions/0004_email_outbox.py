@@ -0,0 +1,43 @@
+"""email outbox
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:13:24.874000
+
+Таблица email_outbox: письма пишутся в неё в транзакции запроса, relay
+ставит их в Celery. В базах, созданных create_all после
+появления outbox, она уже есть — тогда миграция её не трогает.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('email_outbox',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('dedup_key', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('email_type', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('to_email', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('token', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('dedup_key'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_email_outbox_sent_at'), 'email_outbox', ['sent_at'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_email_outbox_sent_at'), table_name='email_outbox')
+    op.drop_table('email_outbox')
@@ -0,0 +1,79 @@
+from unittest.mock import patch
+
+import pytest
+
+
+PASSWORD = "StrongPassword123!"
+
+
+def register_and_login(client, outbox, email="flow@test.com"):
+    response = client.post(
+        "/auth/register",
+        json={"email": email, "password": PASSWORD, "password_confirm": PASSWORD},
+    )
+    assert response.status_code == 200
+
+    _, _, token = outbox()[-1]
+    assert client.get("/auth/confirm-email", params={"token": token}).status_code == 200
+
+    response = client.post("/auth/login/json", json={"email": email, "password": PASSWORD})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_login_requires_confirmed_email(client):
+    client.post(
+        "/auth/register",
+        json={"email": "new@test.com", "password": PASSWORD, "password_confirm": PASSWORD},
+    )
+
+    response = client.post("/auth/login/json", json={"email": "new@test.com", "password": PASSWORD})
+
+    assert response.status_code == 400
+
+
+def test_refresh_rotates_token(client, outbox):
+    pair = register_and_login(client, outbox)
+
+    response = client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]})
+    assert response.status_code == 200
+    assert response.json()["refresh_token"] != pair["refresh_token"]
+
+    # старый refresh токен уже отозван
+    response = client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_logout_all_revokes_refresh_tokens(client, outbox):
+    pair = register_and_login(client, outbox)
+
+    response = client.post(
+        "/auth/logout-all",
+        headers={"Authorization": f"Bearer {pair['access_token']}"},
+    )
+    assert response.status_code == 200
+
+    response = client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_register_is_atomic(client):
+    payload = {"email": "atomic@test.com", "password": PASSWORD, "password_confirm": PASSWORD}
+
+    with patch("app.auth.repository.AuthRepository.create_token", side_effect=RuntimeError("boom")):
+        with pytest.raises(RuntimeError):
+            client.post("/auth/register", json=payload)
+
+    # пользователь без токена не остался — можно зарегистрироваться заново
+    assert client.post("/auth/register", json=payload).status_code == 200
+
+
+def test_register_writes_confirmation_to_outbox(client, outbox):
+    client.post(
+        "/auth/register",
+        json={"email": "mail@test.com", "password": PASSWORD, "password_confirm": PASSWORD},
+    )
+
+    [(email_type, to_email, token)] = outbox()
+    assert (email_type, to_email) == ("confirmation", "mail@test.com")
+    assert token
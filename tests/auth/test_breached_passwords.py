@@ -0,0 +1,59 @@
+import hashlib
+
+import pytest
+
+from app.auth import breached
+from app.auth.breached import BreachedPasswords, build, filter_params
+from app.auth.exceptions import ValidationError
+from app.auth.validators import validate_password
+
+LEAKED = [f"Leaked-Password{i}" for i in range(2000)] + ["CorrectHorse1!Battery"]
+
+
+@pytest.fixture
+def bloom_file(tmp_path):
+    source = tmp_path / "passwords.txt"
+    source.write_text("\n".join(LEAKED) + "\n")
+    target = tmp_path / "breached.bloom"
+    build(source, target, fp_rate=0.01)
+    return target
+
+
+def test_filter_finds_every_leaked_password(bloom_file):
+    bloom = BreachedPasswords(bloom_file)
+
+    assert all(password in bloom for password in LEAKED)
+    assert bloom.count == len(LEAKED)
+
+
+def test_false_positive_rate_is_close_to_configured(bloom_file):
+    bloom = BreachedPasswords(bloom_file)
+
+    false_positives = sum(f"Unique-Password{i}" in bloom for i in range(20000))
+
+    assert false_positives / 20000 < 0.02
+
+
+def test_sha1_dump_builds_the_same_filter(tmp_path, bloom_file):
+    source = tmp_path / "pwned.txt"
+    source.write_text("".join(
+        f"{hashlib.sha1(p.encode()).hexdigest().upper()}:{i}\n" for i, p in enumerate(LEAKED)
+    ))
+    build(source, tmp_path / "sha1.bloom", fp_rate=0.01, fmt="sha1")
+
+    assert (tmp_path / "sha1.bloom").read_bytes() == bloom_file.read_bytes()
+
+
+def test_lower_fp_rate_means_bigger_filter():
+    assert filter_params(1000, 0.001)[0] > filter_params(1000, 0.01)[0]
+
+
+def test_validator_rejects_breached_password(bloom_file, monkeypatch):
+    monkeypatch.setattr(breached, "_filter", BreachedPasswords(bloom_file))
+    monkeypatch.setattr(breached, "_loaded", True)
+
+    with pytest.raises(ValidationError) as exc:
+        validate_password("CorrectHorse1!Battery", "user@test.com")
+    assert exc.value.code == "PASSWORD_BREACHED"
+
+    validate_password("Unbreached1!Secret", "user@test.com")
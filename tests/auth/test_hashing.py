@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app.auth.exceptions import ServiceOverloaded
+from app.auth.hashing import PasswordHasher
+
+
+@pytest.mark.anyio
+async def test_full_queue_is_rejected_fast():
+    hasher = PasswordHasher(workers=1, queue_size=1, retry_after=3)
+    release = threading.Event()
+
+    with patch("app.auth.hashing.hash_password", side_effect=lambda p: release.wait() and p):
+        running = [asyncio.create_task(hasher.hash("a")), asyncio.create_task(hasher.hash("b"))]
+        await asyncio.sleep(0.05)
+
+        assert hasher.stats()["queue_depth"] == 1
+
+        with pytest.raises(ServiceOverloaded) as exc:
+            await hasher.hash("c")
+        assert exc.value.retry_after == 3
+
+        release.set()
+        assert await asyncio.gather(*running) == ["a", "b"]
+
+    stats = hasher.stats()
+    assert stats["completed"] == 2
+    assert stats["rejected"] == 1
+    assert stats["queue_depth"] == 0
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_cancelled_request_keeps_slot_until_hash_finishes():
+    hasher = PasswordHasher(workers=1, queue_size=0, retry_after=1)
+    release = threading.Event()
+
+    with patch("app.auth.hashing.hash_password", side_effect=lambda p: release.wait() and p):
+        try:
+            request = asyncio.create_task(hasher.hash("a"))
+            await asyncio.sleep(0.05)
+            request.cancel()  # клиент отключился, argon2 в пуле продолжает работать
+            await asyncio.sleep(0)
+
+            with pytest.raises(ServiceOverloaded):
+                await asyncio.wait_for(hasher.hash("b"), 1)
+        finally:
+            release.set()
+
+        for _ in range(100):
+            if hasher.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert await hasher.hash("c") == "c"
+
+    hasher.shutdown()
+
+
+def test_overloaded_hasher_returns_503(client):
+    with patch(
+        "app.auth.service.password_hasher.verify",
+        side_effect=ServiceOverloaded(retry_after=2),
+    ):
+        client.post(
+            "/auth/register",
+            json={"email": "busy@test.com", "password": "StrongPassword123!", "password_confirm": "StrongPassword123!"},
+        )
+        response = client.post("/auth/login/json", json={"email": "busy@test.com", "password": "StrongPassword123!"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import httpx
+import pytest
+from jose import jwt
+from jose.exceptions import JWTError
+
+import app.main
+from app.auth import security
+from app.auth.jwks import JWKSVerifier, SigningKeys, generate
+
+
+@pytest.fixture(scope="module")
+def pems(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("keys")
+    paths = [directory / "old.pem", directory / "new.pem", directory / "ec.pem", directory / "next.pem"]
+    generate(paths[0])
+    generate(paths[1])
+    generate(paths[2], "ES256")
+    generate(paths[3])
+    return [path.read_text() for path in paths]
+
+
+@pytest.fixture
+def rs_keys(pems, monkeypatch):
+    keys = SigningKeys("RS256", private_key=pems[1], public_keys=(pems[0],))
+    monkeypatch.setattr(app.main, "signing_keys", keys)
+    monkeypatch.setattr(security, "signing_keys", keys)
+    return keys
+
+
+def claims() -> dict:
+    return {"sub": str(uuid4()), "exp": datetime.now(timezone.utc) + timedelta(minutes=5)}
+
+
+def test_token_carries_kid_and_verifies(rs_keys):
+    payload = claims()
+    token = rs_keys.encode(payload)
+
+    assert jwt.get_unverified_header(token) == {"alg": "RS256", "typ": "JWT", "kid": rs_keys.kid}
+    assert rs_keys.decode(token)["sub"] == payload["sub"]
+
+
+def test_tokens_of_previous_key_are_accepted(pems, rs_keys):
+    old = SigningKeys("RS256", private_key=pems[0])
+
+    assert rs_keys.decode(old.encode(claims()))
+    assert old.kid != rs_keys.kid
+
+
+def test_unknown_key_and_algorithm_confusion_are_rejected(pems, rs_keys):
+    stranger = SigningKeys("ES256", private_key=pems[2])
+    with pytest.raises(JWTError):
+        rs_keys.decode(stranger.encode(claims()))
+
+    # HS256 токен с kid текущего ключа и публичным ключом как секретом
+    forged = jwt.encode(claims(), rs_keys.jwks_body.decode(), algorithm="HS256", headers={"kid": rs_keys.kid})
+    with pytest.raises(JWTError):
+        rs_keys.decode(forged)
+
+
+def test_es256_keys(pems):
+    keys = SigningKeys("ES256", private_key=pems[2])
+
+    assert keys.jwks()["keys"][0]["kty"] == "EC"
+    assert keys.decode(keys.encode(claims()))
+
+
+def test_jwks_endpoint_is_cacheable(client, rs_keys):
+    response = client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert [key["kid"] for key in response.json()["keys"]] == list(rs_keys._verify_keys)
+    assert all("d" not in key for key in response.json()["keys"])  # только публичные части
+    assert "max-age" in response.headers["cache-control"]
+
+    etag = response.headers["etag"]
+    assert client.get("/.well-known/jwks.json", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_jwks_endpoint_without_asymmetric_keys(client):
+    assert client.get("/.well-known/jwks.json").status_code == 404
+
+
+def test_access_token_dependency_uses_signing_keys(client, outbox, rs_keys):
+    password = "StrongPassword123!"
+    client.post("/auth/register", json={"email": "rs@test.com", "password": password, "password_confirm": password})
+    _, _, token = outbox()[-1]
+    client.get("/auth/confirm-email", params={"token": token})
+    pair = client.post("/auth/login/json", json={"email": "rs@test.com", "password": password}).json()
+
+    assert jwt.get_unverified_header(pair["access_token"])["kid"] == rs_keys.kid
+    response = client.post("/auth/logout-all", headers={"Authorization": f"Bearer {pair['access_token']}"})
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_verifier_caches_keys_and_refreshes_on_rotation(pems, rs_keys, monkeypatch):
+    requests = []
+
+    async def count(request):
+        requests.append(request.url.path)
+
+    transport = httpx.ASGITransport(app=app.main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://auth", event_hooks={"request": [count]}) as client:
+        verifier = JWKSVerifier("http://auth/.well-known/jwks.json", client=client, min_refresh_interval=0)
+
+        for _ in range(3):
+            assert await verifier.verify(rs_keys.encode(claims()))
+        assert len(requests) == 1
+
+        # ротация: новый ключ подписи, о котором verifier ещё не знает
+        rotated = SigningKeys("RS256", private_key=pems[3], public_keys=(pems[1],))
+        monkeypatch.setattr(app.main, "signing_keys", rotated)
+        assert await verifier.verify(rotated.encode(claims()))
+        assert len(requests) == 2
+
+        # неизвестный kid не чаще min_refresh_interval
+        verifier.min_refresh_interval = 60
+        token = jwt.encode(claims(), pems[1], algorithm="RS256", headers={"kid": "unknown"})
+        for _ in range(3):
+            with pytest.raises(JWTError):
+                await verifier.verify(token)
+        assert len(requests) == 2
@@ -0,0 +1,69 @@
+import pytest
+
+from app.auth.exceptions import PasswordPolicyError
+from app.auth.validators import PasswordPolicy, password_policy, validate_password
+
+
+def codes(password, email="john.smith@example.com", policy=password_policy):
+    return [v.code for v in policy.violations(password, email)]
+
+
+def test_valid_password_has_no_violations():
+    assert codes("StrongPassword123!") == []
+    validate_password("StrongPassword123!", "john.smith@example.com")
+
+
+def test_all_violations_are_reported_at_once():
+    assert codes("smith#") == [
+        "PASSWORD_LENGTH",
+        "PASSWORD_FORBIDDEN_CHARS",
+        "PASSWORD_UPPERCASE",
+        "PASSWORD_DIGIT",
+        "PASSWORD_SPECIAL",
+        "PASSWORD_CONTAINS_EMAIL_PART",
+    ]
+
+
+def test_empty_password_is_only_required():
+    assert codes("") == ["PASSWORD_REQUIRED"]
+
+
+def test_email_domain_in_password():
+    assert codes("Example-Password123") == ["PASSWORD_CONTAINS_EMAIL_DOMAIN"]
+
+
+def test_error_keeps_first_violation_and_lists_all():
+    with pytest.raises(PasswordPolicyError) as exc:
+        validate_password("short", "user@test.com")
+
+    assert exc.value.code == "PASSWORD_LENGTH"
+    assert exc.value.field == "password"
+    assert [v.code for v in exc.value.violations][:2] == ["PASSWORD_LENGTH", "PASSWORD_UPPERCASE"]
+
+
+def test_policy_from_custom_rules():
+    policy = PasswordPolicy(4, 8, {"digit": r"\d", "cyrillic": r"[а-яё]"}, r"\s")
+
+    assert codes("abcd", policy=policy) == ["PASSWORD_DIGIT", "PASSWORD_CYRILLIC"]
+    assert codes("пароль 12", policy=policy) == ["PASSWORD_LENGTH", "PASSWORD_FORBIDDEN_CHARS"]
+
+
+@pytest.mark.parametrize("pattern", [r"[A-Z]{2}", r"\d.*\d", r"(?=.*[A-Z])"])
+def test_required_pattern_must_match_one_character(pattern):
+    # с посимвольной проверкой такое правило не выполнил бы ни один пароль
+    with pytest.raises(ValueError, match="single character"):
+        PasswordPolicy(4, 8, {"upper": pattern}, r"\s")
+
+
+def test_register_returns_every_violation(client):
+    response = client.post(
+        "/auth/register",
+        json={"email": "policy@test.com", "password": "weak", "password_confirm": "weak"},
+    )
+
+    assert response.status_code == 400
+    detail = response.json()["detail"]
+    assert detail["code"] == "PASSWORD_LENGTH"
+    assert {v["code"] for v in detail["violations"]} == {
+        "PASSWORD_LENGTH", "PASSWORD_UPPERCASE", "PASSWORD_DIGIT", "PASSWORD_SPECIAL",
+    }
@@ -0,0 +1,161 @@
+import time
+
+import pytest
+
+from app.auth import rate_limit
+from app.auth.exceptions import RateLimited
+from app.auth.hashing import password_hasher
+from app.auth.rate_limit import MemoryRateLimitBackend, RateLimiter, RedisRateLimitBackend, get_rate_limiter
+from app.config.settings import settings
+from tests.auth.test_auth_flow import PASSWORD, register_and_login
+
+LIMITS = {
+    "login": {"ip": "100/60", "email": "100/60"},
+    "register": {"ip": "100/3600", "email": "2/3600"},
+    "password_reset": {"ip": "3/3600", "email": "100/3600"},
+}
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        return MemoryRateLimitBackend()
+
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return RedisRateLimitBackend(fakeredis.FakeAsyncRedis(decode_responses=True))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Сдвиг часов для обоих бэкендов: memory — monotonic, redis — time"""
+    offset = [0.0]
+    monotonic, wall = time.monotonic, time.time
+    monkeypatch.setattr(time, "monotonic", lambda: monotonic() + offset[0])
+    monkeypatch.setattr(time, "time", lambda: wall() + offset[0])
+    return offset
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RateLimiter(MemoryRateLimitBackend(), LIMITS, lockout_threshold=3, lockout_base=30, lockout_max=60)
+    monkeypatch.setattr(rate_limit, "_rate_limiter", limiter)
+    return limiter
+
+
+@pytest.mark.anyio
+async def test_sliding_window(backend, clock):
+    limiter = RateLimiter(backend, {"login": {"ip": "2/10"}}, 3, 30, 60)
+
+    await limiter.check("login", "1.1.1.1")
+    clock[0] = 5
+    await limiter.check("login", "1.1.1.1")
+    with pytest.raises(RateLimited) as exc:
+        await limiter.check("login", "1.1.1.1")
+    assert exc.value.retry_after == 5  # первая попытка выйдет из окна через 5 секунд
+
+    await limiter.check("login", "2.2.2.2")  # другой IP — своё окно
+
+    # окно скользит: на 11-й секунде в нём только вторая попытка
+    clock[0] = 11
+    await limiter.check("login", "1.1.1.1")
+    with pytest.raises(RateLimited):
+        await limiter.check("login", "1.1.1.1")
+
+
+@pytest.mark.anyio
+async def test_lockout_doubles_and_resets_on_success(backend, clock):
+    limiter = RateLimiter(backend, {}, lockout_threshold=2, lockout_base=10, lockout_max=25)
+
+    await limiter.failed("login", "1.1.1.1", "a@test.com")
+    await limiter.check("login", "1.1.1.1", "a@test.com", lockout=True)
+
+    await limiter.failed("login", "1.1.1.1", "a@test.com")
+    with pytest.raises(RateLimited) as exc:
+        await limiter.check("login", "1.1.1.1", "A@test.com ", lockout=True)
+    assert exc.value.retry_after == 10
+    # блокируется пара email + IP, а не весь адрес
+    await limiter.check("login", "2.2.2.2", "a@test.com", lockout=True)
+
+    await limiter.failed("login", "1.1.1.1", "a@test.com")
+    with pytest.raises(RateLimited) as exc:
+        await limiter.check("login", "1.1.1.1", "a@test.com", lockout=True)
+    assert exc.value.retry_after == 20
+
+    await limiter.failed("login", "1.1.1.1", "a@test.com")
+    with pytest.raises(RateLimited) as exc:
+        await limiter.check("login", "1.1.1.1", "a@test.com", lockout=True)
+    assert exc.value.retry_after == 25  # не больше lockout_max
+
+    await limiter.succeeded("login", "1.1.1.1", "a@test.com")
+    await limiter.check("login", "1.1.1.1", "a@test.com", lockout=True)
+
+
+def test_login_lockout_skips_argon2(client, outbox, limiter, monkeypatch):
+    register_and_login(client, outbox)
+    for _ in range(3):
+        response = client.post("/auth/login/json", json={"email": "flow@test.com", "password": "Wrong123456!"})
+        assert response.status_code == 400
+
+    verified = []
+    monkeypatch.setattr(password_hasher, "verify", lambda *args: verified.append(args))
+    # даже верный пароль: блокировка проверяется до хэширования
+    response = client.post("/auth/login", data={"username": "flow@test.com", "password": PASSWORD})
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "30"
+    assert verified == []
+
+
+def test_register_and_reset_are_rejected_before_db(client, limiter, statement_budget):
+    body = {"email": "limited@test.com", "password": PASSWORD, "password_confirm": PASSWORD}
+    for _ in range(2):
+        client.post("/auth/register", json=body)
+
+    with statement_budget(0):
+        assert client.post("/auth/register", json=body).status_code == 429
+
+    for index in range(3):
+        client.post("/auth/password-reset/request", json={"email": f"user{index}@test.com"})
+    with statement_budget(0):
+        response = client.post("/auth/password-reset/request", json={"email": "other@test.com"})
+    assert response.status_code == 429
+
+
+@pytest.mark.anyio
+async def test_disabled_limiter_and_store_errors():
+    disabled = RateLimiter(MemoryRateLimitBackend(), {"login": {"ip": "0/60"}}, 1, 30, 60, enabled=False)
+    await disabled.check("login", "1.1.1.1")
+
+    class Broken(MemoryRateLimitBackend):
+        async def acquire(self, lock, windows):
+            raise ConnectionError("redis down")
+
+    # хранилище недоступно — вход не падает
+    await RateLimiter(Broken(), {"login": {"ip": "1/60"}}, 1, 30, 60).check("login", "1.1.1.1")
+
+
+@pytest.mark.anyio
+async def test_redis_attempts_in_same_millisecond_are_all_counted(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(time, "time", lambda: 1_000_000.0)
+    # два процесса, одна миллисекунда
+    first, second = RedisRateLimitBackend(redis), RedisRateLimitBackend(redis)
+
+    window = [("ratelimit:login:ip:1.1.1.1", 3, 60.0)]
+    for backend in (first, second, first):
+        assert await backend.acquire(None, window) == 0
+    assert await second.acquire(None, window) > 0
+    assert await redis.zcard("ratelimit:login:ip:1.1.1.1") == 3
+
+
+def test_redis_backend_uses_client_with_timeouts(monkeypatch):
+    pytest.importorskip("redis")
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "redis")
+    monkeypatch.setattr(rate_limit, "_rate_limiter", None)
+
+    kwargs = get_rate_limiter().backend.redis.connection_pool.connection_kwargs
+    assert kwargs["socket_connect_timeout"] == settings.REDIS_CONNECT_TIMEOUT_SECONDS
+    assert kwargs["socket_timeout"] == settings.REDIS_SOCKET_TIMEOUT_SECONDS
@@ -0,0 +1,66 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth.token_store import PostgresTokenStore
+from app.config.settings import settings
+from app.models.user import Tokens, User
+
+
+# Postgres проверяется, только если задан TEST_POSTGRES_URL (postgresql+asyncpg://...)
+DATABASES = ["sqlite"] + (["postgres"] if os.getenv("TEST_POSTGRES_URL") else [])
+
+
+@pytest.fixture(params=DATABASES)
+async def rotation_engine(request, tmp_path):
+    if request.param == "postgres":
+        url = os.environ["TEST_POSTGRES_URL"]
+    else:
+        # файл, а не :memory: — нужны настоящие параллельные соединения
+        url = f"sqlite+aiosqlite:///{tmp_path / 'rotation.db'}"
+
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_concurrent_refresh_of_same_token_succeeds_once(rotation_engine):
+    store = PostgresTokenStore()
+    session_maker = async_sessionmaker(rotation_engine, class_=AsyncSession, expire_on_commit=False)
+    user_id = uuid4()
+    expires = datetime.now(timezone.utc) + timedelta(days=1)
+
+    async with session_maker() as session:
+        session.add(User(id=user_id, email="rotation@test.com", password_hash="x"))
+        await session.commit()
+        await store.save(session, Tokens(
+            user_id=user_id,
+            token_type=settings.REFRESH_TOKEN_TYPE,
+            token_hash="old",
+            expires_at=expires,
+        ))
+        await session.commit()
+
+    async def rotate(i):
+        async with session_maker() as session:
+            user_id = await store.rotate(session, "old", f"new-{i}", expires)
+            await session.commit()
+            return user_id
+
+    results = await asyncio.gather(*(rotate(i) for i in range(10)))
+
+    assert [r for r in results if r is not None] == [user_id]
+
+    async with session_maker() as session:
+        hashes = (await session.exec(select(Tokens.token_hash).where(Tokens.revoked_at.is_(None)))).all()
+    assert len(hashes) == 1 and hashes[0].startswith("new-")
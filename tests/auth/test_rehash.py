@@ -0,0 +1,49 @@
+import asyncio
+
+from passlib.context import CryptContext
+from sqlmodel import select
+
+from app.auth.calibrate import write_env
+from app.auth.security import password_needs_rehash
+from app.models.user import User
+
+
+PASSWORD = "StrongPassword123!"
+
+
+def test_login_rehashes_outdated_hash(client, session_maker):
+    old_context = CryptContext(schemes=["argon2"], argon2__time_cost=1, argon2__memory_cost=8192, argon2__parallelism=1)
+    old_hash = old_context.hash(PASSWORD)
+    assert password_needs_rehash(old_hash)
+
+    async def create_user():
+        async with session_maker() as session:
+            session.add(User(email="old@test.com", password_hash=old_hash, is_active=True))
+            await session.commit()
+
+    async def stored_hash():
+        async with session_maker() as session:
+            return (await session.exec(select(User.password_hash))).one()
+
+    asyncio.run(create_user())
+
+    response = client.post("/auth/login/json", json={"email": "old@test.com", "password": PASSWORD})
+    assert response.status_code == 200
+
+    new_hash = asyncio.run(stored_hash())
+    assert new_hash != old_hash
+    assert not password_needs_rehash(new_hash)
+
+
+def test_write_env_updates_only_argon2_keys(tmp_path):
+    env = tmp_path / ".env"
+    env.write_text("JWT_SECRET=abc\nARGON2_TIME_COST=3\n", encoding="utf-8")
+
+    write_env({"time_cost": 5, "memory_cost": 32768, "parallelism": 2}, path=env)
+
+    assert env.read_text(encoding="utf-8").splitlines() == [
+        "JWT_SECRET=abc",
+        "ARGON2_TIME_COST=5",
+        "ARGON2_MEMORY_COST=32768",
+        "ARGON2_PARALLELISM=2",
+    ]
@@ -0,0 +1,78 @@
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.auth import security
+from app.auth.token_cache import VerifiedTokenCache
+
+
+def claims(seconds: int = 300) -> dict:
+    return {"sub": str(uuid4()), "exp": int(time.time()) + seconds}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = VerifiedTokenCache(max_size=100)
+    monkeypatch.setattr(security, "access_token_cache", cache)
+    return cache
+
+
+@pytest.mark.anyio
+async def test_token_is_verified_once(cache, monkeypatch):
+    user_id = uuid4()
+    token = security.create_access_token(user_id)
+    decoded = []
+    decode = security.signing_keys.decode
+    monkeypatch.setattr(security.signing_keys, "decode", lambda t: decoded.append(t) or decode(t))
+
+    for _ in range(5):
+        assert await security.get_current_user_id(token) == user_id
+
+    assert len(decoded) == 1
+    assert cache.stats()["hits"] == 4
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.anyio
+async def test_invalid_token_is_not_cached(cache):
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            await security.get_current_user_id("not-a-jwt")
+
+    assert cache.stats()["size"] == 0
+
+
+def test_expired_entry_is_dropped(cache, monkeypatch):
+    cache.put("token", claims(seconds=60))
+    assert cache.get("token")
+
+    monkeypatch.setattr(time, "time", lambda: datetime.now(timezone.utc).timestamp() + 61)
+
+    assert cache.get("token") is None
+    assert cache.stats()["expired"] == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_is_evicted():
+    cache = VerifiedTokenCache(max_size=2)
+    cache.put("a", claims())
+    cache.put("b", claims())
+    cache.get("a")
+    cache.put("c", claims())
+
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert cache.stats()["evicted"] == 1
+
+
+def test_disabled_cache_and_tokens_without_exp():
+    disabled = VerifiedTokenCache(max_size=0)
+    disabled.put("a", claims())
+    assert disabled.get("a") is None
+
+    cache = VerifiedTokenCache(max_size=10)
+    cache.put("no-exp", {"sub": "x"})
+    assert cache.stats()["size"] == 0
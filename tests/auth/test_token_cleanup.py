@@ -0,0 +1,75 @@
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.config.settings import settings
+from app.models.email_outbox import EmailOutbox
+from app.models.user import Tokens, User, utcnow
+from app.tasks.tasks import cleanup_outbox, cleanup_tokens
+
+
+@pytest.fixture
+def sync_session():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def add_tokens(session, count, expires_in=timedelta(days=1), **fields):
+    user = User(email=f"{uuid4()}@test.com", password_hash="x")
+    session.add(user)
+    for _ in range(count):
+        session.add(Tokens(
+            user_id=user.id,
+            token_type="refresh_token",
+            expires_at=utcnow() + expires_in,
+            **fields,
+        ))
+    session.commit()
+
+
+def test_cleanup_removes_only_dead_tokens_in_batches(sync_session):
+    add_tokens(sync_session, 3)
+    add_tokens(sync_session, 4, expires_in=timedelta(minutes=-1))
+    add_tokens(sync_session, 3, revoked_at=utcnow())
+    add_tokens(sync_session, 2, is_used=True)
+
+    stats = cleanup_tokens(sync_session, batch_size=5, pause=0)
+
+    assert stats["deleted"] == 9
+    assert stats["batches"] == 2
+    assert stats["complete"]
+    assert len(sync_session.exec(select(Tokens)).all()) == 3
+
+
+def test_cleanup_stops_when_time_budget_is_spent(sync_session):
+    add_tokens(sync_session, 6, is_used=True)
+
+    stats = cleanup_tokens(sync_session, batch_size=2, pause=0, max_seconds=1e-9)
+
+    assert stats == {"deleted": 2, "batches": 1, "seconds": stats["seconds"], "complete": False}
+
+
+def test_outbox_cleanup_purges_old_sent_and_abandoned_rows(sync_session):
+    old = utcnow() - timedelta(hours=settings.OUTBOX_RETENTION_HOURS + 1)
+    rows = {
+        "sent-old": dict(created_at=old, sent_at=old),
+        "sent-recent": dict(sent_at=utcnow()),
+        "pending": dict(created_at=old, attempts=1),
+        "abandoned-old": dict(created_at=old, attempts=settings.OUTBOX_MAX_ATTEMPTS),
+        "abandoned-recent": dict(attempts=settings.OUTBOX_MAX_ATTEMPTS),
+    }
+    for key, fields in rows.items():
+        sync_session.add(EmailOutbox(dedup_key=key, email_type="confirmation", to_email="a@test.com",
+                                     token=key, **fields))
+    sync_session.commit()
+
+    stats = cleanup_outbox(sync_session, batch_size=10, pause=0)
+
+    assert stats["deleted"] == 2
+    left = {row.dedup_key for row in sync_session.exec(select(EmailOutbox)).all()}
+    assert left == {"sent-recent", "pending", "abandoned-recent"}
@@ -0,0 +1,109 @@
+import time
+from uuid import uuid4
+
+import pytest
+
+from app.auth import token_epochs
+from app.auth.token_epochs import MemoryEpochStore, RedisEpochStore, TokenEpochs, get_token_epochs
+from app.config.settings import settings
+from tests.auth.test_auth_flow import PASSWORD, register_and_login
+
+
+@pytest.fixture
+def epochs(monkeypatch):
+    epochs = TokenEpochs(MemoryEpochStore(), ttl=5.0, max_size=100)
+    monkeypatch.setattr(token_epochs, "_token_epochs", epochs)
+    return epochs
+
+
+def bearer(pair: dict) -> dict:
+    return {"Authorization": f"Bearer {pair['access_token']}"}
+
+
+def test_logout_all_revokes_access_tokens_immediately(client, outbox, epochs):
+    first = register_and_login(client, outbox)
+    second = client.post("/auth/login/json", json={"email": "flow@test.com", "password": PASSWORD}).json()
+
+    assert client.post("/auth/logout-all", headers=bearer(first)).status_code == 200
+
+    # оба токена ещё не истекли, но выданы в прошлой эпохе
+    response = client.post("/auth/logout-all", headers=bearer(second))
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Токен отозван"
+
+    fresh = client.post("/auth/login/json", json={"email": "flow@test.com", "password": PASSWORD}).json()
+    assert client.post("/auth/logout-all", headers=bearer(fresh)).status_code == 200
+
+
+def test_password_reset_revokes_access_and_refresh_tokens(client, outbox, epochs):
+    pair = register_and_login(client, outbox, email="reset@test.com")
+    client.post("/auth/password-reset/request", json={"email": "reset@test.com"})
+    _, _, token = outbox()[-1]
+
+    new_password = "AnotherPassword456!"
+    response = client.post("/auth/password-reset/confirm", json={
+        "token": token, "new_password": new_password, "confirm_password": new_password, "email": "reset@test.com",
+    })
+    assert response.status_code == 200
+
+    assert client.post("/auth/logout-all", headers=bearer(pair)).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]}).status_code == 401
+
+
+@pytest.mark.anyio
+async def test_other_processes_see_bump_after_ttl(monkeypatch):
+    store = MemoryEpochStore()
+    here, there = TokenEpochs(store, ttl=5.0, max_size=100), TokenEpochs(store, ttl=5.0, max_size=100)
+    user_id = uuid4()
+    assert await there.current(user_id) == 0
+
+    assert await here.bump(user_id) == 1
+    assert await here.current(user_id) == 1
+    assert await there.current(user_id) == 0  # до ttl — из кэша
+    # выдача токена идёт мимо кэша: новый токен не окажется в прошлой эпохе
+    assert await there.fresh(user_id) == 1
+
+    other = uuid4()
+    await there.current(other)
+    await here.bump(other)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert await there.current(other) == 1
+    assert there.stats()["hits"] == 1
+
+
+@pytest.mark.anyio
+async def test_store_errors_do_not_fail_requests():
+    class Broken(MemoryEpochStore):
+        async def get(self, user_id):
+            raise ConnectionError("redis down")
+
+    epochs = TokenEpochs(Broken(), ttl=0.0, max_size=100)
+    user_id = uuid4()
+    await epochs.bump(user_id)
+
+    assert await epochs.current(user_id) == 1  # последняя известная эпоха
+    assert await epochs.current(uuid4()) == 0
+    assert epochs.stats()["errors"] == 2
+
+
+@pytest.mark.anyio
+async def test_redis_store():
+    fakeredis = pytest.importorskip("fakeredis")
+    store = RedisEpochStore(fakeredis.FakeAsyncRedis(decode_responses=True))
+    user_id = uuid4()
+
+    assert await store.get(user_id) == 0
+    assert await store.bump(user_id) == 1
+    assert await store.bump(user_id) == 2
+    assert await store.get(user_id) == 2
+
+
+def test_redis_backend_uses_client_with_timeouts(monkeypatch):
+    pytest.importorskip("redis")
+    monkeypatch.setattr(settings, "TOKEN_EPOCH_BACKEND", "redis")
+    monkeypatch.setattr(token_epochs, "_token_epochs", None)
+
+    kwargs = get_token_epochs().store.redis.connection_pool.connection_kwargs
+    assert kwargs["socket_connect_timeout"] == settings.REDIS_CONNECT_TIMEOUT_SECONDS
+    assert kwargs["socket_timeout"] == settings.REDIS_SOCKET_TIMEOUT_SECONDS
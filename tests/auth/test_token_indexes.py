@@ -0,0 +1,123 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event, insert, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth.token_store import PostgresTokenStore
+from app.config.settings import settings
+from app.models.user import Tokens, User
+
+# Postgres проверяется, только если задан TEST_POSTGRES_URL (postgresql+asyncpg://...)
+DATABASES = ["sqlite"] + (["postgres"] if os.getenv("TEST_POSTGRES_URL") else [])
+
+USERS = 200
+TOKENS_PER_USER = 100
+
+
+@pytest.fixture(params=DATABASES)
+async def seeded_engine(request, tmp_path):
+    if request.param == "postgres":
+        admin = create_async_engine(os.environ["TEST_POSTGRES_URL"])
+        async with admin.begin() as conn:
+            await conn.execute(text("DROP SCHEMA IF EXISTS index_test CASCADE"))
+            await conn.execute(text("CREATE SCHEMA index_test"))
+        engine = create_async_engine(
+            os.environ["TEST_POSTGRES_URL"],
+            connect_args={"server_settings": {"search_path": "index_test"}},
+        )
+    else:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'indexes.db'}")
+
+    # большая часть строк мёртвые: отозванные, использованные, истёкшие —
+    # как в таблице между запусками очистки
+    now = datetime.now(timezone.utc)
+    users = [{"id": uuid4(), "email": f"{i}@test.com", "password_hash": "x",
+              "is_active": True, "created_at": now} for i in range(USERS)]
+    tokens = []
+    for user in users:
+        for i in range(TOKENS_PER_USER):
+            refresh = i % 2 == 0
+            tokens.append({
+                "id": uuid4(),
+                "user_id": user["id"],
+                "token": None if refresh else uuid4().hex,
+                "token_hash": uuid4().hex if refresh else None,
+                "token_type": settings.REFRESH_TOKEN_TYPE if refresh else settings.EMAIL_CONFIRM_TOKEN_TYPE,
+                "expires_at": now + timedelta(days=1 if i % 10 < 2 else -1),
+                "created_at": now,
+                "is_used": not refresh and i % 10 != 1,
+                "revoked_at": now if refresh and i % 10 != 0 else None,
+            })
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.execute(insert(User.__table__), users)
+        await conn.execute(insert(Tokens.__table__), tokens)
+        await conn.execute(text("ANALYZE"))
+
+    yield engine, users, tokens
+    await engine.dispose()
+    if request.param == "postgres":
+        async with admin.begin() as conn:
+            await conn.execute(text("DROP SCHEMA index_test CASCADE"))
+        await admin.dispose()
+
+
+def seq_scans(dialect: str, plan_rows) -> list[str]:
+    if dialect == "sqlite":
+        # SCAN — полный проход таблицы (или всего индекса), SEARCH — поиск по индексу
+        return [row[-1] for row in plan_rows if row[-1].startswith("SCAN tokens")]
+
+    found = []
+
+    def walk(node):
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name", "").startswith("tokens"):
+            found.append(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    plan = plan_rows[0][0]
+    walk((json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"])
+    return found
+
+
+@pytest.mark.anyio
+async def test_hot_token_queries_use_indexes(seeded_engine):
+    engine, users, tokens = seeded_engine
+    store = PostgresTokenStore()
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    live_refresh = next(t for t in tokens if t["token_hash"] and t["revoked_at"] is None)
+    live_onetime = next(t for t in tokens if t["token"] and not t["is_used"])
+
+    # запросы, которые на самом деле отправляет PostgresTokenStore
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "tokens" in statement and not statement.lstrip().upper().startswith("INSERT INTO TOKENS ("):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    async with session_maker() as session:
+        assert await store.get_valid(session, settings.REFRESH_TOKEN_TYPE, token_hash=live_refresh["token_hash"])
+        assert await store.get_valid(session, settings.EMAIL_CONFIRM_TOKEN_TYPE, token=live_onetime["token"])
+        assert await store.rotate(
+            session, live_refresh["token_hash"], "new-hash",
+            datetime.now(timezone.utc) + settings.REFRESH_TOKEN_TTL,
+        )
+        await store.revoke_all(session, users[0]["id"])
+        await session.rollback()
+    event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    assert len(statements) >= 4
+
+    explain = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN (FORMAT JSON) "
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = (await conn.exec_driver_sql(explain + statement, parameters)).all()
+            assert seq_scans(engine.dialect.name, plan) == [], statement
@@ -0,0 +1,95 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+
+from app.config.settings import settings
+from app.models.partitions import maintain_partitions, partition_start
+
+
+def test_partition_start_day_and_week():
+    moment = datetime(2026, 10, 18, 15, 30, tzinfo=timezone.utc)  # воскресенье
+
+    assert partition_start(moment, "day") == datetime(2026, 10, 18, tzinfo=timezone.utc)
+    assert partition_start(moment, "week") == datetime(2026, 10, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def pg_conn():
+    if not os.getenv("TEST_POSTGRES_URL"):
+        pytest.skip("TEST_POSTGRES_URL is not set")
+
+    url = make_url(os.environ["TEST_POSTGRES_URL"]).set(drivername="postgresql+psycopg2")
+    engine = create_engine(url)
+
+    @event.listens_for(engine, "connect")
+    def use_schema(dbapi_conn, record):
+        with dbapi_conn.cursor() as cursor:
+            cursor.execute("SET search_path TO partitions_test")
+
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS partitions_test CASCADE"))
+        conn.execute(text("CREATE SCHEMA partitions_test"))
+        conn.execute(text(
+            "CREATE TABLE tokens (id uuid, token_hash varchar, expires_at timestamptz, "
+            "PRIMARY KEY (id, expires_at)) PARTITION BY RANGE (expires_at)"
+        ))
+
+    with engine.begin() as conn:
+        yield conn
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA partitions_test CASCADE"))
+    engine.dispose()
+
+
+def test_maintenance_creates_ahead_and_drops_expired(pg_conn):
+    now = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+
+    stats = maintain_partitions(pg_conn, "day", now=now)
+    assert "tokens_default" in stats["created"]
+    assert "tokens_p20261018" in stats["created"]
+    days = settings.REFRESH_TOKEN_EXPIRE_DAYS + settings.TOKEN_PARTITIONS_PREMAKE
+    assert len(stats["created"]) == 1 + days + 1
+
+    # повторный запуск ничего не создаёт
+    assert maintain_partitions(pg_conn, "day", now=now)["created"] == []
+
+    # через два дня: партиции 18 и 19 октября целиком истекли
+    later = now + timedelta(days=2)
+    stats = maintain_partitions(pg_conn, "day", now=later)
+    assert sorted(stats["dropped"]) == ["tokens_p20261018", "tokens_p20261019"]
+    assert len(stats["created"]) == 2
+
+
+def test_lookup_prunes_expired_partitions(pg_conn):
+    now = datetime.now(timezone.utc)
+    maintain_partitions(pg_conn, "day", now=now - timedelta(days=3))
+
+    plan = "\n".join(pg_conn.execute(text(
+        "EXPLAIN SELECT * FROM tokens WHERE token_hash = 'x' AND expires_at > :now"
+    ), {"now": now}).scalars())
+
+    yesterday = partition_start(now - timedelta(days=1), "day")
+    assert f"tokens_p{yesterday:%Y%m%d}" not in plan
+    assert f"tokens_p{partition_start(now, 'day'):%Y%m%d}" in plan
+
+
+def test_rows_in_default_move_to_new_partition(pg_conn):
+    now = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+    pg_conn.execute(text("CREATE TABLE tokens_default PARTITION OF tokens DEFAULT"))
+    # beat не работал: токен на 20 октября уже лежит в default
+    pg_conn.execute(text(
+        "INSERT INTO tokens VALUES (gen_random_uuid(), 'stray', :expires)"
+    ), {"expires": now + timedelta(days=2)})
+    # занятое имя: эта партиция не создастся, остальные — да
+    pg_conn.execute(text("CREATE TABLE tokens_p20261021 (id uuid)"))
+
+    stats = maintain_partitions(pg_conn, "day", now=now)
+
+    assert "tokens_p20261020" in stats["created"]
+    assert [name for name, _ in stats["failed"]] == ["tokens_p20261021"]
+    assert "tokens_p20261022" in stats["created"]
+    assert pg_conn.execute(text("SELECT tableoid::regclass::text FROM tokens")).scalar() == "tokens_p20261020"
+    assert pg_conn.execute(text("SELECT count(*) FROM tokens_default")).scalar() == 0
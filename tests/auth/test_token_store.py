@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.auth.repository import AuthRepository
+from app.auth.service import AuthService
+from app.auth.token_store import MemoryTokenStore, PostgresTokenStore, RedisTokenStore
+from app.config.settings import settings
+from app.models.user import Tokens
+
+
+@pytest.fixture(params=["postgres", "memory", "redis"])
+def store(request):
+    if request.param == "postgres":
+        return PostgresTokenStore()
+    if request.param == "memory":
+        return MemoryTokenStore()
+
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return RedisTokenStore(fakeredis.FakeAsyncRedis(decode_responses=True))
+
+
+def refresh_token(user_id, token_hash, ttl=timedelta(days=1)):
+    return Tokens(
+        user_id=user_id,
+        token_type=settings.REFRESH_TOKEN_TYPE,
+        token_hash=token_hash,
+        expires_at=datetime.now(timezone.utc) + ttl,
+    )
+
+
+@pytest.mark.anyio
+async def test_rotate_replaces_token(store, db_session):
+    user_id = uuid4()
+    await store.save(db_session, refresh_token(user_id, "old"))
+
+    expires = datetime.now(timezone.utc) + timedelta(days=1)
+    assert await store.rotate(db_session, "old", "new", expires) == user_id
+
+    assert await store.get_valid(db_session, settings.REFRESH_TOKEN_TYPE, token_hash="old") is None
+    assert (await store.get_valid(db_session, settings.REFRESH_TOKEN_TYPE, token_hash="new")).user_id == user_id
+    # повторная ротация того же токена не проходит
+    assert await store.rotate(db_session, "old", "other", expires) is None
+
+
+@pytest.mark.anyio
+async def test_revoke_all_and_expiry(store, db_session):
+    user_id = uuid4()
+    await store.save(db_session, refresh_token(user_id, "a"))
+    await store.save(db_session, refresh_token(user_id, "b"))
+    await store.save(db_session, refresh_token(user_id, "expired", ttl=timedelta(milliseconds=1)))
+    await asyncio.sleep(0.01)
+
+    assert await store.get_valid(db_session, settings.REFRESH_TOKEN_TYPE, token_hash="expired") is None
+
+    await store.revoke_all(db_session, user_id)
+
+    for token_hash in ("a", "b"):
+        assert await store.get_valid(db_session, settings.REFRESH_TOKEN_TYPE, token_hash=token_hash) is None
+
+
+@pytest.mark.anyio
+async def test_one_time_token_mark_used(store, db_session):
+    token = Tokens(
+        user_id=uuid4(),
+        token=str(uuid4()),
+        token_type=settings.EMAIL_CONFIRM_TOKEN_TYPE,
+        expires_at=datetime.now(timezone.utc) + timedelta(hours=1),
+    )
+    await store.save(db_session, token)
+
+    stored = await store.get_valid(db_session, settings.EMAIL_CONFIRM_TOKEN_TYPE, token=token.token)
+    assert stored.id == token.id
+    # тип токена тоже учитывается
+    assert await store.get_valid(db_session, settings.PASSWORD_RESET_TOKEN_TYPE, token=token.token) is None
+
+    assert await store.mark_used(db_session, stored)
+    assert await store.get_valid(db_session, settings.EMAIL_CONFIRM_TOKEN_TYPE, token=token.token) is None
+
+
+@pytest.mark.anyio
+async def test_one_time_token_is_consumed_once(store, db_session):
+    token = Tokens(
+        user_id=uuid4(),
+        token=str(uuid4()),
+        token_type=settings.PASSWORD_RESET_TOKEN_TYPE,
+        expires_at=datetime.now(timezone.utc) + timedelta(hours=1),
+    )
+    await store.save(db_session, token)
+
+    # два параллельных запроса успели найти токен живым — погасит его только один
+    first = await store.get_valid(db_session, settings.PASSWORD_RESET_TOKEN_TYPE, token=token.token)
+    second = await store.get_valid(db_session, settings.PASSWORD_RESET_TOKEN_TYPE, token=token.token)
+
+    assert [await store.mark_used(db_session, first), await store.mark_used(db_session, second)] == [True, False]
+
+
+@pytest.mark.anyio
+async def test_failed_commit_returns_consumed_token(store, db_session, monkeypatch):
+    token = Tokens(
+        user_id=uuid4(),
+        token=str(uuid4()),
+        token_type=settings.EMAIL_CONFIRM_TOKEN_TYPE,
+        expires_at=datetime.now(timezone.utc) + timedelta(hours=1),
+    )
+    value = token.token
+    await store.save(db_session, token)
+    await db_session.commit()
+
+    async def broken_commit():
+        raise ConnectionError("database went away")
+
+    # Redis и memory гасят токен вне транзакции — без release он пропал бы
+    monkeypatch.setattr(db_session, "commit", broken_commit)
+    with pytest.raises(ConnectionError):
+        await AuthService(AuthRepository(store)).confirm_email(db_session, value)
+    await db_session.rollback()
+
+    assert await store.get_valid(db_session, settings.EMAIL_CONFIRM_TOKEN_TYPE, token=value) is not None
+
+
+def test_redis_client_has_timeouts():
+    pytest.importorskip("redis")
+    from app.config.redis import redis_client
+
+    kwargs = redis_client().connection_pool.connection_kwargs
+    assert kwargs["socket_connect_timeout"] == settings.REDIS_CONNECT_TIMEOUT_SECONDS
+    assert kwargs["socket_timeout"] == settings.REDIS_SOCKET_TIMEOUT_SECONDS
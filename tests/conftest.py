@@ -0,0 +1,120 @@
+# tests/conftest.py
+import asyncio
+import os
+from contextlib import contextmanager
+
+# Settings читаются при импорте app.*, поэтому значения по умолчанию — до импортов
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("TOKEN_EPOCH_BACKEND", "memory")
+os.environ.setdefault("RATE_LIMIT_BACKEND", "memory")
+os.environ.setdefault("EMAIL_DEDUP_BACKEND", "memory")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth import rate_limit
+from app.tasks import email_dedup
+from app.config.database import get_async_session
+from app.main import app
+from app.models.email_outbox import EmailOutbox
+
+
+async def _create_all(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiter(monkeypatch):
+    # окна и блокировки не переживают тест: все запросы идут с одного IP
+    monkeypatch.setattr(rate_limit, "_rate_limiter", None)
+    # и отправленные письма: тесты переиспользуют dedup_key
+    monkeypatch.setattr(email_dedup, "_email_dedup", None)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def engine():
+    # одна in-memory sqlite на тест
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    asyncio.run(_create_all(engine))
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def session_maker(engine):
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+def db_session(session_maker):
+    session = session_maker()
+    yield session
+    asyncio.run(session.close())
+
+
+@pytest.fixture
+def client(session_maker):
+    async def override_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = override_session
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+
+@pytest.fixture
+def outbox(session_maker):
+    """Письма из email outbox: [(email_type, to_email, token), ...]"""
+    async def fetch():
+        async with session_maker() as session:
+            stmt = select(EmailOutbox).order_by(EmailOutbox.created_at)
+            return [(row.email_type, row.to_email, row.token) for row in (await session.exec(stmt)).all()]
+
+    return lambda: asyncio.run(fetch())
+
+
+@pytest.fixture
+def statement_budget(engine):
+    """
+    with statement_budget(3): client.post(...) — тест падает, если внутри
+    выполнено больше SQL запросов; в сообщении — сами запросы
+    """
+    @contextmanager
+    def budget(limit: int):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(" ".join(statement.split()))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            yield statements
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+        assert len(statements) <= limit, (
+            f"{len(statements)} SQL statements, budget {limit}:\n" + "\n".join(statements)
+        )
+
+    return budget
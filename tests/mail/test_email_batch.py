@@ -0,0 +1,50 @@
+from unittest.mock import patch
+
+import pytest
+from celery.exceptions import Retry
+
+from app.tasks.email_tasks import send_email_batch
+
+
+def message(token):
+    return {
+        "email_type": "confirmation",
+        "to_email": f"{token}@test.com",
+        "token": token,
+        "dedup_key": f"confirmation:{token}",
+    }
+
+
+@patch("app.tasks.email_tasks._email")
+def test_batch_sends_every_message(mock_email):
+    result = send_email_batch([message("a"), message("b"), message("c")])
+
+    assert result == {"status": "success", "sent": 3}
+    assert [c.kwargs["to_email"] for c in mock_email.call_args_list] == ["a@test.com", "b@test.com", "c@test.com"]
+    assert "token=b" in mock_email.call_args_list[1].kwargs["html_body"]
+
+
+@patch("app.tasks.email_tasks._email")
+def test_batch_retries_only_failed_messages(mock_email):
+    def send(to_email, **kwargs):
+        if to_email == "b@test.com":
+            raise OSError("550 mailbox unavailable")
+
+    mock_email.side_effect = send
+
+    with patch.object(send_email_batch, "retry", side_effect=Retry()) as mock_retry:
+        with pytest.raises(Retry):
+            send_email_batch([message("a"), message("b"), message("c")])
+
+    assert mock_email.call_count == 3
+    assert mock_retry.call_args.kwargs["args"] == ([message("b")],)
+
+
+@patch("app.tasks.email_tasks._email")
+def test_repeated_batch_skips_sent_messages(mock_email):
+    send_email_batch([message("a"), message("b")])
+    # та же пачка ещё раз (relay не успел commit) и одно новое письмо
+    result = send_email_batch([message("a"), message("b"), message("c")])
+
+    assert result == {"status": "success", "sent": 1}
+    assert [c.kwargs["to_email"] for c in mock_email.call_args_list] == ["a@test.com", "b@test.com", "c@test.com"]
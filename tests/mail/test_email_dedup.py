@@ -0,0 +1,29 @@
+import pytest
+
+from app.tasks.email_dedup import MemoryEmailDedup, RedisEmailDedup, claim
+
+
+@pytest.fixture(params=["memory", "redis"])
+def dedup(request):
+    if request.param == "memory":
+        return MemoryEmailDedup(ttl=60)
+
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisEmailDedup(fakeredis.FakeRedis(decode_responses=True), ttl=60)
+
+
+def test_key_is_claimed_once_and_released_on_failure(dedup):
+    assert dedup.claim("confirmation:t1")
+    assert not dedup.claim("confirmation:t1")
+
+    dedup.release("confirmation:t1")  # отправка упала — retry отправит
+    assert dedup.claim("confirmation:t1")
+
+
+def test_store_errors_do_not_block_sending():
+    class Broken(MemoryEmailDedup):
+        def claim(self, key):
+            raise ConnectionError("redis down")
+
+    assert claim(Broken(ttl=60), "confirmation:t1")
+    assert claim(MemoryEmailDedup(ttl=60), None)  # вызов не из relay — без ключа
@@ -6,9 +6,10 @@ from app.tasks.email_tasks import send_password_reset, send_email_confirmation
 @patch("app.tasks.email_tasks._email")
 def test_send_email_confirmation_calls_email(mock_email):
     to_email = "user@test.com"
-    url = "http://test.local/confirm?token=123"
+    token = "123"
+    url = "/auth/confirm-email?token=123"
 
-    send_email_confirmation.__wrapped__(None, to_email, token)
+    send_email_confirmation(to_email, token)
 
     mock_email.assert_called_once()
 
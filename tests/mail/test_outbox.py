@@ -0,0 +1,107 @@
+from contextlib import nullcontext
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models.email_outbox import EmailOutbox
+from app.tasks import email_tasks, outbox
+
+
+@pytest.fixture
+def sync_session():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def add_email(session, email_type="confirmation", token="t1"):
+    session.add(EmailOutbox(
+        dedup_key=f"{email_type}:{token}",
+        email_type=email_type,
+        to_email="user@test.com",
+        token=token,
+    ))
+    session.commit()
+
+
+@pytest.fixture
+def celery_tasks():
+    tasks = {"confirmation": MagicMock(), "password_reset": MagicMock()}
+    with patch.object(outbox, "_celery_tasks", return_value=tasks), \
+            patch.object(outbox.celery_app, "producer_or_acquire", return_value=nullcontext("producer")):
+        yield tasks
+
+
+def test_relay_enqueues_batch_with_dedup_key(sync_session, celery_tasks):
+    add_email(sync_session, "confirmation", "t1")
+    add_email(sync_session, "password_reset", "t2")
+
+    assert outbox.relay_batch(sync_session, limit=10) == 2
+
+    celery_tasks["confirmation"].apply_async.assert_called_once_with(
+        args=("user@test.com", "t1"), task_id="confirmation:t1", producer="producer",
+    )
+    assert celery_tasks["password_reset"].apply_async.call_args.kwargs["task_id"] == "password_reset:t2"
+
+    # отправленное второй раз не уходит
+    assert outbox.relay_batch(sync_session, limit=10) == 0
+
+
+def test_relay_keeps_failed_email_for_retry(sync_session, celery_tasks):
+    add_email(sync_session)
+    celery_tasks["confirmation"].apply_async.side_effect = ConnectionError("redis down")
+
+    outbox.relay_batch(sync_session, limit=10)
+
+    row = sync_session.exec(select(EmailOutbox)).one()
+    assert row.sent_at is None
+    assert row.attempts == 1
+    assert "redis down" in row.last_error
+
+
+def test_batch_mode_publishes_one_task_per_chunk(sync_session):
+    for i in range(5):
+        add_email(sync_session, token=f"t{i}")
+
+    with patch.object(outbox.settings, "EMAIL_BATCH_MODE", True), \
+            patch.object(outbox.settings, "EMAIL_BATCH_SIZE", 2), \
+            patch.object(outbox, "send_email_batch") as batch_task, \
+            patch.object(outbox.celery_app, "producer_or_acquire", return_value=nullcontext("producer")):
+        assert outbox.relay_batch(sync_session, limit=10) == 5
+
+    chunks = [c.kwargs["args"][0] for c in batch_task.apply_async.call_args_list]
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert chunks[0][0]["dedup_key"] == "confirmation:t0"
+    assert all(row.sent_at for row in sync_session.exec(select(EmailOutbox)).all())
+
+
+def test_relay_crash_before_commit_sends_once(sync_session):
+    add_email(sync_session)
+
+    class Eager:
+        """Задача выполняется сразу, с тем же task_id, что дал relay"""
+
+        def __init__(self, task):
+            self.task = task
+            self.name = task.name
+
+        def apply_async(self, args, task_id, producer):
+            self.task.apply(args=args, task_id=task_id)
+
+    tasks = {"confirmation": Eager(email_tasks.send_email_confirmation)}
+    with patch.object(outbox, "_celery_tasks", return_value=tasks), \
+            patch.object(outbox.celery_app, "producer_or_acquire", return_value=nullcontext("producer")), \
+            patch.object(email_tasks, "_email") as mock_email:
+        # relay упал после публикации задачи, до commit: строка осталась неотправленной
+        with patch.object(sync_session, "commit", side_effect=ConnectionError("db down")):
+            with pytest.raises(ConnectionError):
+                outbox.relay_batch(sync_session, limit=10)
+        sync_session.rollback()
+
+        assert outbox.relay_batch(sync_session, limit=10) == 1
+
+    mock_email.assert_called_once()
+    assert sync_session.exec(select(EmailOutbox)).one().sent_at is not None
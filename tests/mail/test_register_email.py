@@ -3,7 +3,7 @@ from unittest.mock import patch
 
 def test_register_sends_confirmation_email(
     client,
-    db_session,
+    outbox,
 ):
     payload = {
         "email": "newuser@test.com",
@@ -11,16 +11,16 @@ def test_register_sends_confirmation_email(
         "password_confirm": "StrongPassword123!",
     }
 
-    with patch(
-        "app.auth.service.send_email_confirmation"
-    ) as mock_send_email:
+    # письмо уходит через outbox, а не из запроса: ни Celery, ни SMTP не трогаем
+    with patch("app.tasks.email_tasks._email") as mock_send_email:
 
         response = client.post("/auth/register", json=payload)
 
-        assert response.status_code == 201
+        assert response.status_code == 200
 
-        mock_send_email.assert_called_once()
+        mock_send_email.assert_not_called()
 
-        args, kwargs = mock_send_email.call_args
-        assert args[0] == payload["email"]
-        assert "confirm-email" in args[1]
+    [(email_type, to_email, token)] = outbox()
+    assert email_type == "confirmation"
+    assert to_email == payload["email"]
+    assert token
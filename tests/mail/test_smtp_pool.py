@@ -0,0 +1,153 @@
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.tasks.smtp_pool import SMTPPool
+
+
+class FakeSMTP:
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+        self.fail_next = None
+
+    def send_message(self, msg):
+        if self.fail_next:
+            error, self.fail_next = self.fail_next, None
+            raise error
+        self.sent.append(msg)
+
+    def noop(self):
+        return (250, b"OK")
+
+    def rset(self):
+        return (250, b"OK")
+
+    def quit(self):
+        self.closed = True
+
+    close = quit
+
+
+def make_pool(**kwargs):
+    servers = []
+
+    def connect():
+        servers.append(FakeSMTP())
+        return servers[-1]
+
+    return SMTPPool(connect, **kwargs), servers
+
+
+def test_connection_is_reused_up_to_max_messages():
+    pool, servers = make_pool(max_messages=3)
+
+    for i in range(5):
+        pool.send(f"msg-{i}")
+
+    assert len(servers) == 2
+    assert servers[0].sent == ["msg-0", "msg-1", "msg-2"]
+    assert servers[0].closed
+    assert servers[1].sent == ["msg-3", "msg-4"]
+
+
+def test_reconnects_after_server_side_disconnect():
+    pool, servers = make_pool()
+    pool.send("first")
+    servers[0].fail_next = smtplib.SMTPServerDisconnected("bye")
+
+    pool.send("second")
+
+    assert len(servers) == 2
+    assert servers[1].sent == ["second"]
+
+
+def test_rejected_message_keeps_connection():
+    pool, servers = make_pool()
+    pool.send("first")
+    servers[0].fail_next = smtplib.SMTPRecipientsRefused({"bad@test.com": (550, b"no such user")})
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.send("to-bad-address")
+    pool.send("third")
+
+    # тот же сеанс: без переподключения, TLS и логина
+    assert len(servers) == 1
+    assert servers[0].sent == ["first", "third"]
+    assert not servers[0].closed
+
+
+def test_broken_connection_is_replaced():
+    pool, servers = make_pool()
+    pool.send("first")
+    servers[0].fail_next = OSError("connection reset")
+
+    with pytest.raises(OSError):
+        pool.send("second")
+    pool.send("third")
+
+    assert servers[0].closed
+    assert len(servers) == 2
+    assert servers[1].sent == ["third"]
+
+
+def test_idle_connection_is_checked_with_noop():
+    pool, servers = make_pool(noop_after=0)
+    pool.send("first")
+    servers[0].noop = MagicMock(side_effect=smtplib.SMTPServerDisconnected())
+
+    pool.send("second")
+
+    servers[0].noop.assert_called_once()
+    assert len(servers) == 2
+    assert servers[1].sent == ["second"]
+
+
+def test_concurrent_sends_never_exceed_pool_size():
+    pool, servers = make_pool(size=3)
+    active, peak, lock = 0, 0, threading.Lock()
+
+    def slow_send(server, msg):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+        server.sent.append(msg)
+
+    original_connect = pool.connect
+
+    def connect():
+        server = original_connect()
+        server.send_message = lambda msg: slow_send(server, msg)
+        return server
+
+    pool.connect = connect
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        list(executor.map(pool.send, range(50)))
+
+    assert peak <= 3
+    assert len(servers) <= 3
+    assert sorted(m for s in servers for m in s.sent) == list(range(50))
+
+
+def test_worker_shutdown_quits_pooled_connections(monkeypatch):
+    from celery.signals import worker_shutdown
+
+    from app.tasks import email_tasks
+
+    pool, servers = make_pool()
+    pool.send("first")
+    monkeypatch.setattr(email_tasks, "smtp_pool", pool)
+
+    # --pool=threads шлёт worker_shutdown, а не worker_process_shutdown
+    worker_shutdown.send(sender=None)
+
+    assert servers[0].closed
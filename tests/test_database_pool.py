@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import NullPool
+
+from app.config import pool
+from app.config.pool import TimedAsyncQueuePool, TimedQueuePool, engine_options, pool_stats
+
+PG_URL = "postgresql+asyncpg://user:pass@db/app"
+
+
+def test_sqlite_keeps_default_pool():
+    assert engine_options("sqlite://") == {}
+
+
+def test_queue_pool_options_come_from_settings(monkeypatch):
+    monkeypatch.setattr(pool.settings, "DB_POOL_SIZE", 20)
+    monkeypatch.setattr(pool.settings, "DB_MAX_OVERFLOW", 0)
+
+    options = engine_options(PG_URL, is_async=True)
+
+    assert options["poolclass"] is TimedAsyncQueuePool
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 0
+    assert options["pool_pre_ping"] is True
+    assert engine_options(PG_URL)["poolclass"] is TimedQueuePool
+
+
+def test_pgbouncer_mode_disables_pool_and_prepared_statements(monkeypatch):
+    monkeypatch.setattr(pool.settings, "DB_PGBOUNCER", True)
+
+    options = engine_options(PG_URL, is_async=True)
+
+    assert options["poolclass"] is NullPool
+    assert options["connect_args"]["statement_cache_size"] == 0
+    assert options["connect_args"]["prepared_statement_cache_size"] == 0
+    assert engine_options(PG_URL) == {"poolclass": NullPool}
+
+
+def test_pool_metrics_report_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    stats = pool_stats(engine)
+    assert stats["checked_out"] == 1
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["wait_max_ms"] >= 50
+
+    held.close()
+    engine.dispose()
+    # метрики переживают пересоздание пула
+    assert pool_stats(engine)["checked_out"] == 0
+    assert pool_stats(engine)["timeouts"] == 1
@@ -0,0 +1,88 @@
+import re
+import urllib.request
+from unittest.mock import MagicMock
+
+import pytest
+
+from app import metrics
+from app.tasks import outbox
+
+PASSWORD = "StrongPassword123!"
+
+
+def sample(text: str, name: str, **labels) -> float:
+    """Значение серии из текста /metrics; 0 — серии нет"""
+    for line in text.splitlines():
+        series, _, value = line.rpartition(" ")
+        if not series.startswith(name + "{") and series != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', series))
+        if all(found.get(key) == value_ for key, value_ in labels.items()):
+            return float(value)
+    return 0.0
+
+
+def test_requests_are_measured_per_route(client):
+    before = client.get("/metrics").text
+
+    response = client.post(
+        "/auth/register",
+        json={"email": "metrics@test.com", "password": PASSWORD, "password_confirm": PASSWORD},
+    )
+    assert response.status_code == 200
+    client.get("/auth/confirm-email", params={"token": "no-such-token"})
+
+    text = client.get("/metrics").text
+    assert text.startswith("# HELP")
+
+    def delta(name, **labels):
+        return sample(text, name, **labels) - sample(before, name, **labels)
+
+    assert delta("http_request_duration_seconds_count", method="POST", route="/auth/register", status="200") == 1
+    # route — шаблон, а не путь с query
+    assert delta("http_request_duration_seconds_count", method="GET", route="/auth/confirm-email", status="400") == 1
+    # SQL запросы посчитаны внутри запроса (проверка email, insert user, token, outbox)
+    assert delta("http_request_db_statements_sum", route="/auth/register") >= 3
+    assert delta("http_request_db_seconds_count", route="/auth/register") == 1
+    assert delta("password_hash_seconds_count", operation="hash") == 1
+    assert sample(text, "password_hasher_completed_total") >= 1
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_seconds", "test", ("kind",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, kind='a"b')
+
+    lines = histogram.render()
+
+    assert 'test_seconds_bucket{kind="a\\"b",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{kind="a\\"b",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{kind="a\\"b",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{kind="a\\"b"} 4' in lines
+    assert histogram.count(kind='a"b') == 4
+
+
+def test_enqueue_latency_and_failures():
+    task = MagicMock()
+    task.name = "send_email_confirmation"
+    task.apply_async.side_effect = [None, ConnectionError("redis down")]
+    count = metrics.email_enqueue_seconds.count(task=task.name)
+    failures = metrics.email_enqueue_failures.value(task=task.name)
+
+    outbox._enqueue(task, args=("a@test.com", "t1"))
+    with pytest.raises(ConnectionError):
+        outbox._enqueue(task, args=("b@test.com", "t2"))
+
+    assert metrics.email_enqueue_seconds.count(task=task.name) == count + 2
+    assert metrics.email_enqueue_failures.value(task=task.name) == failures + 1
+
+
+def test_metrics_server_for_worker_processes():
+    server = metrics.start_http_server(0, host="127.0.0.1")
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+            assert response.headers["Content-Type"] == metrics.CONTENT_TYPE
+            assert "email_send_seconds" in response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
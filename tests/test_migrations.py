@@ -0,0 +1,220 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+import sqlalchemy as sa
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+
+from app.config.migrations import ALEMBIC_INI, check_schema_revision
+from app.models.partitions import is_partitioned, maintain_partitions, partition_name, partition_start
+
+PARTITION_SCRIPT = ALEMBIC_INI.parent / "migrations" / "partition_tokens.sql"
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'migrations.db'}"
+
+
+def alembic_config(url: str = "", connection=None) -> Config:
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("sqlalchemy.url", url)
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def baseline_metadata() -> sa.MetaData:
+    """Схема, которую create_all создавал до миграций: naive даты, полные индексы по token"""
+    metadata = sa.MetaData()
+    sa.Table(
+        "user", metadata,
+        sa.Column("id", sa.Uuid, primary_key=True),
+        sa.Column("email", sa.String, nullable=False, index=True, unique=True),
+        sa.Column("password_hash", sa.String, nullable=False),
+        sa.Column("is_active", sa.Boolean, nullable=False),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+    )
+    sa.Table(
+        "tokens", metadata,
+        sa.Column("id", sa.Uuid, primary_key=True),
+        sa.Column("user_id", sa.Uuid, sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("token", sa.String, index=True),
+        sa.Column("token_hash", sa.String, index=True),
+        sa.Column("token_type", sa.String, nullable=False),
+        sa.Column("expires_at", sa.DateTime, nullable=False),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+        sa.Column("is_used", sa.Boolean, nullable=False),
+        sa.Column("revoked_at", sa.DateTime),
+    )
+    return metadata
+
+
+def check(url: str):
+    async def run():
+        engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+        try:
+            await check_schema_revision(engine)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_migrations_match_models(db_url):
+    command.upgrade(alembic_config(db_url), "head")
+
+    engine = create_engine(db_url)
+    with engine.connect() as conn:
+        diff = compare_metadata(MigrationContext.configure(conn), SQLModel.metadata)
+    engine.dispose()
+
+    # модель поменялась без миграции — alembic revision --autogenerate
+    assert diff == []
+
+
+def test_create_all_database_upgrades_from_baseline(db_url):
+    engine = create_engine(db_url)
+    baseline_metadata().create_all(engine)
+
+    # путь из README: alembic stamp 0001 && alembic upgrade head
+    config = alembic_config(db_url)
+    command.stamp(config, "0001")
+    command.upgrade(config, "head")
+
+    with engine.connect() as conn:
+        diff = compare_metadata(MigrationContext.configure(conn), SQLModel.metadata)
+    engine.dispose()
+    assert diff == []
+
+
+def test_downgrade_to_base_and_back(db_url):
+    config = alembic_config(db_url)
+    command.upgrade(config, "head")
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+def test_startup_check_requires_head_revision(db_url):
+    with pytest.raises(RuntimeError, match="alembic upgrade head"):
+        check(db_url)
+
+    command.upgrade(alembic_config(db_url), "head")
+    check(db_url)
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="нужен TEST_POSTGRES_URL")
+def test_naive_timestamps_become_timestamptz_on_postgres():
+    url = os.environ["TEST_POSTGRES_URL"]
+    user_id = uuid4()
+    created = datetime(2026, 1, 1, 12, 0)  # naive UTC, как писал datetime.utcnow
+
+    def migrate(conn):
+        command.stamp(alembic_config(connection=conn), "0001")
+        command.upgrade(alembic_config(connection=conn), "head")
+
+    async def run():
+        admin = create_async_engine(url)
+        async with admin.begin() as conn:
+            await conn.execute(text("DROP SCHEMA IF EXISTS migration_test CASCADE"))
+            await conn.execute(text("CREATE SCHEMA migration_test"))
+        engine = create_async_engine(url, connect_args={"server_settings": {"search_path": "migration_test"}})
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(baseline_metadata().create_all)
+                await conn.execute(
+                    text('INSERT INTO "user" VALUES (:id, :email, :hash, true, :created)'),
+                    {"id": user_id, "email": "old@test.com", "hash": "x", "created": created},
+                )
+
+            async with engine.connect() as conn:
+                await conn.run_sync(migrate)
+                await conn.commit()
+
+            async with engine.begin() as conn:
+                types = (await conn.execute(text(
+                    "SELECT DISTINCT data_type FROM information_schema.columns "
+                    "WHERE table_schema = 'migration_test' AND table_name IN ('user', 'tokens') "
+                    "AND column_name IN ('created_at', 'expires_at', 'revoked_at')"
+                ))).scalars().all()
+                assert types == ["timestamp with time zone"]
+
+                stored = (await conn.execute(text('SELECT created_at FROM "user"'))).scalar()
+                assert stored == created.replace(tzinfo=timezone.utc)
+
+                # aware параметр в колонку tokens — именно это падало на naive схеме
+                await conn.execute(
+                    text("INSERT INTO tokens (id, user_id, token_type, expires_at, created_at, is_used) "
+                         "VALUES (:id, :user_id, 'refresh_token', :expires, :now, false)"),
+                    {"id": uuid4(), "user_id": user_id, "now": datetime.now(timezone.utc),
+                     "expires": datetime.now(timezone.utc) + timedelta(days=1)},
+                )
+        finally:
+            await engine.dispose()
+            async with admin.begin() as conn:
+                await conn.execute(text("DROP SCHEMA migration_test CASCADE"))
+            await admin.dispose()
+
+    asyncio.run(run())
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="нужен TEST_POSTGRES_URL")
+def test_partition_script_converts_migrated_tokens():
+    url = make_url(os.environ["TEST_POSTGRES_URL"]).set(drivername="postgresql+psycopg2")
+    engine = create_engine(url)
+
+    @event.listens_for(engine, "connect")
+    def use_schema(dbapi_conn, record):
+        with dbapi_conn.cursor() as cursor:
+            cursor.execute("SET search_path TO partition_script_test")
+
+    now = datetime.now(timezone.utc)
+    user_id, live_id = uuid4(), uuid4()
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS partition_script_test CASCADE"))
+        conn.execute(text("CREATE SCHEMA partition_script_test"))
+    try:
+        with engine.connect() as conn:
+            command.upgrade(alembic_config(connection=conn), "head")
+            conn.commit()
+            conn.execute(text('INSERT INTO "user" VALUES (:id, \'a@test.com\', \'x\', true, :now)'),
+                         {"id": user_id, "now": now})
+            for token_id, expires in [(live_id, now + timedelta(days=1)), (uuid4(), now - timedelta(days=1))]:
+                conn.execute(
+                    text("INSERT INTO tokens (id, user_id, token_type, expires_at, created_at, is_used) "
+                         "VALUES (:id, :user_id, 'refresh_token', :expires, :now, false)"),
+                    {"id": token_id, "user_id": user_id, "expires": expires, "now": now},
+                )
+            conn.commit()
+
+        # как psql -f: BEGIN/COMMIT из самого скрипта
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql(PARTITION_SCRIPT.read_text())
+        maintain_partitions(engine, "day", now=now)
+
+        with engine.connect() as conn:
+            assert is_partitioned(conn)
+            # истёкший токен не перенесён, живой переехал из default в свою партицию
+            rows = conn.execute(text("SELECT id, tableoid::regclass::text FROM tokens")).all()
+            tomorrow = partition_start(now + timedelta(days=1), "day")
+            assert rows == [(live_id, partition_name("tokens", tomorrow))]
+
+            # индексы 0002 пересозданы на партиционированной таблице
+            indexes = conn.execute(text(
+                "SELECT indexname FROM pg_indexes WHERE schemaname = 'partition_script_test' "
+                "AND tablename = 'tokens' ORDER BY indexname"
+            )).scalars().all()
+            assert indexes == ["ix_tokens_onetime_live", "ix_tokens_refresh_live", "ix_tokens_user_live", "tokens_pkey"]
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DROP SCHEMA partition_script_test CASCADE"))
+        engine.dispose()
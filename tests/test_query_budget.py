@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from app.main import app
+from app.metrics import MetricsMiddleware
+
+PASSWORD = "StrongPassword123!"
+EMAIL = "budget@test.com"
+
+
+def test_auth_endpoints_stay_within_statement_budget(client, outbox, statement_budget):
+    # бюджеты — текущее число запросов: рост значит лишний round-trip к базе
+    with statement_budget(4):
+        response = client.post("/auth/register", json={"email": EMAIL, "password": PASSWORD, "password_confirm": PASSWORD})
+        assert response.status_code == 200
+
+    _, _, token = outbox()[-1]
+    with statement_budget(3):
+        assert client.get("/auth/confirm-email", params={"token": token}).status_code == 200
+
+    with statement_budget(2):
+        response = client.post("/auth/login/json", json={"email": EMAIL, "password": PASSWORD})
+        assert response.status_code == 200
+    pair = response.json()
+
+    with statement_budget(2):
+        response = client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]})
+        assert response.status_code == 200
+    pair = response.json()
+
+    with statement_budget(1):
+        response = client.post("/auth/logout-all", headers={"Authorization": f"Bearer {pair['access_token']}"})
+        assert response.status_code == 200
+
+    with statement_budget(3):
+        response = client.post("/auth/password-reset/request", json={"email": EMAIL})
+        assert response.status_code == 200
+
+
+def test_budget_failure_lists_statements(client, statement_budget):
+    with pytest.raises(AssertionError) as exc:
+        with statement_budget(0):
+            client.post("/auth/password-reset/request", json={"email": "nobody@test.com"})
+
+    assert "budget 0" in str(exc.value)
+    assert "SELECT" in str(exc.value)
+
+
+def profile_middleware(monkeypatch, **kwargs):
+    middleware = next(m for m in app.user_middleware if m.cls is MetricsMiddleware)
+    for name, value in kwargs.items():
+        monkeypatch.setitem(middleware.kwargs, name, value)
+    monkeypatch.setattr(app, "middleware_stack", None)  # пересобрать стек с новыми аргументами
+
+
+def test_profile_headers_are_off_by_default(client):
+    response = client.post("/auth/password-reset/request", json={"email": "nobody@test.com"})
+
+    assert "x-db-statements" not in response.headers
+
+
+def test_profile_headers_match_budget(client, statement_budget, monkeypatch):
+    profile_middleware(monkeypatch, headers=True)
+    with statement_budget(4) as statements:
+        response = client.post(
+            "/auth/register",
+            json={"email": "headers@test.com", "password": PASSWORD, "password_confirm": PASSWORD},
+        )
+
+    assert int(response.headers["x-db-statements"]) == len(statements)
+    assert float(response.headers["x-db-time-ms"]) >= float(response.headers["x-db-slowest-ms"]) > 0
+
+
+def test_profile_log_line(client, capsys, monkeypatch):
+    profile_middleware(monkeypatch, log=True)
+
+    client.post("/auth/password-reset/request", json={"email": "nobody@test.com"})
+
+    line = next(line for line in capsys.readouterr().out.splitlines() if line.startswith("[SQL] "))
+    record = json.loads(line.removeprefix("[SQL] "))
+    assert record["route"] == "/auth/password-reset/request"
+    assert record["statements"] >= 1
+    assert record["slowest"].startswith("SELECT")
@@ -0,0 +1,105 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlmodel import SQLModel
+
+from app.auth.security import token_expiration
+from app.config import database
+from app.config.replicas import ReplicaRouter
+from app.config.settings import settings
+from app.models.user import Tokens
+
+
+async def _prepare(router: ReplicaRouter):
+    for replica in router.replicas:
+        async with replica.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+
+def reset_token(token: str) -> Tokens:
+    return Tokens(
+        user_id=uuid4(),
+        token=token,
+        token_type=settings.PASSWORD_RESET_TOKEN_TYPE,
+        expires_at=token_expiration(1),
+    )
+
+
+@pytest.fixture
+def replica_urls(tmp_path):
+    return [f"sqlite+aiosqlite:///{tmp_path / f'replica{i}.db'}" for i in range(2)]
+
+
+@pytest.mark.anyio
+async def test_round_robin_skips_unhealthy_replica(replica_urls, tmp_path):
+    down = f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}"  # каталога нет — не откроется
+    router = ReplicaRouter([replica_urls[0], down, replica_urls[1]], check_interval=60)
+
+    picked = [(await router.pick()).engine.url.database[-11:] for _ in range(4)]
+
+    # очередь 0, down, 1: вместо упавшей берётся следующая
+    assert picked == ["replica0.db", "replica1.db", "replica1.db", "replica0.db"]
+    assert router.replicas[1].healthy is False
+    await router.dispose()
+
+
+@pytest.mark.anyio
+async def test_no_healthy_replica_means_primary(replica_urls):
+    router = ReplicaRouter(replica_urls[:1], check_interval=60)
+    router.mark_failed(router.replicas[0])
+
+    assert await router.pick() is None
+    assert await ReplicaRouter([], check_interval=60).pick() is None
+    await router.dispose()
+
+
+@pytest.mark.anyio
+async def test_hanging_replica_check_times_out(replica_urls, monkeypatch):
+    router = ReplicaRouter(replica_urls, check_interval=60, check_timeout=0.05)
+    ping = router._ping
+
+    async def hang(replica):
+        if replica is router.replicas[0]:
+            await asyncio.sleep(10)  # реплика не отвечает
+        await ping(replica)
+
+    monkeypatch.setattr(router, "_ping", hang)
+
+    picked = await asyncio.wait_for(router.pick(), 1)
+
+    assert picked is router.replicas[1]
+    assert router.replicas[0].healthy is False
+    await router.dispose()
+
+
+@pytest.fixture
+def replica(client, replica_urls, monkeypatch):
+    router = ReplicaRouter(replica_urls[:1], check_interval=60)
+    asyncio.run(_prepare(router))
+    monkeypatch.setattr(database, "replica_router", router)
+    yield router.replicas[0]
+    asyncio.run(router.dispose())
+
+
+async def _add(session_maker, token: Tokens):
+    async with session_maker() as session:
+        session.add(token)
+        await session.commit()
+
+
+def test_password_reset_link_is_checked_on_replica(client, replica):
+    asyncio.run(_add(replica.session_maker, reset_token("on-replica")))
+
+    response = client.get("/auth/password-reset/confirm?token=on-replica", follow_redirects=False)
+
+    assert response.status_code == 303
+
+
+def test_password_reset_link_falls_back_to_primary_when_replica_lags(client, session_maker, replica):
+    asyncio.run(_add(session_maker, reset_token("only-on-primary")))
+
+    response = client.get("/auth/password-reset/confirm?token=only-on-primary", follow_redirects=False)
+
+    assert response.status_code == 303
+    assert client.get("/auth/password-reset/confirm?token=unknown").status_code == 400